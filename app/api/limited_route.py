@@ -0,0 +1,69 @@
+import json
+from typing import Any, Callable, Coroutine
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+from app.services.limits import PayloadTooLarge, check_batch, check_payload, limits_for, read_body
+
+
+def _is_json(content_type: str) -> bool:
+    # The same test FastAPI applies before it parses a body as JSON
+    if not content_type:
+        return True
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type == "application/json" or (media_type.startswith("application/") and media_type.endswith("+json"))
+
+
+class LimitedRoute(APIRoute):
+    """
+    APIRoute for the document endpoints that enforces the document type's
+    payload limits (see app.services.limits) before FastAPI parses and
+    validates the body. The body is read here, stopping at the size limit,
+    and parsed once; the parsed JSON is left on the request, so FastAPI does
+    not read or parse it again. A body over a limit gets a 413 whose detail
+    names the limit, the field and the sizes.
+
+    The document type comes from the route name, "<document type>_<operation>".
+    """
+
+    def payload_checks(self) -> tuple[int, Callable[[Any], None]]:
+        """The body size limit and the check for the parsed body."""
+        document_type, _, _ = self.name.rpartition("_")
+        limits = limits_for(document_type)
+        return limits.max_body_bytes, lambda payload: check_payload(payload, limits)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        max_body_bytes, check = self.payload_checks()
+
+        async def limited_handler(request: Request) -> Response:
+            try:
+                body = await read_body(request.stream(), max_body_bytes, request.headers.get("content-length"))
+                request._body = body
+                if body and _is_json(request.headers.get("content-type", "")):
+                    try:
+                        payload = json.loads(body)
+                    except ValueError:
+                        # Left for FastAPI's own parsing to report
+                        pass
+                    else:
+                        request._json = payload
+                        check(payload)
+            except PayloadTooLarge as e:
+                raise HTTPException(status_code=413, detail=e.detail)
+            return await handler(request)
+
+        return limited_handler
+
+
+class BatchRoute(LimitedRoute):
+    """
+    LimitedRoute for /docs/batch: the body is capped at
+    settings.batch_max_body_bytes, and each item's payload is held to its
+    document type's limits, so an item gets the 413 its own route would give.
+    """
+
+    def payload_checks(self) -> tuple[int, Callable[[Any], None]]:
+        return settings.batch_max_body_bytes, check_batch
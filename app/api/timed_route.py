@@ -0,0 +1,95 @@
+import functools
+import inspect
+from typing import Any, Callable, Coroutine
+
+from fastapi import HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+from app.services.metrics import metrics
+
+
+def _mark_validated(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wraps a route endpoint so that entering it records the "validate" stage:
+    FastAPI only calls the endpoint once the body has been read, parsed and
+    validated against the request schema.
+    """
+    if getattr(endpoint, "_marks_validated", False):
+        return endpoint
+
+    def record() -> None:
+        timings = metrics.current()
+        if timings is not None:
+            timings.record("validate", timings.elapsed())
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            record()
+            return await endpoint(*args, **kwargs)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            record()
+            return endpoint(*args, **kwargs)
+
+    wrapper._marks_validated = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute for the document endpoints that records per-stage timings
+    (validate, render, queue, build, ...) labelled by document type, and adds
+    them to the response as a Server-Timing header.
+
+    The document type and operation come from the route name, which is
+    "<document type>_<operation>" (e.g. "nda_preview"). With metrics disabled
+    the route is a plain APIRoute.
+
+    A streamed response is observed once its body has been sent, so the
+    stages recorded while streaming count too; its Server-Timing header goes
+    out before the body and only carries the stages up to then.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        if settings.metrics_enabled:
+            endpoint = _mark_validated(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        if not settings.metrics_enabled:
+            return handler
+        document_type, _, operation = self.name.rpartition("_")
+
+        async def timed_handler(request: Request) -> Response:
+            timings, token = metrics.start_request(document_type, operation)
+            status = 500
+            streamed = False
+            try:
+                response = await handler(request)
+                status = response.status_code
+                streamed = isinstance(response, StreamingResponse)
+            except HTTPException as e:
+                status = e.status_code
+                raise
+            except RequestValidationError:
+                status = 422
+                raise
+            finally:
+                if streamed:
+                    metrics.leave_request(token)
+                    total = timings.elapsed()
+                else:
+                    total = metrics.finish_request(timings, token, status)
+            if streamed:
+                response.body_iterator = metrics.observe_streamed(response.body_iterator, timings, status)
+            if settings.metrics_server_timing:
+                response.headers["Server-Timing"] = timings.server_timing(total)
+            return response
+
+        return timed_handler
@@ -1,317 +1,557 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
-from fastapi.templating import Jinja2Templates
+import asyncio
+import io
+import json
+import time
+from typing import AsyncIterator, Iterator, Literal, Optional, Sequence
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel 
 
-# Import all schemas
-from app.schemas.schema import (
-    Default, Submit, WillSubmit, CRASubmit, SDSubmit, ResiRent,
-    NDASubmit, EmploymentSubmit, PartnershipSubmit, FreelancerSubmit,
-    ServiceSubmit, PoASubmit, GeneralAffidavitSubmit, NameChangeSubmit,
-    CeaseDesistSubmit, LegalNoticeSubmit
-)
-
-from app.services.utils import generate_docx_stream
+from app.schemas.schema import Default, BatchSubmit, SectionsPreview, JobStatus
+
+from app.services.utils import build_docx_bytes
+from app.services.docx_builder import ChunkSink, ZipWriter, docx_builder
+from app.services.pdf_builder import build_pdf_bytes
+from app.services.executor import document_executor, QueueFullError
+from app.services.cache import render_cache, docx_store, payload_digest, text_digest
+from app.services.rendering import render_cached, iter_render_cached
+from app.services.batch import iter_batch_zip
+from app.services.sections import render_sections
+from app.services.jobs import DONE, Job, job_runner, job_store
+from app.services.singleflight import build_flights, render_flights
+from app.services.streaming import iterate_in_thread
+from app.services.documents import DOCUMENT_TYPES, DocumentType
+from app.services.metrics import metrics
+from app.api.limited_route import BatchRoute, LimitedRoute
+from app.api.timed_route import TimedRoute
+from app.core.config import settings
 
 router = APIRouter(prefix="/docs")
-templates = Jinja2Templates(directory="templates")
 
-# Helper function to handle preview/download logic generically
-def handle_doc_request(template_name: str, data: BaseModel, is_download: bool = False, filename: str = "document.docx"):
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Download formats: ?format=docx (default) or ?format=pdf
+OutputFormat = Literal["docx", "pdf"]
+OUTPUT_FORMATS = {
+    "docx": (DOCX_MEDIA_TYPE, build_docx_bytes),
+    "pdf": ("application/pdf", build_pdf_bytes),
+}
+
+# A download can ask for several formats at once (?format=docx&format=pdf&format=txt):
+# the text is rendered once and the files come back together in a ZIP
+DownloadFormat = Literal["docx", "pdf", "txt"]
+
+# Streaming preview formats: ?format=ndjson (default) or ?format=sse
+StreamFormat = Literal["ndjson", "sse"]
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+def _store_key(digest: str, output_format: OutputFormat) -> str:
+    return digest if output_format == "docx" else f"{digest}.{output_format}"
+
+def _builder_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Document builder is busy, please retry shortly.",
+        headers={"Retry-After": str(settings.docx_retry_after_seconds)},
+    )
+
+async def _build_and_store(store_key: str, rendered_text: str, output_format: OutputFormat) -> bytes:
+    _, build = OUTPUT_FORMATS[output_format]
     try:
-        template = templates.get_template(template_name)
-        data_dict = data.model_dump()
-        
-        # Helper to fill "words" fields if missing
-        for key in data_dict.keys():
-            if key.endswith('_in_words') and not data_dict[key]:
-                data_dict[key] = "______________________"
-
-        rendered_text = template.render(**data_dict)
-        
-        if is_download:
-            file_stream = generate_docx_stream(rendered_text)
-            return StreamingResponse(
-                file_stream,
-                media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                headers={"Content-Disposition": f"attachment; filename={filename}"}
-            )
-        else:
-            return {"data": rendered_text}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating {filename}: {str(e)}")
-
-# --- MARITAL FINANCIAL ARRANGEMENT (MFA) ---
-
-@router.post('/mfa_generator', response_model=Default)
-def mfa_preview(data: Submit):
-    """Phase 1: Generates text for preview only."""
+        payload = await document_executor.run(build, rendered_text)
+    except QueueFullError:
+        raise _builder_busy()
+    docx_store.set(store_key, payload)
+    return payload
+
+# Marks the end of a streamed build's chunks
+_STREAM_END = None
+# Chunks a streamed build may get ahead of its client
+_STREAM_BUFFERED_CHUNKS = 4
+
+class _StreamedBuild:
+    """
+    A large DOCX written by the incremental writer, in the document executor
+    slot taken by the caller. Each chunk is handed to the streaming response
+    at most _STREAM_BUFFERED_CHUNKS ahead of it, so a slow client slows the build.
+
+    The build is a single-flight call of its own. A file up to
+    docx_stream_keep_max_bytes is also kept: it goes to the DOCX store and to
+    the identical downloads that joined the flight, and is finished for them
+    if the client goes away. A larger file is only streamed; the result is
+    None and joined downloads build their own copy.
+    """
+
+    def __init__(self, store_key: str, rendered_text: str):
+        self.store_key = store_key
+        self.rendered_text = rendered_text
+        self.chunks: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+        self.space = asyncio.Semaphore(_STREAM_BUFFERED_CHUNKS)
+        self.listening = True
+
+    async def run(self) -> Optional[bytes]:
+        started = time.perf_counter()
+        kept: Optional[io.BytesIO] = io.BytesIO()
+        produced = iterate_in_thread(
+            docx_builder.iter_build(self.rendered_text, settings.docx_stream_chunk_bytes),
+            executor=document_executor.thread_pool,
+        )
+        try:
+            async for chunk in produced:
+                if kept is not None:
+                    if kept.tell() + len(chunk) <= settings.docx_stream_keep_max_bytes:
+                        kept.write(chunk)
+                    else:
+                        kept = None
+                if self.listening:
+                    await self.space.acquire()
+                if self.listening:
+                    self.chunks.put_nowait(chunk)
+                elif kept is None:
+                    # Nobody to send it to and nothing to keep
+                    break
+        except BaseException:
+            document_executor.release(failed=True)
+            raise
+        finally:
+            await produced.aclose()
+            self.chunks.put_nowait(_STREAM_END)
+        document_executor.release()
+        # Counted against the request, which is observed once the response has been sent
+        metrics.record_stage("build", time.perf_counter() - started)
+        if kept is None:
+            return None
+        payload = kept.getvalue()
+        docx_store.set(self.store_key, payload)
+        return payload
+
+    async def iter_response(self, build: "asyncio.Task[Optional[bytes]]") -> AsyncIterator[bytes]:
+        try:
+            while True:
+                chunk = await self.chunks.get()
+                if chunk is _STREAM_END:
+                    break
+                self.space.release()
+                yield chunk
+        finally:
+            self.listening = False
+            # Wake the build if it is waiting for this client
+            self.space.release()
+        # A failed build cuts the response short instead of ending it as a truncated file
+        await asyncio.shield(build)
+
+async def get_document_bytes(digest: str, rendered_text: str, output_format: OutputFormat = "docx") -> bytes:
+    """
+    Returns the finished file for the rendered text, building it on the
+    dedicated document executor and storing it only on a store miss.
+    Concurrent misses for the same file share a single build.
+    """
+    store_key = _store_key(digest, output_format)
+    payload = docx_store.get(store_key)
+    if payload is None:
+        payload = await build_flights.run(
+            store_key, lambda: _build_and_store(store_key, rendered_text, output_format)
+        )
+        if payload is None:
+            # Joined a streamed build too large to keep
+            payload = await _build_and_store(store_key, rendered_text, output_format)
+    metrics.record_size(output_format, len(payload))
+    return payload
+
+async def prebuild_docx(rendered_text: str) -> None:
+    """Background task: fill the DOCX store after a preview so the next download is a hit."""
+    digest = text_digest(rendered_text)
+    if digest in docx_store:
+        return
     try:
-        agreement = templates.get_template('mfa.html')
-        rendered_text = agreement.render(**data.model_dump())
-        print(rendered_text)
+        docx_store.set(digest, await document_executor.run(build_docx_bytes, rendered_text))
+    except QueueFullError:
+        # Best effort only; the download will build it if the pool was busy
+        pass
+
+def schedule_prebuild(background_tasks: Optional[BackgroundTasks], rendered_text: str) -> None:
+    if settings.docx_prebuild_on_preview and background_tasks is not None:
+        background_tasks.add_task(prebuild_docx, rendered_text)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+async def document_response(
+    rendered_text: str,
+    filename: str,
+    request: Optional[Request] = None,
+    output_format: OutputFormat = "docx",
+) -> Response:
+    """
+    Sends the DOCX (or PDF) for the rendered text. The ETag is the digest of
+    the text, so a client revalidating with If-None-Match gets a 304 without any build.
+
+    A finished file is sent as is, in one body message with its
+    Content-Length; only the incremental DOCX writer is streamed.
+    """
+    digest = text_digest(rendered_text)
+    etag = f'"{digest}"' if output_format == "docx" else f'"{digest}-{output_format}"'
+    if request is not None and _etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    media_type, _ = OUTPUT_FORMATS[output_format]
+    if output_format != "docx":
+        filename = f"{filename.rsplit('.', 1)[0]}.{output_format}"
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+    }
+    store_key = _store_key(digest, output_format)
+    if (
+        output_format == "docx"
+        and settings.docx_engine == "template"
+        and len(rendered_text) >= settings.docx_stream_threshold_chars
+        and not build_flights.in_flight(store_key)
+        and store_key not in docx_store
+    ):
+        # Large documents: stream the package out while word/document.xml is being written.
+        # A stored file is sent as is, and a build of it that is already running is joined.
+        try:
+            document_executor.reserve()
+        except QueueFullError:
+            raise _builder_busy()
+        stream = _StreamedBuild(store_key, rendered_text)
+        build = build_flights.start(store_key, stream.run)
+        return StreamingResponse(stream.iter_response(build), media_type=media_type, headers=headers)
+
+    payload = await get_document_bytes(digest, rendered_text, output_format)
+    return Response(content=payload, media_type=media_type, headers=headers)
+
+def text_response(rendered_text: str, filename: str, request: Optional[Request] = None) -> Response:
+    """Sends the rendered text itself as a .txt download, with the same ETag handling as document_response."""
+    digest = text_digest(rendered_text)
+    etag = f'"{digest}-txt"'
+    if request is not None and _etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename.rsplit('.', 1)[0]}.txt",
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+    }
+    content = rendered_text.encode("utf-8")
+    metrics.record_size("txt", len(content))
+    return Response(content=content, media_type="text/plain; charset=utf-8", headers=headers)
+
+async def _format_bytes(digest: str, rendered_text: str, output_format: DownloadFormat) -> bytes:
+    if output_format == "txt":
+        return rendered_text.encode("utf-8")
+    return await get_document_bytes(digest, rendered_text, output_format)
+
+async def bundle_response(
+    rendered_text: str,
+    filename: str,
+    request: Optional[Request],
+    output_formats: list[DownloadFormat],
+) -> Response:
+    """
+    Sends the rendered text in several formats as one ZIP (<name>.docx,
+    <name>.pdf, <name>.txt). The files are built in parallel, each through
+    the store and build coalescing of a single-format download, so a later
+    download of one of them is a store hit.
+    """
+    digest = text_digest(rendered_text)
+    etag = f'"{digest}-{"+".join(output_formats)}"'
+    if request is not None and _etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    files = await asyncio.gather(*(
+        _format_bytes(digest, rendered_text, output_format) for output_format in output_formats
+    ))
+    stem = filename.rsplit('.', 1)[0]
+    sink = ChunkSink()
+    writer = ZipWriter(sink, time.time())
+    for output_format, payload in zip(output_formats, files):
+        # DOCX and PDF are already compressed
+        writer.add_data(f"{stem}.{output_format}", payload, compress=output_format == "txt")
+    writer.close()
+    payload = sink.drain()
+    metrics.record_size("zip", len(payload))
+    return Response(
+        content=payload,
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename={stem}.zip",
+            "ETag": etag,
+            "Cache-Control": "private, no-cache",
+        },
+    )
+
+# Helper function to handle preview logic generically
+def handle_doc_request(
+    doc: DocumentType,
+    data: BaseModel,
+    background_tasks: Optional[BackgroundTasks] = None,
+):
+    try:
+        rendered_text = render_cached(doc.template, data)
+        metrics.record_text_size("text", rendered_text)
+        schedule_prebuild(background_tasks, rendered_text)
         return {"data": rendered_text}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating mfa preview: {str(e)}")
-
-@router.post('/mfa_download')
-def mfa_download(data: Submit):
-    """Phase 2: Generates DOCX file and streams it for download."""
+        raise HTTPException(status_code=500, detail=f"Error generating {doc.title} preview: {str(e)}")
+
+def _stream_event(stream_format: StreamFormat, payload: dict, event: Optional[str] = None) -> str:
+    line = json.dumps(payload, ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {line}\n\n" if event else f"data: {line}\n\n"
+    return line + "\n"
+
+def iter_preview_stream(doc: DocumentType, data: BaseModel, stream_format: StreamFormat) -> Iterator[str]:
+    """
+    Yields the preview as {"data": <text chunk>} events while the template is
+    rendering, then {"done": true}. The status line is already sent by then,
+    so a render failure is reported as a final {"error": ...} event.
+    """
     try:
-        agreement = templates.get_template('mfa.html')
-        rendered_text = agreement.render(**data.model_dump())
-        file_stream = generate_docx_stream(rendered_text)
-        
-        return StreamingResponse(
-            file_stream,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={"Content-Disposition": "attachment; filename=Last_Will_and_Testament.docx"}
-        )
+        for chunk in iter_render_cached(doc.template, data, settings.preview_stream_chunk_chars):
+            yield _stream_event(stream_format, {"data": chunk})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating mfa file: {str(e)}")
-
+        yield _stream_event(stream_format, {"error": f"Error generating {doc.title} preview: {str(e)}"}, "error")
+        return
+    yield _stream_event(stream_format, {"done": True}, "done")
 
-
-
-# --- WILL GENERATOR ---
-@router.post('/will_generator', response_model=Default)
-def will_preview(data: WillSubmit):
-    """Phase 1: Generates text for preview only."""
+def handle_sections_request(doc: DocumentType, data: BaseModel, previous_token: Optional[str]):
     try:
-        agreement = templates.get_template('will.html')
-        rendered_text = agreement.render(**data.model_dump())
-        return {"data": rendered_text}
+        return render_sections(doc.template, data, previous_token)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating Will preview: {str(e)}")
-
-@router.post('/will_download')
-def will_download(data: WillSubmit):
-    """Phase 2: Generates DOCX file and streams it for download."""
+        raise HTTPException(status_code=500, detail=f"Error generating {doc.title} preview: {str(e)}")
+
+# Helper function to handle download logic generically.
+# The render runs on the shared threadpool; the DOCX/PDF build on the document executor.
+async def handle_download(
+    doc: DocumentType,
+    data: BaseModel,
+    request: Optional[Request] = None,
+    output_formats: Sequence[DownloadFormat] = ("docx",),
+):
     try:
-        agreement = templates.get_template('will.html')
-        rendered_text = agreement.render(**data.model_dump())
-        file_stream = generate_docx_stream(rendered_text)
-        
-        return StreamingResponse(
-            file_stream,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={"Content-Disposition": "attachment; filename=Last_Will_and_Testament.docx"}
+        # Identical downloads arriving together (double clicks, client retries)
+        # share one render here and one build in get_document_bytes
+        digest = payload_digest(data)
+        rendered_text = await render_flights.run(
+            f"{doc.name}:{digest}",
+            lambda: run_in_threadpool(render_cached, doc.template, data, digest),
         )
+        formats = list(dict.fromkeys(output_formats))
+        if formats == ["txt"]:
+            return text_response(rendered_text, doc.filename, request)
+        if len(formats) == 1 and formats[0] in OUTPUT_FORMATS:
+            return await document_response(rendered_text, doc.filename, request, formats[0])
+        return await bundle_response(rendered_text, doc.filename, request, formats)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating Will file: {str(e)}")
-
-# --- COMMERCIAL RENTAL AGREEMENT (CRA) ---
-
-@router.post('/cra_generator', response_model=Default)
-def cra_preview(data: CRASubmit):
-    """Phase 1: Generates text for preview only using HTML template."""
+        raise HTTPException(status_code=500, detail=f"Error generating {doc.title} file: {str(e)}")
+
+def job_status(job: Job, request: Request) -> dict:
+    status = {
+        "job_id": job.job_id,
+        "document_type": job.document_type,
+        "format": job.output_format,
+        "status": job.status,
+        "created_at": job.created_at,
+        "expires_at": job.expires_at,
+        "size": job.size,
+        "error": job.error,
+    }
+    if job.status == DONE:
+        status["result_url"] = str(request.url_for("job_result", job_id=job.job_id))
+    return {key: value for key, value in status.items() if value is not None}
+
+async def handle_job_submit(doc: DocumentType, data: BaseModel, request: Request, output_format: OutputFormat = "docx"):
+    _, build = OUTPUT_FORMATS[output_format]
     try:
-        # Load the HTML template (which is now plain text)
-        agreement = templates.get_template('cra.html')
-        
-        data_dict = data.model_dump()
-
-        # Handle missing "words" fields cleanly so the template doesn't look broken
-        if not data_dict.get('rent_amount_in_words'):
-             data_dict['rent_amount_in_words'] = "______________________"
-        if not data_dict.get('security_deposit_in_words'):
-             data_dict['security_deposit_in_words'] = "______________________"
-
-        # Render the template with the Pydantic model data
-        rendered_text = agreement.render(
-            **data_dict
+        job = await job_runner.submit(doc, data, output_format, build)
+    except QueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many document jobs in progress, please retry shortly.",
+            headers={"Retry-After": str(settings.docx_retry_after_seconds)},
         )
-        return {"data": rendered_text}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating CRA preview: {str(e)}")
-
-@router.post('/cra_download')
-def cra_download(data: CRASubmit):
-    """Phase 2: Generates DOCX file and streams it for download using HTML template."""
-    try:
-        agreement = templates.get_template('cra.html')
-        
-        data_dict = data.model_dump()
-        if not data_dict.get('rent_amount_in_words'):
-             data_dict['rent_amount_in_words'] = "______________________"
-        if not data_dict.get('security_deposit_in_words'):
-             data_dict['security_deposit_in_words'] = "______________________"
-             
-        rendered_text = agreement.render(
-            **data_dict
+    status_url = str(request.url_for("job_status", job_id=job.job_id))
+    return JSONResponse(status_code=202, content=job_status(job, request), headers={"Location": status_url})
+
+def _get_job(job_id: str) -> Job:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job
+
+# --- ASYNC JOBS ---
+# POST /docs/<name>_jobs submits a job (see the document routes below); poll
+# its status here and fetch the file once it is done.
+
+@router.get('/jobs/{job_id}', response_model=JobStatus, response_model_exclude_none=True, name="job_status")
+def get_job_status(job_id: str, request: Request):
+    return job_status(_get_job(job_id), request)
+
+@router.get('/jobs/{job_id}/result', name="job_result")
+def get_job_result(job_id: str):
+    job = _get_job(job_id)
+    if job.status != DONE:
+        raise HTTPException(
+            status_code=409,
+            detail=job.error or f"Job is {job.status}, the file is not ready yet.",
         )
-        file_stream = generate_docx_stream(rendered_text)
-        
-        return StreamingResponse(
-            file_stream,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={"Content-Disposition": "attachment; filename=Commercial_Rental_Agreement.docx"}
+    media_type, _ = OUTPUT_FORMATS[job.output_format]
+    return FileResponse(job_store.artifact_path(job.job_id), media_type=media_type, filename=job.filename)
+
+# --- CACHE & EXECUTOR STATS ---
+
+@router.get('/stats')
+def cache_stats():
+    """Hit/miss/eviction counters for the in-process caches, plus build queue depth and wait times."""
+    return {
+        "render_cache": render_cache.stats(),
+        "docx_store": docx_store.stats(),
+        "executor": document_executor.stats(),
+        "jobs": {"active": job_runner.active},
+        "coalescing": {"render": render_flights.stats(), "build": build_flights.stats()},
+    }
+
+# --- BATCH GENERATION ---
+
+async def batch_generate(batch: BatchSubmit):
+    """
+    Generates many documents in one request. Each item is validated against its
+    document type's schema; the files are streamed back as a ZIP as they finish,
+    with a manifest.json reporting per-item errors.
+    """
+    if len(batch.items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(batch.items)} items; the limit is {settings.batch_max_items}.",
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating CRA file: {str(e)}")
-
-
-# --- SALE DEED (SD) ---
-
-@router.post("/sd_generator", response_model=Default)
-def sd_preview(data: SDSubmit):
-    """Phase 1: Generates text for preview only."""
-    try:
-        agreement = templates.get_template('sd.html')
-        data_dict = data.model_dump()
-        
-        # Handle missing "words" fields
-        if not data_dict.get('total_consideration_in_words'):
-             data_dict['total_consideration_in_words'] = "______________________"
-
-        document_text = agreement.render(**data_dict)
-        return {"data": document_text}  
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating Sale Deed preview: {str(e)}")
-
-@router.post("/sd_download")
-def sd_download(data: SDSubmit):
-    """Phase 2: Generates DOCX file and streams it for download."""
-    try:
-        agreement = templates.get_template('sd.html')
-        data_dict = data.model_dump()
-        
-        if not data_dict.get('total_consideration_in_words'):
-             data_dict['total_consideration_in_words'] = "______________________"
-
-        document_text = agreement.render(**data_dict)
-        file_stream = generate_docx_stream(document_text)
-        
+    _, build = OUTPUT_FORMATS[batch.format]
+    return StreamingResponse(
+        iter_batch_zip(batch.items, build, batch.format, settings.batch_concurrency),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=documents.zip"},
+    )
+
+# The body is held to the payload limits before validation (see BatchRoute)
+router.add_api_route('/batch', batch_generate, methods=["POST"], route_class_override=BatchRoute)
+
+# --- DOCUMENT ROUTES ---
+# Every document type in DOCUMENT_TYPES gets the same pair of endpoints:
+#   POST /docs/<name>_generator  Phase 1: rendered text for preview
+#   POST /docs/<name>_generator/stream  Phase 1, streamed as NDJSON (or ?format=sse)
+#   POST /docs/<name>_generator/sections  Phase 1, only the sections changed since ?token=
+#   POST /docs/<name>_download   Phase 2: DOCX (or ?format=pdf) file download;
+#                                several ?format= values return a ZIP of each
+#   POST /docs/<name>_jobs       Phase 2 as a background job, fetched from /docs/jobs/<id>
+# Request bodies are checked against the payload limits before validation (see LimitedRoute).
+
+class DocumentRoute(TimedRoute, LimitedRoute):
+    """The limits run inside the timed request, so bodies rejected by a limit are counted as 413s."""
+
+def register_document_routes(doc: DocumentType) -> None:
+    schema = doc.schema
+
+    def preview(data: schema, background_tasks: BackgroundTasks):  # type: ignore[valid-type]
+        return handle_doc_request(doc, data, background_tasks)
+
+    async def preview_stream(
+        data: schema,  # type: ignore[valid-type]
+        stream_format: StreamFormat = Query("ndjson", alias="format"),
+    ):
         return StreamingResponse(
-            file_stream,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={"Content-Disposition": "attachment; filename=Sale_Deed.docx"}
+            iterate_in_thread(iter_preview_stream(doc, data, stream_format)),
+            media_type=STREAM_MEDIA_TYPES[stream_format],
+            # Keep proxies from buffering the stream
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating Sale Deed file: {str(e)}")
 
-
-# --- Residential Rental ---
-
-@router.post("/rental_generator", response_model=Default)
-def rental_preview(info: ResiRent):
-    """Phase 1: Generates text for preview only."""
-    try:
-        agreement=templates.get_template('rental.html')
-        rendered_text = agreement.render(   
-        **info.model_dump()     
-        )
-        return {"data": rendered_text}  
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating Rental preview: {str(e)}")
-
-@router.post('/rental_download')
-def rental_download(info:ResiRent):
-    
-    try:
-        agreement=templates.get_template('rental.html')
-        rendered_text = agreement.render(   
-        **info.model_dump()     
-        ) 
-        file_stream=generate_docx_stream(rendered_text)
-        return StreamingResponse(
-                file_stream,
-                media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                headers={"Content-Disposition": "attachment; filename=resi_rental.docx"}
-            )
-    except Exception as e:
-        return HTTPException(
-            status_code=500, 
-            detail=f"Error generating Rental file: {str(e)}"
-        )
-    
-# --- 1. NDA ---
-@router.post('/nda_generator', response_model=Default)
-def nda_preview(data: NDASubmit):
-    return handle_doc_request('nda.html', data)
-
-@router.post('/nda_download')
-def nda_download(data: NDASubmit):
-    return handle_doc_request('nda.html', data, True, "NDA.docx")
-
-# --- 2. Employment Contract ---
-@router.post('/employment_generator', response_model=Default)
-def emp_preview(data: EmploymentSubmit):
-    return handle_doc_request('employment.html', data)
-
-@router.post('/employment_download')
-def emp_download(data: EmploymentSubmit):
-    return handle_doc_request('employment.html', data, True, "Employment_Contract.docx")
-
-# --- 3. Partnership Agreement ---
-@router.post('/partnership_generator', response_model=Default)
-def partner_preview(data: PartnershipSubmit):
-    return handle_doc_request('partnership.html', data)
-
-@router.post('/partnership_download')
-def partner_download(data: PartnershipSubmit):
-    return handle_doc_request('partnership.html', data, True, "Partnership_Agreement.docx")
-
-# --- 4. Freelancer Agreement ---
-@router.post('/freelancer_generator', response_model=Default)
-def free_preview(data: FreelancerSubmit):
-    return handle_doc_request('freelancer.html', data)
-
-@router.post('/freelancer_download')
-def free_download(data: FreelancerSubmit):
-    return handle_doc_request('freelancer.html', data, True, "Freelancer_Agreement.docx")
-
-# --- 5. Service Agreement ---
-@router.post('/service_generator', response_model=Default)
-def service_preview(data: ServiceSubmit):
-    return handle_doc_request('service.html', data)
-
-@router.post('/service_download')
-def service_download(data: ServiceSubmit):
-    return handle_doc_request('service.html', data, True, "Service_Agreement.docx")
-
-# --- 6. Power of Attorney ---
-@router.post('/poa_generator', response_model=Default)
-def poa_preview(data: PoASubmit):
-    return handle_doc_request('poa.html', data)
-
-@router.post('/poa_download')
-def poa_download(data: PoASubmit):
-    return handle_doc_request('poa.html', data, True, "Power_of_Attorney.docx")
-
-# --- 7. General Affidavit ---
-@router.post('/affidavit_generator', response_model=Default)
-def affidavit_preview(data: GeneralAffidavitSubmit):
-    return handle_doc_request('affidavit.html', data)
-
-@router.post('/affidavit_download')
-def affidavit_download(data: GeneralAffidavitSubmit):
-    return handle_doc_request('affidavit.html', data, True, "General_Affidavit.docx")
-
-# --- 8. Name Change Affidavit ---
-@router.post('/namechange_generator', response_model=Default)
-def namechange_preview(data: NameChangeSubmit):
-    return handle_doc_request('name_change.html', data)
-
-@router.post('/namechange_download')
-def namechange_download(data: NameChangeSubmit):
-    return handle_doc_request('name_change.html', data, True, "Name_Change_Affidavit.docx")
-
-# --- 9. Cease & Desist Letter ---
-@router.post('/ceasedesist_generator', response_model=Default)
-def cd_preview(data: CeaseDesistSubmit):
-    return handle_doc_request('cease_desist.html', data)
-
-@router.post('/ceasedesist_download')
-def cd_download(data: CeaseDesistSubmit):
-    return handle_doc_request('cease_desist.html', data, True, "Cease_Desist_Letter.docx")
-
-# --- 10. Legal Notice ---
-@router.post('/legalnotice_generator', response_model=Default)
-def notice_preview(data: LegalNoticeSubmit):
-    return handle_doc_request('legal_notice.html', data)
-
-@router.post('/legalnotice_download')
-def notice_download(data: LegalNoticeSubmit):
-
-    return handle_doc_request('legal_notice.html', data, True, "Legal_Notice.docx")    
+    def preview_sections(
+        data: schema,  # type: ignore[valid-type]
+        token: Optional[str] = Query(None, max_length=4096),
+    ):
+        return handle_sections_request(doc, data, token)
+
+    async def download(
+        data: schema,  # type: ignore[valid-type]
+        request: Request,
+        output_formats: list[DownloadFormat] = Query(["docx"], alias="format"),
+    ):
+        return await handle_download(doc, data, request, output_formats)
+
+    async def submit_job(
+        data: schema,  # type: ignore[valid-type]
+        request: Request,
+        output_format: OutputFormat = Query("docx", alias="format"),
+    ):
+        return await handle_job_submit(doc, data, request, output_format)
+
+    router.add_api_route(
+        f"/{doc.name}_generator",
+        preview,
+        methods=["POST"],
+        response_model=Default,
+        name=f"{doc.name}_preview",
+        route_class_override=DocumentRoute,
+        summary=f"{doc.title} preview",
+        description="Phase 1: Generates text for preview only.",
+    )
+    router.add_api_route(
+        f"/{doc.name}_generator/stream",
+        preview_stream,
+        methods=["POST"],
+        name=f"{doc.name}_stream",
+        route_class_override=DocumentRoute,
+        summary=f"{doc.title} streaming preview",
+        description="Phase 1, streamed: sends the preview text in chunks while it renders.",
+    )
+    router.add_api_route(
+        f"/{doc.name}_generator/sections",
+        preview_sections,
+        methods=["POST"],
+        response_model=SectionsPreview,
+        response_model_exclude_none=True,
+        name=f"{doc.name}_sections",
+        route_class_override=DocumentRoute,
+        summary=f"{doc.title} incremental preview",
+        description="Phase 1, incremental: returns the preview as sections, with text only for the sections that changed since the given render token.",
+    )
+    router.add_api_route(
+        f"/{doc.name}_download",
+        download,
+        methods=["POST"],
+        name=f"{doc.name}_download",
+        route_class_override=DocumentRoute,
+        summary=f"{doc.title} download",
+        description=(
+            "Phase 2: Generates the DOCX (or ?format=pdf, ?format=txt) file and streams it for download. "
+            "Repeat ?format= (docx, pdf, txt) to get several formats of one render in a ZIP."
+        ),
+    )
+    router.add_api_route(
+        f"/{doc.name}_jobs",
+        submit_job,
+        methods=["POST"],
+        status_code=202,
+        response_model=JobStatus,
+        name=f"{doc.name}_job",
+        route_class_override=DocumentRoute,
+        summary=f"{doc.title} background job",
+        description="Phase 2, asynchronous: queues the DOCX (or PDF) build and returns a job to poll at the Location header.",
+    )
+
+for doc_type in DOCUMENT_TYPES.values():
+    register_document_routes(doc_type)
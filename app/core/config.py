@@ -0,0 +1,151 @@
+import os
+import tempfile
+from typing import Literal, Optional
+
+from pydantic import Field, model_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """
+    Service configuration. Every field can be overridden with an environment
+    variable prefixed with DOCGEN_ (e.g. DOCGEN_RENDER_CACHE_MAX_ENTRIES=2048)
+    or from a local .env file.
+    """
+    model_config = SettingsConfigDict(env_prefix="DOCGEN_", env_file=".env", extra="ignore")
+
+    # --- Templates ---
+    templates_dir: str = "templates"
+    # Dev mode: re-check template files on every lookup so edits are picked up
+    templates_auto_reload: bool = False
+    # Keep compiled template bytecode here to speed up cold starts (disabled when unset)
+    templates_bytecode_cache_dir: Optional[str] = None
+    # Render from pre-split skeletons (constant text + field slots) where the
+    # template allows it, instead of running the whole template through Jinja
+    templates_skeletons: bool = True
+
+    # --- Render cache (preview text) ---
+    render_cache_max_entries: int = 1024
+    render_cache_ttl_seconds: float = 600.0
+
+    # --- Section previews ---
+    # Rendered template sections kept for incremental previews (shares the render cache TTL)
+    section_cache_max_entries: int = 4096
+
+    # --- Streaming preview ---
+    # Rendered text is sent once at least this many characters are pending
+    preview_stream_chunk_chars: int = 4096
+    # Streamed previews up to this length are also stored in the render cache
+    preview_stream_cache_max_chars: int = 256 * 1024
+
+    # --- Generated DOCX store ---
+    docx_store_max_bytes: int = 64 * 1024 * 1024
+    docx_store_ttl_seconds: float = 900.0
+    # Build the DOCX in the background after a preview so the following
+    # download is served from the store. Doubles the work for previews that
+    # are never downloaded, so it is off by default.
+    docx_prebuild_on_preview: bool = False
+
+    # --- Document layout ---
+    # Give the title, headings, numbered sub-clauses and list items their own
+    # layout (Word's Title, Heading 1/2 and List Paragraph styles in DOCX).
+    # Headings are marked in the templates; field values are never styled.
+    # Off writes every line as a plain paragraph
+    document_structure: bool = True
+
+    # --- DOCX engine ---
+    # "template" reuses a base package prepared at startup; "python-docx"
+    # builds a fresh Document per request (the original implementation).
+    docx_engine: Literal["template", "python-docx"] = "template"
+    # "compact" drops the template parts plain-text documents never use (see
+    # docx_builder.compact_parts); applies to the template engine
+    docx_package: Literal["full", "compact"] = "full"
+    # zlib level for every part of the package: 0 (stored) to 9, -1 for zlib's default (6)
+    docx_compression_level: int = Field(default=-1, ge=-1, le=9)
+    # Rendered documents at least this many characters long are streamed out
+    # by the incremental OOXML writer instead of being built in memory first
+    # (template engine only). The build takes a document executor slot like
+    # any other.
+    docx_stream_threshold_chars: int = 256 * 1024
+    docx_stream_chunk_bytes: int = 64 * 1024
+    # Streamed files up to this size are also kept for the DOCX store and for
+    # identical downloads that arrive meanwhile; larger ones are only streamed
+    docx_stream_keep_max_bytes: int = 8 * 1024 * 1024
+
+    # When python-docx/fpdf2 are loaded and the builders prepared: "startup"
+    # (before the worker reports ready), "background" (right after it does)
+    # or "lazy" (first download). The process executor always uses "startup":
+    # a worker forked while another thread holds the import or prepare locks
+    # hangs on its first build.
+    builders_warmup: Literal["startup", "background", "lazy"] = "background"
+
+    # --- Document build executor ---
+    # "thread" shares the process; "process" gives true CPU parallelism.
+    docx_executor_kind: Literal["thread", "process"] = "thread"
+    docx_workers: int = Field(default_factory=lambda: min(4, os.cpu_count() or 1))
+    # Builds allowed to wait for a free worker before new ones get a 503
+    docx_queue_size: int = 32
+    docx_retry_after_seconds: int = 2
+
+    # --- Async jobs ---
+    # SQLite database and finished files of /docs/<name>_jobs; shared by the workers of one host
+    jobs_dir: str = Field(default_factory=lambda: os.path.join(tempfile.gettempdir(), "docgen-jobs"))
+    # Jobs and their files are removed this long after their last update
+    jobs_ttl_seconds: float = 3600.0
+    jobs_cleanup_interval_seconds: float = 300.0
+    # Jobs a worker runs at once before new submissions get a 503
+    jobs_max_active: int = 256
+
+    # --- Metrics ---
+    # Per-stage timings and output sizes for the document routes, served at /metrics.
+    # When off, the routes are registered without any instrumentation.
+    metrics_enabled: bool = True
+    # Also return the request's stage timings in a Server-Timing response header
+    metrics_server_timing: bool = True
+
+    # --- Server (python main.py) ---
+    # "dev": single process with auto-reload; "prod": pre-forked workers
+    server_mode: Literal["dev", "prod"] = "dev"
+    server_host: str = "127.0.0.1"
+    server_port: int = 8003
+    server_workers: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    server_backlog: int = 2048
+    server_log_level: str = "info"
+    server_access_log: bool = True
+    # Seconds a worker gets to finish in-flight requests after SIGTERM
+    server_graceful_timeout: int = 30
+    # Seconds a worker keeps accepting after SIGTERM while /ready already
+    # reports draining, so a load balancer can take it out of rotation first
+    server_drain_delay: float = 0.0
+    # Seconds every worker gets to finish its startup before the launcher gives up
+    server_ready_timeout: int = 60
+
+    # --- Payload limits ---
+    # Checked on the raw request body of the document routes, before schema
+    # validation; a body over a limit gets a 413 naming the limit and field
+    payload_max_body_bytes: int = 1024 * 1024
+    # Items in any JSON array, e.g. a will's bequests or an affidavit's statements
+    payload_max_list_items: int = 200
+    payload_max_string_chars: int = 20_000
+    # Per document type overrides of the limits above, without the prefix, e.g.
+    # DOCGEN_PAYLOAD_LIMITS='{"will": {"max_list_items": 500, "max_body_bytes": 4194304}}'
+    payload_limits: dict[str, dict[str, int]] = {}
+
+    # --- Batch generation ---
+    batch_max_items: int = 1000
+    # Size cap on a /docs/batch request body; each item's payload is also held
+    # to its document type's list and string limits
+    batch_max_body_bytes: int = 32 * 1024 * 1024
+    # Documents rendered/built at once per batch; bounds the batch's peak memory
+    batch_concurrency: int = 4
+
+    @model_validator(mode="after")
+    def _process_executor_warms_up_at_startup(self) -> "Settings":
+        # Pool workers must fork from a process whose builders are already
+        # prepared, with no warm-up thread holding a lock (see builders_warmup)
+        if self.docx_executor_kind == "process":
+            self.builders_warmup = "startup"
+        return self
+
+
+settings = Settings()
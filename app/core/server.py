@@ -0,0 +1,299 @@
+"""
+Server entry points: the single-process dev server and a pre-fork production launcher.
+
+    python main.py                       dev server (auto-reload, 127.0.0.1:8003)
+    python main.py --mode prod -w 4      production, 4 worker processes
+
+The mode, address and worker count default to the DOCGEN_SERVER_* settings.
+"""
+import argparse
+import gc
+import logging
+import os
+import select
+import signal
+import socket
+import struct
+import threading
+import time
+from typing import Optional
+
+from app.core.config import settings
+
+
+class Readiness:
+    """
+    Startup/shutdown state of this process, reported by /ready.
+
+    A pre-forked worker also tells the launcher when it is ready by writing its
+    pid to `notify_fd`, a pipe set up before the fork.
+    """
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.draining = False
+        self.notify_fd: Optional[int] = None
+        # Reentrant: mark_draining also runs from the SIGTERM handler, on the same thread
+        self._lock = threading.RLock()
+
+    def mark_ready(self) -> None:
+        with self._lock:
+            self.ready = True
+            self.draining = False
+            if self.notify_fd is not None:
+                os.write(self.notify_fd, struct.pack("=i", os.getpid()))
+                os.close(self.notify_fd)
+                self.notify_fd = None
+
+    def mark_draining(self) -> None:
+        with self._lock:
+            self.ready = False
+            self.draining = True
+
+    def status(self) -> dict:
+        return {"ready": self.ready, "draining": self.draining, "pid": os.getpid()}
+
+
+readiness = Readiness()
+
+
+def prepare_builders() -> None:
+    """Imports python-docx, fpdf2 and fontTools and prepares the DOCX and PDF builders."""
+    from app.services.docx_builder import docx_builder
+    from app.services.pdf_builder import pdf_builder
+
+    started_at = time.perf_counter()
+    docx_builder.prepare()
+    pdf_builder.prepare()
+    logging.info(f"Document builders prepared in {(time.perf_counter() - started_at) * 1000:.0f} ms.")
+
+
+def prepare_builders_in_background() -> threading.Thread:
+    """
+    Warm-up after the worker reports ready. A download that arrives first
+    simply waits for the builder's prepare lock.
+    """
+    thread = threading.Thread(target=prepare_builders, name="docgen-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def prepare_shared_state() -> None:
+    """
+    Does the expensive, read-only startup work once in the launcher: compiles
+    every template and prepares the DOCX base package and the PDF font. Forked
+    workers inherit the result copy-on-write, and gc.freeze() moves it out of
+    the collector's reach so garbage collection in a worker does not touch
+    (and copy) those pages. The lifespan hook finds everything prepared.
+
+    Caches, stores and the document executor are per worker (shared-nothing)
+    and are only created after the fork.
+    """
+    from app.services.rendering import template_registry
+
+    template_registry.load_all()
+    prepare_builders()
+    gc.collect()
+    gc.freeze()
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _drain_on_exit(server) -> None:
+    """
+    Makes the uvicorn server report draining as soon as SIGTERM/SIGINT
+    arrives, instead of from the lifespan shutdown, which only runs once
+    uvicorn has stopped accepting and in-flight requests are done. With
+    settings.server_drain_delay the server keeps accepting for that long
+    first; a second signal stops it at once.
+    """
+    handle_exit = server.handle_exit
+    timers: list[threading.Timer] = []
+
+    def drain_then_exit(sig: int, frame) -> None:
+        readiness.mark_draining()
+        if settings.server_drain_delay > 0 and not timers:
+            logging.info(f"Draining, stopping in {settings.server_drain_delay:g} s.")
+            timer = threading.Timer(settings.server_drain_delay, handle_exit, (sig, None))
+            timer.daemon = True
+            timers.append(timer)
+            timer.start()
+        else:
+            handle_exit(sig, frame)
+
+    server.handle_exit = drain_then_exit
+
+
+def _run_worker(app, sock: socket.socket, notify_fd: int) -> None:
+    """Body of a forked worker process; never returns."""
+    import uvicorn
+
+    # Drop the launcher's handlers; uvicorn installs its own for a graceful drain
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    readiness.notify_fd = notify_fd
+    status = 0
+    try:
+        config = uvicorn.Config(
+            app,
+            lifespan="on",
+            log_level=settings.server_log_level,
+            access_log=settings.server_access_log,
+            timeout_graceful_shutdown=settings.server_graceful_timeout,
+        )
+        server = uvicorn.Server(config)
+        _drain_on_exit(server)
+        server.run(sockets=[sock])
+    except SystemExit as e:
+        # uvicorn exits this way when the lifespan startup fails
+        status = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        logging.exception("Worker crashed.")
+        status = 1
+    finally:
+        os._exit(status)
+
+
+class PreforkLauncher:
+    """
+    Binds the listening socket, prepares the shared state and forks `workers`
+    uvicorn processes that all accept on that socket.
+
+    SIGTERM/SIGINT are forwarded to the workers, which report draining on
+    /ready, stop accepting (after settings.server_drain_delay), finish
+    in-flight requests and run the lifespan shutdown (draining the document
+    executor) before exiting; any worker still alive after the drain delay
+    and graceful timeout is killed. A worker that dies on its own is replaced.
+    """
+
+    def __init__(self, app, host: str, port: int, workers: int):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.children: set[int] = set()
+        self.stopping = False
+        self.sock: Optional[socket.socket] = None
+        self.ready_read_fd: Optional[int] = None
+        self.ready_write_fd: Optional[int] = None
+
+    def _spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            os.close(self.ready_read_fd)
+            _run_worker(self.app, self.sock, self.ready_write_fd)
+        self.children.add(pid)
+        return pid
+
+    def _stop(self, signum: int, frame) -> None:
+        if self.stopping:
+            return
+        self.stopping = True
+        logging.info(f"Received {signal.Signals(signum).name}, draining {len(self.children)} workers...")
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.discard(pid)
+
+    def _wait_ready(self) -> bool:
+        """Waits until every worker has finished its lifespan startup."""
+        deadline = time.monotonic() + settings.server_ready_timeout
+        ready: set[int] = set()
+        buffer = b""
+        while len(ready) < self.workers and not self.stopping:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([self.ready_read_fd], [], [], min(remaining, 0.5))
+            if readable:
+                buffer += os.read(self.ready_read_fd, 4096)
+                while len(buffer) >= 4:
+                    (pid,), buffer = struct.unpack("=i", buffer[:4]), buffer[4:]
+                    ready.add(pid)
+            for pid in list(self.children):
+                finished, status = os.waitpid(pid, os.WNOHANG)
+                if finished:
+                    self.children.discard(pid)
+                    logging.error(f"Worker {pid} exited during startup (status {status}).")
+                    return False
+        return len(ready) >= self.workers
+
+    def _terminate(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while self.children:
+            for pid in list(self.children):
+                finished, _ = os.waitpid(pid, os.WNOHANG)
+                if finished:
+                    self.children.discard(pid)
+            if not self.children:
+                break
+            if time.monotonic() >= deadline:
+                for pid in self.children:
+                    logging.warning(f"Worker {pid} did not drain in time, killing it.")
+                    os.kill(pid, signal.SIGKILL)
+                deadline = float("inf")
+            time.sleep(0.1)
+
+    def run(self) -> int:
+        self.sock = _bind(self.host, self.port, settings.server_backlog)
+        prepare_shared_state()
+        self.ready_read_fd, self.ready_write_fd = os.pipe()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.workers):
+            self._spawn()
+
+        if not self._wait_ready():
+            if not self.stopping:
+                logging.error("Workers did not become ready, shutting down.")
+                self._stop(signal.SIGTERM, None)
+            self._terminate(settings.server_graceful_timeout)
+            return 0 if self.stopping and not self.children else 1
+        logging.info(f"{self.workers} workers ready on http://{self.host}:{self.port} (pid {os.getpid()}).")
+
+        while self.children and not self.stopping:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if not pid:
+                time.sleep(0.5)
+                continue
+            self.children.discard(pid)
+            if not self.stopping:
+                logging.warning(f"Worker {pid} exited unexpectedly (status {status}), starting a replacement.")
+                self._spawn()
+
+        self._terminate(settings.server_drain_delay + settings.server_graceful_timeout + 5)
+        self.sock.close()
+        logging.info("All workers stopped.")
+        return 0
+
+
+def main(app=None, argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("dev", "prod"), default=settings.server_mode)
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    parser.add_argument("-w", "--workers", type=int, default=settings.server_workers)
+    args = parser.parse_args(argv)
+
+    if args.mode == "dev":
+        import uvicorn
+        # Dev server: keep hot-reloading templates as well as code
+        os.environ.setdefault("DOCGEN_TEMPLATES_AUTO_RELOAD", "true")
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True)
+        return
+
+    if app is None:
+        from main import app
+    raise SystemExit(PreforkLauncher(app, args.host, args.port, args.workers).run())
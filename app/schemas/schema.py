@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from decimal import Decimal
 from datetime import date
-from typing import Union, Literal, Optional, List
+from typing import Any, Union, Literal, Optional, List
 
 class Default(BaseModel):
     data:str
@@ -321,4 +321,41 @@ class LegalNoticeSubmit(BaseModel):
     outstanding_amount: str
     # Changed from str to Optional[str] = None
     outstanding_amount_in_words: Optional[str] = None
-    payment_deadline_days: str
\ No newline at end of file
+    payment_deadline_days: str
+
+# --- SECTION PREVIEWS ---
+class PreviewSection(BaseModel):
+    name: str
+    changed: bool
+    # Only sent for sections that changed since the previous render token
+    text: Optional[str] = None
+
+class SectionsPreview(BaseModel):
+    # Send back as ?token= with the next preview to get only the changed sections
+    token: str
+    sections: List[PreviewSection]
+
+# --- ASYNC JOBS ---
+class JobStatus(BaseModel):
+    job_id: str
+    document_type: str
+    format: Literal["docx", "pdf"]
+    status: Literal["queued", "running", "done", "failed"]
+    created_at: float
+    expires_at: float
+    # Set once the job is done
+    size: Optional[int] = None
+    result_url: Optional[str] = None
+    # Set when the job failed
+    error: Optional[str] = None
+
+# --- BATCH GENERATION ---
+class BatchItem(BaseModel):
+    # Route slug of the document, e.g. "nda" or "rental"
+    document_type: str
+    # Validated against that document type's schema item by item
+    payload: dict[str, Any]
+
+class BatchSubmit(BaseModel):
+    items: List[BatchItem]
+    format: Literal["docx", "pdf"] = "docx"
\ No newline at end of file
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Callable, Optional
+
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from app.schemas.schema import BatchItem
+from app.services.docx_builder import ChunkSink, ZipWriter
+from app.services.documents import DOCUMENT_TYPES
+from app.services.executor import QueueFullError, document_executor
+from app.services.rendering import render_document
+
+# Attempts per item when the shared executor is full, before it is reported as an error
+_QUEUE_FULL_ATTEMPTS = 20
+
+
+class BatchItemError(Exception):
+    """A single batch item failed; reported in the manifest, the batch carries on."""
+
+
+def describe_validation_error(e: ValidationError) -> str:
+    """One line per failing field, e.g. "landlord.name: Field required"."""
+    errors = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+    return f"Invalid payload: {errors}"
+
+
+def _render_item(item: BatchItem) -> tuple[str, str]:
+    doc_type = DOCUMENT_TYPES.get(item.document_type)
+    if doc_type is None:
+        raise BatchItemError(f"Unknown document_type '{item.document_type}'")
+    try:
+        data = doc_type.schema.model_validate(item.payload)
+    except ValidationError as e:
+        raise BatchItemError(describe_validation_error(e))
+    # Batch renders are one-off, so they bypass the preview render cache
+    return doc_type.filename, render_document(doc_type.template, data)
+
+
+async def _build_item(index: int, item: BatchItem, build: Callable[[str], bytes], extension: str) -> tuple[str, bytes]:
+    filename, rendered_text = await run_in_threadpool(_render_item, item)
+    for attempt in range(1, _QUEUE_FULL_ATTEMPTS + 1):
+        try:
+            payload = await document_executor.run(build, rendered_text)
+            break
+        except QueueFullError:
+            if attempt == _QUEUE_FULL_ATTEMPTS:
+                raise BatchItemError("Document builder stayed busy, item skipped")
+            await asyncio.sleep(min(0.05 * attempt, 1.0))
+    stem = filename.rsplit('.', 1)[0]
+    return f"{index + 1:04d}_{stem}.{extension}", payload
+
+
+async def iter_batch_zip(
+    items: list[BatchItem],
+    build: Callable[[str], bytes],
+    extension: str,
+    concurrency: int,
+) -> AsyncIterator[bytes]:
+    """
+    Renders and builds the batch items in parallel and yields a ZIP archive
+    that grows as each document finishes. At most `concurrency` documents are
+    in flight, so peak memory does not depend on the batch size.
+
+    Failed items do not abort the batch: every item gets a line in a trailing
+    `manifest.json` with either its file name or the error.
+    """
+    sink = ChunkSink()
+    writer = ZipWriter(sink, time.time())
+    manifest: list[Optional[dict]] = [None] * len(items)
+    pending: dict[asyncio.Task, int] = {}
+    next_index = 0
+
+    try:
+        while next_index < len(items) or pending:
+            while next_index < len(items) and len(pending) < concurrency:
+                task = asyncio.create_task(_build_item(next_index, items[next_index], build, extension))
+                pending[task] = next_index
+                next_index += 1
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = pending.pop(task)
+                entry = {"index": index, "document_type": items[index].document_type}
+                try:
+                    name, payload = task.result()
+                except BatchItemError as e:
+                    manifest[index] = {**entry, "status": "error", "error": str(e)}
+                    continue
+                except Exception as e:
+                    manifest[index] = {**entry, "status": "error", "error": f"Error generating document: {e}"}
+                    continue
+                # DOCX and PDF are already compressed
+                writer.add_data(name, payload, compress=False)
+                manifest[index] = {**entry, "status": "ok", "file": name}
+            if sink.size:
+                yield sink.drain()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    writer.add_data("manifest.json", json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8"))
+    writer.close()
+    yield sink.drain()
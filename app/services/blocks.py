@@ -0,0 +1,166 @@
+import re
+from typing import Iterable, Iterator, Optional, Pattern, Union
+
+# Line and page separators in rendered text
+_LINE_END = re.compile(r"[\n\x0c]")
+
+# Block kinds
+PARAGRAPH = "paragraph"
+TITLE = "title"
+# Headings are marked in the templates, "1. DECLARATION{# heading #}" or
+# "BETWEEN:{# subheading #}"; the comment renders as nothing
+HEADING = "heading"
+SUBHEADING = "subheading"
+# A numbered clause, "1. ..." or "3.2. ..."; level is the depth of the number
+CLAUSE = "clause"
+LIST_ITEM = "list_item"
+PAGE = "page"
+
+# A longer first line is not a title
+HEADING_MAX_CHARS = 100
+_CLAUSE_NUMBER = re.compile(r"\d+(?:\.\d+)*\.?\s")
+_LIST_MARKERS = ("- ", "• ", "* ")
+
+# Sentinel yielded by iter_lines between form-feed separated pages
+PAGE_BREAK = None
+
+
+def iter_lines(agreement_text: str) -> Iterator[Optional[str]]:
+    """
+    Walks the rendered text with the layout rules of generate_docx_stream:
+    yields each line stripped (blank lines as ""), and PAGE_BREAK between
+    form-feed separated pages. The text is scanned in place rather than
+    split, so no page or line lists are built.
+    """
+    pos = 0
+    while True:
+        match = _LINE_END.search(agreement_text, pos)
+        if match is None:
+            yield agreement_text[pos:].strip()
+            return
+        yield agreement_text[pos:match.start()].strip()
+        if match.group() == '\x0c':
+            yield PAGE_BREAK
+        pos = match.end()
+
+
+class Block:
+    """One paragraph of a rendered document, as handed to the DOCX and PDF writers."""
+    __slots__ = ("kind", "text", "level")
+
+    def __init__(self, kind: str, text: str, level: int = 0):
+        self.kind = kind
+        self.text = text
+        self.level = level
+
+    def __repr__(self) -> str:
+        return f"Block({self.kind!r}, {self.text!r}, {self.level})"
+
+
+# Blocks without anything of their own are shared
+_BLANK = Block(PARAGRAPH, "")
+_PAGE = Block(PAGE, "")
+
+
+def classify(line: str) -> Block:
+    """The block for one stripped line of template text on its own; headings are marked, see remember_headings."""
+    if not line:
+        return _BLANK
+    if line.startswith(_LIST_MARKERS):
+        return Block(LIST_ITEM, line)
+    if line[0].isdigit():
+        number = _CLAUSE_NUMBER.match(line)
+        if number is not None:
+            return Block(CLAUSE, line, number.group().rstrip().rstrip(".").count(".") + 1)
+    return Block(PARAGRAPH, line)
+
+
+# Blocks of the template lines that are the same in every document (filled
+# by the template skeletons), so those lines are classified once
+_constant_blocks: dict[str, Block] = {}
+# Constant text that starts a template line holding field values, e.g.
+# "3. The tenant should deposit a sum of Rs. ", grouped by its first character
+_constant_starts: dict[str, tuple[str, ...]] = {}
+# Marked heading lines holding template logic, e.g. the section number in
+# "{% if guardian %}7{% else %}6{% endif %}. POWERS OF EXECUTOR"
+_heading_patterns: list[tuple[Pattern[str], str]] = []
+
+
+def remember_constant_blocks(lines: Iterable[str], starts: Iterable[str] = ()) -> None:
+    for line in lines:
+        line = line.strip()
+        if line not in _constant_blocks:
+            _constant_blocks[line] = classify(line)
+    for start in starts:
+        start = start.lstrip()
+        if start:
+            known = _constant_starts.get(start[0], ())
+            if start not in known:
+                _constant_starts[start[0]] = known + (start,)
+
+
+def remember_headings(headings: Iterable[tuple[str, Union[str, Pattern[str]]]]) -> None:
+    """
+    Heading lines marked in a template, as (HEADING or SUBHEADING, line):
+    the constant line, or a pattern matching the whole line.
+    """
+    for kind, line in headings:
+        if isinstance(line, str):
+            _constant_blocks[line] = Block(kind, line)
+        elif all(line.pattern != known.pattern for known, _ in _heading_patterns):
+            _heading_patterns.append((line, kind))
+
+
+def _starts_with_template(line: str) -> bool:
+    starts = _constant_starts.get(line[0])
+    return starts is not None and line.startswith(starts)
+
+
+def _field_line_block(line: str, from_template: bool) -> Block:
+    """
+    A line that is not constant template text. Its number or bullet only
+    counts if the line starts with template text, and it is a heading only
+    if it matches a marked heading; capitals the user typed mean nothing.
+    """
+    for pattern, kind in _heading_patterns:
+        if pattern.fullmatch(line):
+            return Block(kind, line)
+    if from_template:
+        block = classify(line)
+        if block.kind is CLAUSE or block.kind is LIST_ITEM:
+            return block
+    return Block(PARAGRAPH, line)
+
+
+def iter_blocks(agreement_text: str, structured: bool = True) -> Iterator[Block]:
+    """
+    The rendered text as blocks: one per line, blank lines included, and a
+    PAGE block between form-feed separated pages. The first non-blank line
+    is the TITLE; the others are classified by classify(). The numbering,
+    bullets and capitals stay in the text, so every writer shows the same words.
+
+    Only template text is classified (see remember_constant_blocks and
+    remember_headings): text the user typed stays a PARAGRAPH, however it
+    is capitalised or numbered.
+
+    With `structured` off every line is a PARAGRAPH, i.e. the plain layout.
+    """
+    titled = not structured
+    constant = _constant_blocks.get
+    for line in iter_lines(agreement_text):
+        if line is PAGE_BREAK:
+            yield _PAGE
+        elif not structured:
+            yield Block(PARAGRAPH, line) if line else _BLANK
+        elif not line:
+            yield _BLANK
+        else:
+            block = constant(line)
+            from_template = block is not None or _starts_with_template(line)
+            if block is None:
+                block = _field_line_block(line, from_template)
+            if not titled:
+                titled = True
+                if from_template and len(line) <= HEADING_MAX_CHARS:
+                    block = Block(TITLE, line)
+            yield block
@@ -0,0 +1,192 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Optional, TypeVar
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+V = TypeVar("V")
+
+
+def payload_digest(data: BaseModel) -> str:
+    """
+    Returns a stable SHA-256 digest of a submitted model.
+    Pydantic serialises fields in declaration order, so two payloads with the
+    same content always hash the same, whatever order the client sent the
+    fields in. The model type is part of the digest because two schemas can
+    serialise to the same JSON.
+    """
+    digest = hashlib.sha256(type(data).__qualname__.encode("utf-8"))
+    digest.update(data.model_dump_json().encode("utf-8"))
+    return digest.hexdigest()
+
+
+def text_digest(text: str) -> str:
+    """SHA-256 of rendered document text; used to content-address generated files."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TTLCache(Generic[V]):
+    """
+    Thread-safe in-process cache with LRU eviction once `max_entries` is reached
+    and lazy TTL expiry on lookup. Route handlers run on a threadpool, so every
+    access is guarded by a lock.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[V]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: V) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class ByteStore:
+    """
+    Content-addressed store for finished documents. Entries are evicted least
+    recently used first once the total payload size goes over `max_bytes`,
+    and expire after `ttl_seconds`. A single payload larger than the whole
+    budget is never stored.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, digest: str) -> Optional[bytes]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(digest)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, payload = item
+            if expires_at <= now:
+                del self._data[digest]
+                self.total_bytes -= len(payload)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(digest)
+            self.hits += 1
+            return payload
+
+    def __contains__(self, digest: str) -> bool:
+        with self._lock:
+            item = self._data.get(digest)
+            return item is not None and item[0] > time.monotonic()
+
+    def set(self, digest: str, payload: bytes) -> None:
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            previous = self._data.pop(digest, None)
+            if previous is not None:
+                self.total_bytes -= len(previous[1])
+            self._data[digest] = (expires_at, payload)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self.total_bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Rendered template text, keyed on "<template name>:<payload digest>"
+render_cache: TTLCache[str] = TTLCache(
+    max_entries=settings.render_cache_max_entries,
+    ttl_seconds=settings.render_cache_ttl_seconds,
+)
+
+# Rendered sections of split templates, keyed on "<template name>:<section digest>"
+section_cache: TTLCache[str] = TTLCache(
+    max_entries=settings.section_cache_max_entries,
+    ttl_seconds=settings.render_cache_ttl_seconds,
+)
+
+# Finished DOCX payloads, keyed on the digest of the rendered text
+# (PDFs are stored under "<digest>.pdf")
+docx_store = ByteStore(
+    max_bytes=settings.docx_store_max_bytes,
+    ttl_seconds=settings.docx_store_ttl_seconds,
+)
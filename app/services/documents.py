@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+from typing import Type
+
+from pydantic import BaseModel
+
+from app.schemas.schema import (
+    Submit, WillSubmit, CRASubmit, SDSubmit, ResiRent,
+    NDASubmit, EmploymentSubmit, PartnershipSubmit, FreelancerSubmit,
+    ServiceSubmit, PoASubmit, GeneralAffidavitSubmit, NameChangeSubmit,
+    CeaseDesistSubmit, LegalNoticeSubmit
+)
+
+
+@dataclass(frozen=True)
+class DocumentType:
+    """One generatable document: its request schema, template and download filename."""
+    name: str
+    schema: Type[BaseModel]
+    template: str
+    filename: str
+    title: str
+
+
+# Keyed by the route slug, e.g. "nda" for /docs/nda_generator and /docs/nda_download
+DOCUMENT_TYPES: dict[str, DocumentType] = {
+    doc.name: doc for doc in (
+        DocumentType("mfa", Submit, "mfa.html", "Marital_Financial_Arrangement.docx", "Marital Financial Arrangement"),
+        DocumentType("will", WillSubmit, "will.html", "Last_Will_and_Testament.docx", "Will"),
+        DocumentType("cra", CRASubmit, "cra.html", "Commercial_Rental_Agreement.docx", "Commercial Rental Agreement"),
+        DocumentType("sd", SDSubmit, "sd.html", "Sale_Deed.docx", "Sale Deed"),
+        DocumentType("rental", ResiRent, "rental.html", "resi_rental.docx", "Residential Rental Agreement"),
+        DocumentType("nda", NDASubmit, "nda.html", "NDA.docx", "NDA"),
+        DocumentType("employment", EmploymentSubmit, "employment.html", "Employment_Contract.docx", "Employment Contract"),
+        DocumentType("partnership", PartnershipSubmit, "partnership.html", "Partnership_Agreement.docx", "Partnership Agreement"),
+        DocumentType("freelancer", FreelancerSubmit, "freelancer.html", "Freelancer_Agreement.docx", "Freelancer Agreement"),
+        DocumentType("service", ServiceSubmit, "service.html", "Service_Agreement.docx", "Service Agreement"),
+        DocumentType("poa", PoASubmit, "poa.html", "Power_of_Attorney.docx", "Power of Attorney"),
+        DocumentType("affidavit", GeneralAffidavitSubmit, "affidavit.html", "General_Affidavit.docx", "General Affidavit"),
+        DocumentType("namechange", NameChangeSubmit, "name_change.html", "Name_Change_Affidavit.docx", "Name Change Affidavit"),
+        DocumentType("ceasedesist", CeaseDesistSubmit, "cease_desist.html", "Cease_Desist_Letter.docx", "Cease & Desist Letter"),
+        DocumentType("legalnotice", LegalNoticeSubmit, "legal_notice.html", "Legal_Notice.docx", "Legal Notice"),
+    )
+}
@@ -0,0 +1,452 @@
+import io
+import re
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from typing import Any, Iterable, Iterator, Optional
+
+from app.core.config import settings
+from app.services.blocks import CLAUSE, HEADING, LIST_ITEM, PAGE, SUBHEADING, TITLE, Block, iter_blocks
+
+
+# Characters python-docx turns into run elements instead of text
+_RUN_SPECIAL = re.compile(r"([\t\r\n])")
+# Control characters lxml refuses to serialise; python-docx raises on these too
+_XML_INCOMPATIBLE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Parts of python-docx's default template that plain-text documents never use;
+# dropped from compact packages together with their relationships
+COMPACT_DROPPED_PARTS = (
+    "word/stylesWithEffects.xml",
+    "word/webSettings.xml",
+    "word/numbering.xml",
+    "docProps/thumbnail.jpeg",
+    "customXml/",
+)
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+EMPTY_PARAGRAPH = "<w:p/>"
+PAGE_BREAK_PARAGRAPH = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _t(text: str) -> str:
+    if len(text.strip()) < len(text):
+        return f'<w:t xml:space="preserve">{_escape(text)}</w:t>'
+    return f"<w:t>{_escape(text)}</w:t>"
+
+
+def paragraph_xml(line: str) -> str:
+    """
+    Returns the `<w:p>` markup python-docx produces for `doc.add_paragraph(line)`:
+    tabs become `<w:tab/>`, CR/LF become `<w:br/>`, and text with leading or
+    trailing whitespace gets xml:space="preserve".
+    """
+    if not line:
+        return EMPTY_PARAGRAPH
+    if _XML_INCOMPATIBLE.search(line):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters")
+    if not _RUN_SPECIAL.search(line):
+        return f"<w:p><w:r>{_t(line)}</w:r></w:p>"
+    parts = []
+    for piece in _RUN_SPECIAL.split(line):
+        if piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece in ("\r", "\n"):
+            parts.append("<w:br/>")
+        elif piece:
+            parts.append(_t(piece))
+    return f"<w:p><w:r>{''.join(parts)}</w:r></w:p>"
+
+
+# Paragraph style ids (from python-docx's default template) of the block
+# kinds; numbered sub-clauses are indented like list items, the rest is Normal
+BLOCK_STYLES = {
+    TITLE: "Title",
+    HEADING: "Heading1",
+    SUBHEADING: "Heading2",
+    LIST_ITEM: "ListParagraph",
+}
+# Names python-docx looks the same styles up by
+STYLE_NAMES = {
+    "Title": "Title",
+    "Heading1": "Heading 1",
+    "Heading2": "Heading 2",
+    "ListParagraph": "List Paragraph",
+}
+
+
+def block_style(block: Block) -> Optional[str]:
+    if block.kind is CLAUSE:
+        return "ListParagraph" if block.level > 1 else None
+    return BLOCK_STYLES.get(block.kind)
+
+
+def _styled(paragraph: str, style_id: str) -> str:
+    """Adds a paragraph style to non-empty `paragraph_xml` markup, where python-docx puts it."""
+    return f'<w:p><w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>{paragraph[len("<w:p>"):]}'
+
+
+# Paragraph markup of the template lines that are the same in every document
+# (filled by the template skeletons), so only lines holding field values are
+# converted per build
+_constant_paragraphs: dict[str, str] = {}
+
+
+def remember_constant_lines(lines: Iterable[str]) -> None:
+    for line in lines:
+        line = line.strip()
+        if line not in _constant_paragraphs and not _XML_INCOMPATIBLE.search(line):
+            _constant_paragraphs[line] = paragraph_xml(line)
+
+
+def iter_body_xml(agreement_text: str, structured: bool = True) -> Iterator[str]:
+    """Yields the `<w:body>` paragraphs for the rendered text, one per block (see iter_blocks)."""
+    constant = _constant_paragraphs.get
+    for block in iter_blocks(agreement_text, structured):
+        if block.kind is PAGE:
+            yield PAGE_BREAK_PARAGRAPH
+            continue
+        paragraph = constant(block.text) or paragraph_xml(block.text)
+        style_id = block_style(block)
+        yield paragraph if style_id is None else _styled(paragraph, style_id)
+
+
+def _deflate(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+class _ZipEntry:
+    """A package part with its deflated payload computed up front."""
+    __slots__ = ("name", "crc", "size", "compressed")
+
+    def __init__(self, name: str, data: bytes, level: int = zlib.Z_DEFAULT_COMPRESSION):
+        self.name = name.encode("utf-8")
+        self.crc = zlib.crc32(data)
+        self.size = len(data)
+        self.compressed = _deflate(data, level)
+
+
+def _is_dropped(part_name: str) -> bool:
+    return any(
+        part_name == dropped or (dropped.endswith("/") and part_name.startswith(dropped))
+        for dropped in COMPACT_DROPPED_PARTS
+    )
+
+
+def _prune_styles(data: bytes, keep: Iterable[str] = ()) -> bytes:
+    """
+    Keeps only the default styles, the styles in `keep` and whatever those
+    are based on or linked to, and drops the latent style table; python-docx's
+    template ships some 160 styles for a body that uses Normal only.
+    """
+    from lxml import etree
+
+    w = f"{{{_W_NS}}}"
+    root = etree.fromstring(data)
+    styles = {style.get(f"{w}styleId"): style for style in root.iter(f"{w}style")}
+    wanted = [style_id for style_id, style in styles.items() if style.get(f"{w}default") == "1"]
+    wanted += [style_id for style_id in keep if style_id in styles]
+    kept: set[str] = set()
+    while wanted:
+        style_id = wanted.pop()
+        if style_id in kept or style_id not in styles:
+            continue
+        kept.add(style_id)
+        for reference in ("basedOn", "next", "link"):
+            element = styles[style_id].find(f"{w}{reference}")
+            if element is not None:
+                wanted.append(element.get(f"{w}val"))
+    for style_id, style in styles.items():
+        if style_id not in kept:
+            root.remove(style)
+    for latent in root.findall(f"{w}latentStyles"):
+        root.remove(latent)
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+def compact_parts(parts: dict[str, bytes], keep_styles: Iterable[str] = ()) -> dict[str, bytes]:
+    """
+    Size-optimised copy of a package's parts: drops the parts listed in
+    COMPACT_DROPPED_PARTS along with their relationships and content types,
+    prunes unused styles and strips revision ids from the settings. Theme,
+    font table and settings stay, since the styles and compatibility options
+    refer to them.
+    """
+    dropped = [name for name in parts if _is_dropped(name)]
+    compact = {name: data for name, data in parts.items() if name not in dropped}
+
+    def without(data: bytes, pattern: str) -> bytes:
+        return re.sub(pattern.encode("utf-8"), b"", data)
+
+    for name in dropped:
+        directory, _, base = name.rpartition("/")
+        compact["[Content_Types].xml"] = without(
+            compact["[Content_Types].xml"], rf'<Override PartName="/{re.escape(name)}"[^>]*/>'
+        )
+        # Relationships point at parts relative to the source part's directory
+        compact["_rels/.rels"] = without(compact["_rels/.rels"], rf'<Relationship [^>]*Target="/?{re.escape(name)}"[^>]*/>')
+        relative = base if directory == "word" else f"../{name}"
+        compact["word/_rels/document.xml.rels"] = without(
+            compact["word/_rels/document.xml.rels"], rf'<Relationship [^>]*Target="{re.escape(relative)}"[^>]*/>'
+        )
+    if not any(name.endswith(".jpeg") for name in compact):
+        compact["[Content_Types].xml"] = without(compact["[Content_Types].xml"], r'<Default Extension="jpeg"[^>]*/>')
+
+    compact["word/styles.xml"] = _prune_styles(compact["word/styles.xml"], keep_styles)
+    compact["word/settings.xml"] = without(
+        compact["word/settings.xml"], r"<w:rsids>.*?</w:rsids>|<w:savePreviewPicture/>"
+    )
+    return compact
+
+
+def _dos_datetime(timestamp: float) -> tuple[int, int]:
+    t = time.localtime(timestamp)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+class ChunkSink:
+    """Write target that collects output until the streaming writer drains it."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        if data:
+            self._chunks.append(data)
+            self.size += len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+class ZipWriter:
+    """
+    Minimal ZIP writer that can copy pre-deflated entries verbatim, so the
+    static parts of the package (styles, theme, settings...) are never
+    recompressed per document. Writes to any object with a `write` method.
+    """
+
+    def __init__(self, out: Any, timestamp: float, level: int = zlib.Z_DEFAULT_COMPRESSION):
+        self._out = out
+        self._level = level
+        self._offset = 0
+        self._central: list[bytes] = []
+        self._time, self._date = _dos_datetime(timestamp)
+
+    def _write(self, data: bytes) -> None:
+        self._out.write(data)
+        self._offset += len(data)
+
+    def _local_header(self, name: bytes, flags: int, method: int, crc: int, compressed_size: int, size: int) -> None:
+        self._write(struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, 20, flags, method, self._time, self._date,
+            crc, compressed_size, size, len(name), 0,
+        ) + name)
+
+    def _central_record(
+        self, name: bytes, flags: int, method: int, crc: int, compressed_size: int, size: int, header_offset: int
+    ) -> None:
+        self._central.append(struct.pack(
+            "<IHHHHHHIIIHHHHHII", 0x02014B50, 20, 20, flags, method, self._time, self._date,
+            crc, compressed_size, size, len(name), 0, 0, 0, 0, 0, header_offset,
+        ) + name)
+
+    def _add(self, name: bytes, crc: int, payload: bytes, size: int, method: int = zipfile.ZIP_DEFLATED) -> None:
+        header_offset = self._offset
+        # Names are UTF-8 (flag bit 11) so per-item filenames can hold any party name
+        flags = 0x800 if not name.isascii() else 0
+        self._local_header(name, flags, method, crc, len(payload), size)
+        self._write(payload)
+        self._central_record(name, flags, method, crc, len(payload), size, header_offset)
+
+    def add_streamed(self, name: str, chunks: Iterable[bytes]) -> Iterator[None]:
+        """
+        Deflates `chunks` as they arrive, yielding after each write so the caller
+        can flush output. Sizes and CRC go into a trailing data descriptor, since
+        they are not known when the local header is written.
+        """
+        encoded_name = name.encode("utf-8")
+        header_offset = self._offset
+        flags = 0x08
+        self._local_header(encoded_name, flags, zipfile.ZIP_DEFLATED, 0, 0, 0)
+        compressor = zlib.compressobj(self._level, zlib.DEFLATED, -15)
+        crc = size = compressed_size = 0
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            compressed = compressor.compress(chunk)
+            compressed_size += len(compressed)
+            self._write(compressed)
+            yield
+        compressed = compressor.flush()
+        compressed_size += len(compressed)
+        self._write(compressed)
+        self._write(struct.pack("<IIII", 0x08074B50, crc, compressed_size, size))
+        self._central_record(encoded_name, flags, zipfile.ZIP_DEFLATED, crc, compressed_size, size, header_offset)
+        yield
+
+    def add_entry(self, entry: _ZipEntry) -> None:
+        self._add(entry.name, entry.crc, entry.compressed, entry.size)
+
+    def add_data(self, name: str, data: bytes, compress: bool = True) -> None:
+        """Adds a whole file. Already-compressed payloads (DOCX, PDF) can be stored as-is."""
+        if not compress:
+            self._add(name.encode("utf-8"), zlib.crc32(data), data, len(data), zipfile.ZIP_STORED)
+            return
+        self._add(name.encode("utf-8"), zlib.crc32(data), _deflate(data, self._level), len(data))
+
+    def close(self) -> None:
+        central_offset = self._offset
+        for record in self._central:
+            self._write(record)
+        self._write(struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, len(self._central), len(self._central),
+            self._offset - central_offset, central_offset, 0,
+        ))
+
+
+class DocxTemplateBuilder:
+    """
+    Builds DOCX files from a base package prepared once: python-docx's default
+    template with the Normal style set to Calibri 11pt. Per document only
+    `word/document.xml` is generated, by splicing paragraph markup into the
+    base body; every other part is copied pre-compressed.
+
+    With `compact`, the base package is run through compact_parts() first;
+    `compression_level` is the zlib level (0-9, -1 for zlib's default) used
+    for every part. With `structured`, titles, headings and list items get
+    their paragraph styles (see block_style); otherwise every line is Normal.
+    """
+
+    DOCUMENT_PART = "word/document.xml"
+
+    def __init__(
+        self,
+        compact: bool = False,
+        compression_level: int = zlib.Z_DEFAULT_COMPRESSION,
+        structured: bool = True,
+    ):
+        self.compact = compact
+        self.compression_level = compression_level
+        self.structured = structured
+        self._lock = threading.Lock()
+        self._entries: Optional[list[Optional[_ZipEntry]]] = None
+        self._head = b""
+        self._tail = b""
+        self._timestamp = 0.0
+
+    @property
+    def prepared(self) -> bool:
+        return self._entries is not None
+
+    def prepare(self) -> None:
+        with self._lock:
+            if self._entries is not None:
+                return
+            # python-docx is only needed here, so it is not imported with the app
+            from docx import Document
+            from docx.shared import Pt
+
+            doc = Document()
+            style: Any = doc.styles['Normal']
+            style.font.name = 'Calibri'
+            style.font.size = Pt(11)
+            buffer = io.BytesIO()
+            doc.save(buffer)
+
+            with zipfile.ZipFile(buffer) as package:
+                parts = {info.filename: package.read(info.filename) for info in package.infolist()}
+            if self.compact:
+                parts = compact_parts(parts, tuple(STYLE_NAMES) if self.structured else ())
+
+            entries: list[Optional[_ZipEntry]] = []
+            for name, data in parts.items():
+                if name == self.DOCUMENT_PART:
+                    # Keep everything up to the (empty) body content and from sectPr on
+                    body_start = data.index(b"<w:body>") + len(b"<w:body>")
+                    body_end = data.index(b"<w:sectPr", body_start)
+                    self._head, self._tail = data[:body_start], data[body_end:]
+                    entries.append(None)
+                else:
+                    entries.append(_ZipEntry(name, data, self.compression_level))
+            self._timestamp = time.time()
+            self._entries = entries
+
+    def document_xml(self, agreement_text: str) -> bytes:
+        body = "".join(iter_body_xml(agreement_text, self.structured)).encode("utf-8")
+        return self._head + body + self._tail
+
+    def build(self, agreement_text: str) -> bytes:
+        if self._entries is None:
+            self.prepare()
+        document = self.document_xml(agreement_text)
+        out = io.BytesIO()
+        writer = ZipWriter(out, self._timestamp, self.compression_level)
+        for entry in self._entries or ():
+            if entry is None:
+                writer.add_data(self.DOCUMENT_PART, document)
+            else:
+                writer.add_entry(entry)
+        writer.close()
+        return out.getvalue()
+
+    def iter_document_xml(self, agreement_text: str, chunk_size: int) -> Iterator[bytes]:
+        """Yields `word/document.xml` in roughly `chunk_size` pieces as paragraphs are generated."""
+        yield self._head
+        pending: list[str] = []
+        pending_size = 0
+        for paragraph in iter_body_xml(agreement_text, self.structured):
+            pending.append(paragraph)
+            pending_size += len(paragraph)
+            if pending_size >= chunk_size:
+                yield "".join(pending).encode("utf-8")
+                pending.clear()
+                pending_size = 0
+        if pending:
+            yield "".join(pending).encode("utf-8")
+        yield self._tail
+
+    def iter_build(self, agreement_text: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Streaming variant of `build`: yields the DOCX package in chunks while
+        `word/document.xml` is still being written, so peak memory stays near
+        `chunk_size` instead of a multiple of the output size.
+        The concatenated chunks unzip to the same parts as `build`.
+        """
+        if self._entries is None:
+            self.prepare()
+        sink = ChunkSink()
+        writer = ZipWriter(sink, self._timestamp, self.compression_level)
+        for entry in self._entries or ():
+            if entry is None:
+                for _ in writer.add_streamed(self.DOCUMENT_PART, self.iter_document_xml(agreement_text, chunk_size)):
+                    if sink.size >= chunk_size:
+                        yield sink.drain()
+            else:
+                writer.add_entry(entry)
+                if sink.size >= chunk_size:
+                    yield sink.drain()
+        writer.close()
+        yield sink.drain()
+
+
+docx_builder = DocxTemplateBuilder(
+    settings.docx_package == "compact", settings.docx_compression_level, settings.document_structure
+)
+
+
+def build_docx(agreement_text: str) -> bytes:
+    return docx_builder.build(agreement_text)
@@ -0,0 +1,154 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import settings
+from app.services.metrics import metrics
+
+T = TypeVar("T")
+
+
+class QueueFullError(Exception):
+    """Raised when a build is submitted while every worker and queue slot is taken."""
+
+
+def _timed_call(fn: Callable[..., T], submitted_at: float, *args: Any) -> tuple[T, float, float]:
+    """
+    Runs `fn` inside the worker and reports how long the job sat in the queue
+    and how long it ran. time.monotonic() is system-wide on Linux, so this is
+    also valid when the worker is a separate process.
+    """
+    started_at = time.monotonic()
+    result = fn(*args)
+    return result, started_at - submitted_at, time.monotonic() - started_at
+
+
+class DocumentExecutor:
+    """
+    Dedicated, bounded pool for document builds, kept apart from Starlette's
+    shared threadpool so slow DOCX saves cannot starve cheap preview requests.
+
+    At most `max_workers + max_queue` builds are accepted at once; anything
+    beyond that is rejected immediately with QueueFullError so the route can
+    answer 503 instead of letting latency pile up.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_queue: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind!r}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+        self.run_seconds_max = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                return
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="docgen-build")
+        logging.info(f"Document executor started ({self.kind}, {self.max_workers} workers, queue {self.max_queue}).")
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    @property
+    def thread_pool(self) -> Optional[Executor]:
+        """The pool itself if it runs threads, for builds that must stay in this process (streamed DOCX)."""
+        if self._pool is None:
+            self.start()
+        return self._pool if self.kind == "thread" else None
+
+    def reserve(self) -> None:
+        """
+        Takes an in-flight slot for a build that is not submitted through
+        run() (the streamed DOCX writer), or raises QueueFullError. The
+        caller must give it back with release().
+        """
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise QueueFullError("Document build queue is full")
+            self.in_flight += 1
+            self.submitted += 1
+
+    def release(self, failed: bool = False) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Runs `fn(*args)` on the pool. With a process pool, `fn` and its arguments must be picklable."""
+        if self._pool is None:
+            self.start()
+        self.reserve()
+        try:
+            loop = asyncio.get_running_loop()
+            call: Callable[..., Any] = _timed_call
+            if self.kind == "thread":
+                # Carry the request context over so the build can record its own stages
+                call = functools.partial(contextvars.copy_context().run, _timed_call)
+            result, waited, ran = await loop.run_in_executor(self._pool, call, fn, time.monotonic(), *args)
+        except BaseException:
+            with self._lock:
+                self.in_flight -= 1
+                self.failed += 1
+            raise
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self.run_seconds_total += ran
+            self.run_seconds_max = max(self.run_seconds_max, ran)
+        metrics.record_stage("queue", waited)
+        metrics.record_stage("build", ran)
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.max_workers,
+                "queue_limit": self.max_queue,
+                "in_flight": self.in_flight,
+                "queue_depth": max(0, self.in_flight - self.max_workers),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "wait_seconds_avg": round(self.wait_seconds_total / self.completed, 6) if self.completed else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "run_seconds_avg": round(self.run_seconds_total / self.completed, 6) if self.completed else 0.0,
+                "run_seconds_max": round(self.run_seconds_max, 6),
+            }
+
+
+document_executor = DocumentExecutor(
+    kind=settings.docx_executor_kind,
+    max_workers=settings.docx_workers,
+    max_queue=settings.docx_queue_size,
+)
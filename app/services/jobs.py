@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.documents import DocumentType
+from app.services.executor import QueueFullError, document_executor
+from app.services.rendering import render_cached
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Delay between attempts while the document executor is full (seconds, capped)
+_QUEUE_FULL_BACKOFF = (0.05, 1.0)
+
+
+@dataclass(frozen=True)
+class Job:
+    job_id: str
+    document_type: str
+    output_format: str
+    status: str
+    filename: str
+    created_at: float
+    updated_at: float
+    expires_at: float
+    size: Optional[int] = None
+    error: Optional[str] = None
+
+
+class JobStore:
+    """
+    Local store for asynchronous document jobs: job metadata in SQLite and
+    finished files next to it on disk, so it needs no external service and
+    every worker process of the same host sees the same jobs.
+
+    Jobs and their files expire `ttl_seconds` after they were last updated
+    and are removed by `cleanup()`.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            document_type TEXT NOT NULL,
+            output_format TEXT NOT NULL,
+            status TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            size INTEGER,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at);
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.directory / "jobs.sqlite3", check_same_thread=False, timeout=10)
+            conn.row_factory = sqlite3.Row
+            # WAL lets the worker processes read while one of them writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self._SCHEMA)
+            self._conn = conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _execute(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        if self._conn is None:
+            self.open()
+        with self._lock:
+            with self._conn:
+                return self._conn.execute(sql, params).fetchall()
+
+    def artifact_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.bin"
+
+    def create(self, document_type: str, output_format: str, filename: str) -> Job:
+        now = time.time()
+        job = Job(
+            job_id=uuid.uuid4().hex,
+            document_type=document_type,
+            output_format=output_format,
+            status=QUEUED,
+            filename=filename,
+            created_at=now,
+            updated_at=now,
+            expires_at=now + self.ttl_seconds,
+        )
+        self._execute(
+            "INSERT INTO jobs (job_id, document_type, output_format, status, filename, created_at, updated_at, expires_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job.job_id, job.document_type, job.output_format, job.status, job.filename,
+             job.created_at, job.updated_at, job.expires_at),
+        )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        rows = self._execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+        if not rows or rows[0]["expires_at"] <= time.time():
+            return None
+        return Job(**dict(rows[0]))
+
+    def _update(self, job_id: str, status: str, size: Optional[int] = None, error: Optional[str] = None) -> None:
+        now = time.time()
+        self._execute(
+            "UPDATE jobs SET status = ?, size = ?, error = ?, updated_at = ?, expires_at = ? WHERE job_id = ?",
+            (status, size, error, now, now + self.ttl_seconds, job_id),
+        )
+
+    def mark_running(self, job_id: str) -> None:
+        self._update(job_id, RUNNING)
+
+    def mark_failed(self, job_id: str, error: str) -> None:
+        self._update(job_id, FAILED, error=error)
+
+    def save_result(self, job_id: str, payload: bytes) -> None:
+        """Writes the finished file (atomically, so a reader never sees half of it) and marks the job done."""
+        path = self.artifact_path(job_id)
+        partial = path.with_suffix(".part")
+        partial.write_bytes(payload)
+        os.replace(partial, path)
+        self._update(job_id, DONE, size=len(payload))
+
+    def cleanup(self) -> int:
+        """Deletes expired jobs and their files; returns how many were removed."""
+        now = time.time()
+        expired = [row["job_id"] for row in self._execute("SELECT job_id FROM jobs WHERE expires_at <= ?", (now,))]
+        for job_id in expired:
+            for path in (self.artifact_path(job_id), self.artifact_path(job_id).with_suffix(".part")):
+                path.unlink(missing_ok=True)
+        if expired:
+            self._execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+        return len(expired)
+
+
+class JobRunner:
+    """
+    Runs submitted jobs as tasks on the worker's event loop: the render goes
+    to the threadpool and the build to the shared document executor, waiting
+    for a free slot instead of failing when it is full. Also owns the periodic
+    store cleanup.
+    """
+
+    def __init__(self, store: JobStore):
+        self.store = store
+        self._tasks: set[asyncio.Task] = set()
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> int:
+        return len(self._tasks)
+
+    async def submit(self, doc: DocumentType, data: BaseModel, output_format: str, build: Callable[[str], bytes]) -> Job:
+        if len(self._tasks) >= settings.jobs_max_active:
+            raise QueueFullError("Too many document jobs in progress")
+        filename = f"{doc.filename.rsplit('.', 1)[0]}.{output_format}"
+        job = await run_in_threadpool(self.store.create, doc.name, output_format, filename)
+        task = asyncio.get_running_loop().create_task(self._run(job, doc, data, build))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: Job, doc: DocumentType, data: BaseModel, build: Callable[[str], bytes]) -> None:
+        try:
+            await run_in_threadpool(self.store.mark_running, job.job_id)
+            rendered_text = await run_in_threadpool(render_cached, doc.template, data)
+            attempt = 0
+            while True:
+                try:
+                    payload = await document_executor.run(build, rendered_text)
+                    break
+                except QueueFullError:
+                    attempt += 1
+                    delay, cap = _QUEUE_FULL_BACKOFF
+                    await asyncio.sleep(min(delay * attempt, cap))
+            await run_in_threadpool(self.store.save_result, job.job_id, payload)
+        except asyncio.CancelledError:
+            await run_in_threadpool(self.store.mark_failed, job.job_id, "Server shut down before the job finished")
+            raise
+        except Exception as e:
+            logging.error(f"Job {job.job_id} ({doc.name}) failed: {e}", exc_info=True)
+            await run_in_threadpool(self.store.mark_failed, job.job_id, f"Error generating {doc.title} file: {e}")
+
+    async def _cleanup_loop(self) -> None:
+        while True:
+            try:
+                removed = await run_in_threadpool(self.store.cleanup)
+                if removed:
+                    logging.info(f"Removed {removed} expired jobs.")
+            except Exception as e:
+                logging.error(f"Job cleanup failed: {e}")
+            await asyncio.sleep(settings.jobs_cleanup_interval_seconds)
+
+    def start(self) -> None:
+        self.store.open()
+        if self._cleanup_task is None:
+            self._cleanup_task = asyncio.get_running_loop().create_task(self._cleanup_loop())
+
+    async def shutdown(self, timeout: float) -> None:
+        """Gives running jobs up to `timeout` seconds to finish, then cancels them."""
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            self._cleanup_task = None
+        if self._tasks:
+            _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+        self.store.close()
+
+
+job_store = JobStore(settings.jobs_dir, settings.jobs_ttl_seconds)
+job_runner = JobRunner(job_store)
@@ -0,0 +1,112 @@
+import dataclasses
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Optional, Union
+
+from app.core.config import settings
+
+Loc = list[Union[str, int]]
+
+
+@dataclass(frozen=True)
+class PayloadLimits:
+    """Size limits for one document type's request body, enforced before schema validation."""
+    max_body_bytes: int
+    max_list_items: int
+    max_string_chars: int
+
+
+class PayloadTooLarge(Exception):
+    """A request body over one of its PayloadLimits; `detail` is the 413 response body."""
+
+    def __init__(self, limit: str, maximum: int, actual: int, loc: Loc):
+        super().__init__(f"{limit} exceeded at {'.'.join(map(str, loc))}: {actual} > {maximum}")
+        self.detail = {
+            "error": "payload_too_large",
+            "limit": limit,
+            "max": maximum,
+            "actual": actual,
+            "loc": loc,
+        }
+
+
+def limits_for(document_type: str) -> PayloadLimits:
+    """The default limits with the document type's overrides from settings.payload_limits applied."""
+    defaults = PayloadLimits(
+        settings.payload_max_body_bytes,
+        settings.payload_max_list_items,
+        settings.payload_max_string_chars,
+    )
+    return dataclasses.replace(defaults, **settings.payload_limits.get(document_type, {}))
+
+
+async def read_body(chunks: AsyncIterable[bytes], max_bytes: int, declared_length: Optional[str] = None) -> bytes:
+    """
+    Reads a request body, giving up as soon as it is known to be over
+    `max_bytes`: from the Content-Length header before anything is read,
+    otherwise at the chunk that crosses the limit.
+    """
+    if declared_length is not None and declared_length.isdigit() and int(declared_length) > max_bytes:
+        raise PayloadTooLarge("max_body_bytes", max_bytes, int(declared_length), ["body"])
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > max_bytes:
+            # Counted so far; the rest is never read
+            raise PayloadTooLarge("max_body_bytes", max_bytes, len(body), ["body"])
+    return bytes(body)
+
+
+def _locate(node: Any, target: Any, loc: Loc) -> Optional[Loc]:
+    if node is target:
+        return loc
+    if isinstance(node, dict):
+        children = node.items()
+    elif isinstance(node, list):
+        children = enumerate(node)
+    else:
+        return None
+    for key, child in children:
+        found = _locate(child, target, loc + [key])
+        if found is not None:
+            return found
+    return None
+
+
+def check_payload(payload: Any, limits: PayloadLimits, loc: Optional[Loc] = None) -> None:
+    """
+    Raises PayloadTooLarge for the first list or string in the parsed body
+    that is over the limits. The walk keeps no paths, which are only worked
+    out for the offending value, so a body within the limits costs a single
+    pass over its values. `loc` is where `payload` sits in the body.
+    """
+    max_items, max_chars = limits.max_list_items, limits.max_string_chars
+    if loc is None:
+        loc = ["body"]
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if type(node) is str:
+            if len(node) > max_chars:
+                raise PayloadTooLarge("max_string_chars", max_chars, len(node), _locate(payload, node, loc) or loc)
+        elif type(node) is list:
+            if len(node) > max_items:
+                raise PayloadTooLarge("max_list_items", max_items, len(node), _locate(payload, node, loc) or loc)
+            stack.extend(node)
+        elif type(node) is dict:
+            stack.extend(node.values())
+
+
+def check_batch(batch: Any) -> None:
+    """
+    check_payload for each item of a /docs/batch body, against the limits of
+    the item's document type. Anything malformed is left for validation.
+    """
+    items = batch.get("items") if type(batch) is dict else None
+    if type(items) is not list:
+        return
+    for index, item in enumerate(items):
+        if type(item) is not dict:
+            continue
+        document_type = item.get("document_type")
+        limits = limits_for(document_type if type(document_type) is str else "")
+        check_payload(item.get("payload"), limits, ["body", "items", index, "payload"])
@@ -0,0 +1,208 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+from app.core.config import settings
+
+# Seconds; from sub-millisecond previews up to slow PDF builds
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes; 1 KiB to 64 MiB in steps of 4x
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(9))
+
+T = TypeVar("T")
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts (last one is +Inf), sum, count]
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            label_text = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            prefix = f"{label_text}," if label_text else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}'
+            yield f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}'
+            yield f"{self.name}_sum{{{label_text}}} {total:.6f}"
+            yield f"{self.name}_count{{{label_text}}} {count}"
+
+
+class RequestTimings:
+    """Stage durations collected while one request is handled; also the source of its Server-Timing header."""
+
+    __slots__ = ("document_type", "operation", "started_at", "stages")
+
+    def __init__(self, document_type: str, operation: str):
+        self.document_type = document_type
+        self.operation = operation
+        self.started_at = time.perf_counter()
+        self.stages: list[tuple[str, float]] = []
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.stages.append((stage, seconds))
+
+    def server_timing(self, total: float) -> str:
+        entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.stages]
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(entries)
+
+
+class _Stage:
+    __slots__ = ("timings", "name", "started_at")
+
+    def __init__(self, timings: RequestTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.started_at = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.timings.record(self.name, time.perf_counter() - self.started_at)
+
+
+_NO_STAGE = nullcontext()
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("docgen_request_timings", default=None)
+
+
+class Metrics:
+    """
+    In-process request metrics: per-stage durations (validate, render, queue,
+    build, ...) and output sizes, labelled by document type. Exposed at
+    /metrics in the Prometheus text format.
+
+    Stages are recorded against the request's RequestTimings, found through a
+    context variable, so nested code (the render in the threadpool, the build
+    on the document executor) can time itself without the timings being
+    passed down. With no active request, or with metrics disabled, `stage()`
+    costs a single context-variable lookup.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.request_duration = Histogram(
+            "docgen_request_duration_seconds", "Document request latency.",
+            ("document_type", "operation", "status"), DURATION_BUCKETS,
+        )
+        self.stage_duration = Histogram(
+            "docgen_stage_duration_seconds", "Time spent per request stage.",
+            ("document_type", "operation", "stage"), DURATION_BUCKETS,
+        )
+        self.output_size = Histogram(
+            "docgen_output_bytes", "Size of rendered previews and generated files.",
+            ("document_type", "format"), SIZE_BUCKETS,
+        )
+        # Callables returning {component: stats dict}; numeric values are exported as gauges
+        self._collectors: list[Callable[[], dict[str, dict[str, Any]]]] = []
+
+    def add_collector(self, collector: Callable[[], dict[str, dict[str, Any]]]) -> None:
+        self._collectors.append(collector)
+
+    def start_request(self, document_type: str, operation: str) -> tuple[RequestTimings, contextvars.Token]:
+        timings = RequestTimings(document_type, operation)
+        return timings, _current.set(timings)
+
+    @staticmethod
+    def leave_request(token: contextvars.Token) -> None:
+        _current.reset(token)
+
+    def finish_request(self, timings: RequestTimings, token: contextvars.Token, status: int) -> float:
+        self.leave_request(token)
+        return self.observe_request(timings, status)
+
+    def observe_request(self, timings: RequestTimings, status: int) -> float:
+        total = timings.elapsed()
+        self.request_duration.observe((timings.document_type, timings.operation, str(status)), total)
+        for stage, seconds in timings.stages:
+            self.stage_duration.observe((timings.document_type, timings.operation, stage), seconds)
+        return total
+
+    async def observe_streamed(self, body: AsyncIterable[T], timings: RequestTimings, status: int) -> AsyncIterator[T]:
+        """
+        Passes a streamed response body through with `timings` as the current
+        request again, so the stages recorded while the body is produced (after
+        the handler has returned) are counted. The request is observed once
+        the body has been sent or the client has gone.
+        """
+        token = _current.set(timings)
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            _current.reset(token)
+            self.observe_request(timings, status)
+
+    @staticmethod
+    def current() -> Optional[RequestTimings]:
+        return _current.get()
+
+    def stage(self, name: str) -> "_Stage | nullcontext[None]":
+        """Context manager timing one stage of the current request."""
+        timings = _current.get()
+        if timings is None:
+            return _NO_STAGE
+        return _Stage(timings, name)
+
+    def record_stage(self, name: str, seconds: float) -> None:
+        timings = _current.get()
+        if timings is not None:
+            timings.record(name, seconds)
+
+    def record_size(self, output_format: str, size: int) -> None:
+        timings = _current.get()
+        if timings is not None:
+            self.output_size.observe((timings.document_type, output_format), size)
+
+    def record_text_size(self, output_format: str, text: str) -> None:
+        """record_size for text, only encoded when there is a request to record it against."""
+        timings = _current.get()
+        if timings is not None:
+            self.output_size.observe((timings.document_type, output_format), len(text.encode("utf-8")))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for histogram in (self.request_duration, self.stage_duration, self.output_size):
+            lines.extend(histogram.render())
+        for collector in self._collectors:
+            for component, stats in collector().items():
+                for key, value in stats.items():
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        continue
+                    name = f"docgen_{component}_{key}"
+                    lines.append(f"# TYPE {name} gauge")
+                    lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(enabled=settings.metrics_enabled)
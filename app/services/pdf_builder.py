@@ -0,0 +1,226 @@
+import copy
+import io
+import logging
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from fpdf import FPDF
+    from fpdf.fonts import TTFFont
+
+from app.core.config import settings
+from app.services.blocks import CLAUSE, HEADING, LIST_ITEM, PAGE, SUBHEADING, TITLE, Block, iter_blocks
+
+FONT_PATH = Path(__file__).resolve().parents[2] / "DejaVuSans.ttf"
+
+# Tables fpdf2 drops when it subsets the font for embedding anyway
+_UNUSED_FONT_TABLES = ("FFTM", "GDEF", "GPOS", "GSUB", "MATH", "hdmx", "meta", "kern")
+
+# Layout mirrors the DOCX output: Letter page, 1in top/bottom and 1.25in
+# left/right margins, 11pt text, 1.15 line spacing and 10pt after each paragraph.
+PAGE_WIDTH, PAGE_HEIGHT = 612.0, 792.0
+MARGIN_X, MARGIN_Y = 90.0, 72.0
+FONT_SIZE = 11.0
+LINE_HEIGHT = 15.0
+PARAGRAPH_SPACING = 10.0
+TAB = "    "
+
+# Structured layout (see iter_blocks): font size and bold per block kind; the
+# bundled font has no bold face, so bold is drawn as filled and stroked text
+TITLE_SIZE = 16.0
+HEADING_SIZE = 12.5
+_BLOCK_FONTS = {
+    TITLE: (TITLE_SIZE, True),
+    HEADING: (HEADING_SIZE, True),
+    SUBHEADING: (FONT_SIZE, True),
+}
+BOLD_STROKE = 0.3
+# List items and numbered sub-clauses are indented
+INDENT = 18.0
+# A heading moves to the next page unless this many body lines fit under it
+KEEP_WITH_NEXT_LINES = 2
+# Drawn instead of characters the font has no glyph for (other scripts,
+# control characters); "?" if the font lacks U+FFFD as well
+REPLACEMENT_CHARACTER = "\ufffd"
+
+
+class _GlyphFallback(dict):
+    """str.translate table mapping every code point the font cannot draw to the replacement character."""
+
+    def __init__(self, cmap: dict[int, int]):
+        super().__init__()
+        self._cmap = cmap
+        self._replacement = REPLACEMENT_CHARACTER if ord(REPLACEMENT_CHARACTER) in cmap else "?"
+
+    def __missing__(self, codepoint: int):
+        value = codepoint if codepoint in self._cmap else self._replacement
+        self[codepoint] = value
+        return value
+
+
+class PdfBuilder:
+    """
+    Renders text to PDF with fpdf2 and the bundled DejaVuSans.ttf.
+
+    fpdf2 and fontTools are imported in `prepare()`, on first use or during
+    the startup warm-up, so they do not slow down the app import.
+
+    The TTF is parsed once per process: unused tables are stripped and the
+    character widths, cmap and glyph ids are computed once. Each document gets
+    a light clone of that font that shares the read-only metrics, with its own
+    lazily opened font tables, subset map and font descriptor, since fpdf2
+    subsets the font and numbers the descriptor in place when it writes the file.
+    """
+
+    FONT_FAMILY = "dejavu"
+
+    def __init__(self, font_path: Path = FONT_PATH, structured: bool = True):
+        self.font_path = font_path
+        self.structured = structured
+        self._lock = threading.Lock()
+        self._font: Optional["TTFFont"] = None
+        self._font_bytes = b""
+        self._fallback: Optional[_GlyphFallback] = None
+
+    @property
+    def prepared(self) -> bool:
+        return self._font is not None
+
+    def prepare(self) -> None:
+        with self._lock:
+            if self._font is not None:
+                return
+            from fontTools import ttLib
+            from fpdf import FPDF
+            from fpdf.fonts import TTFFont
+
+            # The subsetter logs every table it touches at INFO, for each PDF written
+            logging.getLogger("fontTools").setLevel(logging.WARNING)
+            ttfont = ttLib.TTFont(str(self.font_path), recalcTimestamp=False)
+            for tag in _UNUSED_FONT_TABLES:
+                if tag in ttfont:
+                    del ttfont[tag]
+            buffer = io.BytesIO()
+            ttfont.save(buffer)
+            self._font_bytes = buffer.getvalue()
+            self._font = TTFFont(FPDF(), io.BytesIO(self._font_bytes), self.FONT_FAMILY, "")
+            self._fallback = _GlyphFallback(self._font.cmap)
+
+    def _document_font(self) -> "TTFFont":
+        from fontTools import ttLib
+        from fpdf.fonts import SubsetMap, TTFFont
+
+        if self._font is None:
+            self.prepare()
+        base = self._font
+        font = TTFFont.__new__(TTFFont)
+        for slot in TTFFont.__slots__:
+            if hasattr(base, slot):
+                setattr(font, slot, getattr(base, slot))
+        font.ttfont = ttLib.TTFont(io.BytesIO(self._font_bytes), recalcTimestamp=False, lazy=True)
+        # output() sets the descriptor's object id and font name, so it cannot be shared
+        font.desc = copy.copy(base.desc)
+        font._hbfont = None
+        font.missing_glyphs = []
+        font.biggest_size_pt = 0
+        font.subset = SubsetMap(font)
+        return font
+
+    def _new_document(self) -> "FPDF":
+        from fpdf import FPDF
+
+        pdf = FPDF(unit="pt", format="letter")
+        pdf.fonts[self.FONT_FAMILY] = self._document_font()
+        pdf.set_margins(MARGIN_X, MARGIN_Y, MARGIN_X)
+        pdf.set_auto_page_break(False)
+        pdf.set_font(self.FONT_FAMILY, size=FONT_SIZE)
+        return pdf
+
+    def _wrap(self, widths: dict, line: str, max_width: float, size: float = FONT_SIZE) -> list[str]:
+        """Greedy word wrap using the font's advance widths (in 1/1000 em)."""
+        limit = max_width * 1000 / size
+        space = widths[0x20]
+        lines: list[str] = []
+        current: list[str] = []
+        current_width = 0
+        for word in line.split(" "):
+            word_width = sum(widths[ord(c)] for c in word)
+            needed = word_width if not current else current_width + space + word_width
+            if needed <= limit:
+                current.append(word)
+                current_width = needed
+                continue
+            if current:
+                lines.append(" ".join(current))
+            # Words wider than the page are broken by character
+            while word_width > limit:
+                cut, cut_width = 0, 0
+                while cut < len(word) and cut_width + widths[ord(word[cut])] <= limit:
+                    cut_width += widths[ord(word[cut])]
+                    cut += 1
+                cut = max(cut, 1)
+                lines.append(word[:cut])
+                word = word[cut:]
+                word_width = sum(widths[ord(c)] for c in word)
+            current, current_width = [word], word_width
+        lines.append(" ".join(current))
+        return lines
+
+    def build(self, agreement_text: str) -> bytes:
+        from fpdf.enums import TextMode
+
+        pdf = self._new_document()
+        widths = pdf.current_font.cw
+        bottom = PAGE_HEIGHT - MARGIN_Y
+        font = (FONT_SIZE, False)
+
+        pdf.add_page()
+        y = MARGIN_Y
+        for block in iter_blocks(agreement_text, self.structured):
+            if block.kind is PAGE:
+                pdf.add_page()
+                y = MARGIN_Y
+                continue
+            size, bold = _BLOCK_FONTS.get(block.kind, (FONT_SIZE, False))
+            if (size, bold) != font:
+                font = (size, bold)
+                pdf.set_font_size(size)
+                if bold and pdf.line_width != BOLD_STROKE:
+                    pdf.set_line_width(BOLD_STROKE)
+                pdf.text_mode = TextMode.FILL_STROKE if bold else TextMode.FILL
+            line_height = LINE_HEIGHT * size / FONT_SIZE
+            indent = INDENT if self._indented(block) else 0.0
+            text_width = PAGE_WIDTH - 2 * MARGIN_X - indent
+            if bold and y + line_height + KEEP_WITH_NEXT_LINES * LINE_HEIGHT > bottom:
+                pdf.add_page()
+                y = MARGIN_Y
+            # Same as the DOCX run handling: tabs are whitespace, CR starts a new line
+            for segment in block.text.replace("\t", TAB).split("\r"):
+                if not (segment.isascii() and segment.isprintable()):
+                    # fpdf2 raises on characters missing from the font instead of skipping them
+                    segment = segment.translate(self._fallback)
+                for wrapped in self._wrap(widths, segment, text_width, size):
+                    if y + line_height > bottom:
+                        pdf.add_page()
+                        y = MARGIN_Y
+                    if wrapped:
+                        x = MARGIN_X + indent
+                        if block.kind is TITLE:
+                            x += (text_width - sum(widths[ord(c)] for c in wrapped) * size / 1000) / 2
+                        pdf.text(x, y + size, wrapped)
+                    y += line_height
+            y += PARAGRAPH_SPACING
+        return bytes(pdf.output())
+
+    @staticmethod
+    def _indented(block: Block) -> bool:
+        return block.kind is LIST_ITEM or (block.kind is CLAUSE and block.level > 1)
+
+
+pdf_builder = PdfBuilder(structured=settings.document_structure)
+
+
+def build_pdf_bytes(agreement_text: str) -> bytes:
+    """Module-level so it can be shipped to a process-pool worker."""
+    return pdf_builder.build(agreement_text)
@@ -0,0 +1,123 @@
+from functools import lru_cache
+from typing import Any, Iterator, Optional, Type
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.services.cache import render_cache, payload_digest
+from app.services.metrics import metrics
+from app.services.template_registry import TemplateRegistry
+
+template_registry = TemplateRegistry(
+    directory=settings.templates_dir,
+    auto_reload=settings.templates_auto_reload,
+    bytecode_cache_dir=settings.templates_bytecode_cache_dir,
+)
+
+
+WORDS_PLACEHOLDER = "______________________"
+
+
+@lru_cache(maxsize=None)
+def schema_fields(schema: Type[BaseModel]) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """
+    Per-schema render metadata, computed once per model class: the top-level
+    field names and the "_in_words" fields that get a placeholder when empty.
+    """
+    names = tuple(schema.model_fields)
+    return names, tuple(name for name in names if name.endswith('_in_words'))
+
+
+def render_context(data: BaseModel) -> dict[str, Any]:
+    """
+    Template context for a submitted model, with empty "_in_words" fields filled.
+
+    The context holds the model's own attribute values rather than a
+    model_dump() copy; templates only use attribute and index access, which
+    Jinja resolves the same way on nested models as on dicts.
+    """
+    names, words_fields = schema_fields(type(data))
+    context = {name: getattr(data, name) for name in names}
+    for name in words_fields:
+        if not context[name]:
+            context[name] = WORDS_PLACEHOLDER
+    return context
+
+
+def render_document(template_name: str, data: BaseModel) -> str:
+    """
+    Renders a template against the submitted model, filling empty "_in_words"
+    fields. Goes through the template's skeleton when it has one, which
+    gives the same text as the Jinja render.
+    """
+    context = render_context(data)
+    skeleton = template_registry.skeleton(template_name) if settings.templates_skeletons else None
+    if skeleton is not None:
+        return skeleton.render(context)
+    return template_registry.get(template_name).render(context)
+
+
+def render_cached(template_name: str, data: BaseModel, digest: Optional[str] = None) -> str:
+    """
+    Same as render_document, but going through the render cache.
+    The key is the template name plus a digest of the payload, so a repeated
+    preview of an unchanged form skips the Jinja render completely. Pass
+    `digest` when the caller already has payload_digest(data).
+    """
+    cache_key = f"{template_name}:{digest or payload_digest(data)}"
+    rendered_text = render_cache.get(cache_key)
+    if rendered_text is not None:
+        return rendered_text
+
+    with metrics.stage("render"):
+        rendered_text = render_document(template_name, data)
+    render_cache.set(cache_key, rendered_text)
+    return rendered_text
+
+
+def iter_render_cached(template_name: str, data: BaseModel, chunk_chars: int) -> Iterator[str]:
+    """
+    Streaming counterpart of render_cached: yields the rendered text in chunks
+    of at least `chunk_chars` characters (the last one may be shorter) while
+    Jinja is still rendering, instead of building the whole string first.
+
+    A cached render is replayed in chunks. Otherwise the output is kept on the
+    side and stored in the render cache once the template finishes, as long as
+    it stays under `preview_stream_cache_max_chars`; longer documents are not
+    held in memory at all.
+    """
+    cache_key = f"{template_name}:{payload_digest(data)}"
+    rendered_text = render_cache.get(cache_key)
+    if rendered_text is not None:
+        for start in range(0, len(rendered_text), chunk_chars):
+            yield rendered_text[start:start + chunk_chars]
+        return
+
+    template = template_registry.get(template_name)
+    cache_limit = settings.preview_stream_cache_max_chars
+    kept: Optional[list[str]] = []
+    kept_chars = 0
+    pending: list[str] = []
+    pending_chars = 0
+    for piece in template.generate(render_context(data)):
+        pending.append(piece)
+        pending_chars += len(piece)
+        if pending_chars < chunk_chars:
+            continue
+        chunk = "".join(pending)
+        pending.clear()
+        pending_chars = 0
+        if kept is not None:
+            kept_chars += len(chunk)
+            if kept_chars <= cache_limit:
+                kept.append(chunk)
+            else:
+                kept = None
+        yield chunk
+
+    chunk = "".join(pending)
+    if chunk:
+        yield chunk
+    if kept is not None and kept_chars + len(chunk) <= cache_limit:
+        kept.append(chunk)
+        render_cache.set(cache_key, "".join(kept))
@@ -0,0 +1,181 @@
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import jinja2
+from jinja2 import nodes
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from app.services.cache import section_cache
+from app.services.metrics import metrics
+from app.services.rendering import render_context, template_registry
+
+# Name of the single section used for templates that are not split into blocks
+WHOLE_DOCUMENT = "document"
+# Hex characters of each section digest carried in the render token
+TOKEN_DIGEST_CHARS = 16
+
+Path = tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class Section:
+    name: str
+    # Attribute paths into the template context the section reads, e.g.
+    # ("partyOne", "assets"); a path covers everything below it
+    dependencies: tuple[Path, ...]
+
+
+@dataclass(frozen=True)
+class SectionPlan:
+    template: jinja2.Template
+    sections: tuple[Section, ...]
+    # False when the template is not made of top-level blocks only; it is then one section
+    split: bool
+
+
+class _DependencyVisitor:
+    """
+    Collects the context paths a block (or a whole template) reads, from its
+    AST. Attribute chains on a context variable (`partyOne.assets.real_estate`)
+    become one path; subscripts, filters and calls stop the chain at what was
+    resolved so far. Names bound inside the block (loop targets, `set`) and
+    `loop` itself are not context reads.
+    """
+
+    def __init__(self, root: nodes.Node):
+        self.local_names = {"loop"}
+        for node in root.find_all((nodes.For, nodes.Assign, nodes.AssignBlock)):
+            targets = [node.target, *node.target.find_all(nodes.Name)]
+            self.local_names.update(target.name for target in targets if isinstance(target, nodes.Name))
+        self.paths: set[Path] = set()
+
+    def visit(self, node: nodes.Node) -> None:
+        path = self._attribute_path(node)
+        if path is not None:
+            if path[0] not in self.local_names:
+                self.paths.add(path)
+            return
+        for child in node.iter_child_nodes():
+            self.visit(child)
+
+    @staticmethod
+    def _attribute_path(node: nodes.Node) -> Optional[Path]:
+        attributes = []
+        while isinstance(node, nodes.Getattr):
+            attributes.append(node.attr)
+            node = node.node
+        if isinstance(node, nodes.Name) and node.ctx == "load":
+            return (node.name, *reversed(attributes))
+        return None
+
+    def dependencies(self) -> tuple[Path, ...]:
+        # A path already covered by a shorter one adds nothing
+        kept = [
+            path for path in self.paths
+            if not any(other != path and path[:len(other)] == other for other in self.paths)
+        ]
+        return tuple(sorted(kept))
+
+
+def _build_plan(template_name: str, template: jinja2.Template) -> SectionPlan:
+    env = template_registry.env
+    source, _, _ = env.loader.get_source(env, template_name)
+    tree = env.parse(source)
+    blocks = [node for node in tree.body if isinstance(node, nodes.Block)]
+    if not blocks or len(blocks) != len(tree.body):
+        everything = _DependencyVisitor(tree)
+        everything.visit(tree)
+        return SectionPlan(template, (Section(WHOLE_DOCUMENT, everything.dependencies()),), split=False)
+
+    sections = []
+    for block in blocks:
+        visitor = _DependencyVisitor(block)
+        for child in block.body:
+            visitor.visit(child)
+        sections.append(Section(block.name, visitor.dependencies()))
+    return SectionPlan(template, tuple(sections), split=True)
+
+
+_plans: dict[str, SectionPlan] = {}
+_plans_lock = threading.Lock()
+
+
+def section_plan(template_name: str) -> SectionPlan:
+    """
+    Sections of a template, in document order, with the context paths each
+    one depends on. Computed once per compiled template (again after a
+    reload in dev mode).
+    """
+    template = template_registry.get(template_name)
+    plan = _plans.get(template_name)
+    if plan is None or plan.template is not template:
+        plan = _build_plan(template_name, template)
+        with _plans_lock:
+            _plans[template_name] = plan
+    return plan
+
+
+def _resolve(context: dict[str, Any], path: Path) -> Any:
+    value: Any = context.get(path[0])
+    for attribute in path[1:]:
+        if value is None:
+            return None
+        value = value.get(attribute) if isinstance(value, dict) else getattr(value, attribute, None)
+    return value
+
+
+def section_digest(template_name: str, section: Section, context: dict[str, Any]) -> str:
+    """SHA-256 over the template, the section and the values of everything the section reads."""
+    digest = hashlib.sha256(f"{template_name}:{section.name}".encode("utf-8"))
+    for path in section.dependencies:
+        digest.update(b"\0" + ".".join(path).encode("utf-8") + b"=")
+        digest.update(to_json(_resolve(context, path), fallback=str))
+    return digest.hexdigest()
+
+
+def parse_render_token(token: Optional[str]) -> list[str]:
+    return token.split(".") if token else []
+
+
+def render_sections(template_name: str, data: BaseModel, previous_token: Optional[str] = None) -> dict[str, Any]:
+    """
+    Renders a document section by section and returns only what changed.
+
+    The render token is stateless: the short digests of every section, in
+    order. A section whose digest matches the one in `previous_token` at the
+    same position is reported as unchanged and not rendered at all; the rest
+    come from the section cache or are rendered on their own. Joining the
+    text of all sections gives exactly the full preview.
+    """
+    plan = section_plan(template_name)
+    context = render_context(data)
+    previous = parse_render_token(previous_token)
+    jinja_context = None
+
+    sections = []
+    digests = []
+    for index, section in enumerate(plan.sections):
+        digest = section_digest(template_name, section, context)
+        short_digest = digest[:TOKEN_DIGEST_CHARS]
+        digests.append(short_digest)
+        if index < len(previous) and previous[index] == short_digest:
+            sections.append({"name": section.name, "changed": False})
+            continue
+
+        cache_key = f"{template_name}:{digest}"
+        text = section_cache.get(cache_key)
+        if text is None:
+            with metrics.stage("render"):
+                if not plan.split:
+                    text = plan.template.render(context)
+                else:
+                    if jinja_context is None:
+                        jinja_context = plan.template.new_context(context)
+                    text = "".join(plan.template.blocks[section.name](jinja_context))
+            section_cache.set(cache_key, text)
+        sections.append({"name": section.name, "changed": True, "text": text})
+
+    return {"token": ".".join(digests), "sections": sections}
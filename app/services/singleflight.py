@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces identical concurrent work: while a call for a key is in flight,
+    further calls for the same key wait for it and get the same result (or
+    exception) instead of starting their own. Nothing is kept once the call
+    finishes; caching finished results is the stores' job.
+
+    The work runs as its own task, so a caller that goes away (client
+    disconnect) does not cancel it for the others waiting on it.
+    """
+
+    def __init__(self):
+        self._flights: dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.collapsed = 0
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    def start(self, key: str, fn: Callable[[], Awaitable[T]]) -> "asyncio.Task[T]":
+        """
+        Starts `fn()` as the call for `key`, or returns the call already in
+        flight, without waiting for it; for a leader that consumes the work
+        as it happens (a streamed build) rather than its result.
+        """
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._land(key, done))
+            with self._lock:
+                self.leaders += 1
+        else:
+            with self._lock:
+                self.collapsed += 1
+        return task
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        return await asyncio.shield(self.start(key, fn))
+
+    def _land(self, key: str, task: asyncio.Task) -> None:
+        self._flights.pop(key, None)
+        # Mark the outcome as seen even if every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "leaders": self.leaders,
+                "collapsed": self.collapsed,
+            }
+
+
+# Renders of the same document type and payload
+render_flights: SingleFlight[str] = SingleFlight()
+# Builds of the same rendered text and output format
+build_flights: SingleFlight[bytes] = SingleFlight()
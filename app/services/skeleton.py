@@ -0,0 +1,244 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional, Pattern, Union
+
+import jinja2
+from jinja2 import nodes
+from markupsafe import escape
+
+from app.services.blocks import HEADING, SUBHEADING, remember_constant_blocks, remember_headings
+from app.services.docx_builder import remember_constant_lines
+
+# A slot resolves one `{{ name.attr[...] }}` expression against the context
+Slot = Callable[[dict[str, Any]], str]
+Part = Union[str, Slot, jinja2.Template]
+
+# Top-level statements that change the context for what follows, or that only
+# make sense inside the full template; a template using any of them is left to Jinja
+_UNSUPPORTED = (
+    nodes.Assign, nodes.AssignBlock, nodes.Macro, nodes.CallBlock, nodes.Extends,
+    nodes.Import, nodes.FromImport, nodes.Include, nodes.Block, nodes.FilterBlock,
+    nodes.With, nodes.Scope, nodes.ScopedEvalContextModifier,
+)
+
+# A heading marked in the template source: "1. DECLARATION{# heading #}"
+_HEADING_MARK = re.compile(r"\{#-?\s*(heading|subheading)\s*-?#\}\s*$")
+# Tags that only delimit blocks and never produce text
+_BLOCK_TAG = re.compile(r"\{%-?\s*(?:end)?block\b.*?-?%\}")
+_TAG = re.compile(r"\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}")
+
+
+@dataclass(frozen=True)
+class Skeleton:
+    """
+    A template split ahead of time into constant text, simple field slots and
+    (for control flow and filtered expressions) small compiled sub-templates.
+    Rendering joins the parts, so the constant text costs nothing per render.
+    """
+
+    template: jinja2.Template
+    parts: tuple[Part, ...]
+
+    @property
+    def slots(self) -> int:
+        return sum(1 for part in self.parts if not isinstance(part, str))
+
+    def render(self, context: dict[str, Any]) -> str:
+        out = []
+        # One Jinja context shared by every sub-template; the skeleton has no
+        # top-level assignments, so nothing leaks from one part into another
+        jinja_context = None
+        for part in self.parts:
+            if type(part) is str:
+                out.append(part)
+            elif type(part) is self.template.__class__:
+                if jinja_context is None:
+                    jinja_context = self.template.new_context(context)
+                out.extend(part.root_render_func(jinja_context))
+            else:
+                out.append(part(context))
+        return "".join(out)
+
+
+def _slot(env: jinja2.Environment, node: nodes.Expr, autoescape: bool) -> Optional[Slot]:
+    """
+    A resolver for `name`, `name.attr` and `name[constant]` chains, doing
+    exactly what Jinja's generated code does (environment.getattr/getitem,
+    undefined for a missing name, then escape); None for anything else.
+    """
+    steps: list[tuple[bool, Any]] = []
+    while isinstance(node, (nodes.Getattr, nodes.Getitem)):
+        if isinstance(node, nodes.Getattr):
+            steps.append((True, node.attr))
+        elif isinstance(node.arg, nodes.Const):
+            steps.append((False, node.arg.value))
+        else:
+            return None
+        node = node.node
+    if not isinstance(node, nodes.Name) or node.ctx != "load":
+        return None
+    name = node.name
+    steps.reverse()
+    undefined = env.undefined
+
+    if not steps:
+        def resolve_name(context: dict[str, Any]) -> str:
+            value = context[name] if name in context else undefined(name=name)
+            return str(escape(value)) if autoescape else str(value)
+
+        return resolve_name
+
+    def resolve(context: dict[str, Any]) -> str:
+        value = context[name] if name in context else undefined(name=name)
+        for is_attribute, key in steps:
+            value = env.getattr(value, key) if is_attribute else env.getitem(value, key)
+        return str(escape(value)) if autoescape else str(value)
+
+    return resolve
+
+
+def _flatten(body: list[nodes.Node]) -> Optional[list[nodes.Node]]:
+    """Top-level nodes with `{% block %}`s inlined; None if the template is not eligible."""
+    flat: list[nodes.Node] = []
+    for node in body:
+        if isinstance(node, nodes.Block):
+            # A block that calls super() or self.* needs the real block machinery
+            if any(call.node.name in ("super", "self") for call in node.find_all(nodes.Call)
+                   if isinstance(call.node, nodes.Name)):
+                return None
+            inner = _flatten(node.body)
+            if inner is None:
+                return None
+            flat.extend(inner)
+        elif isinstance(node, _UNSUPPORTED) or any(node.find_all(_UNSUPPORTED)):
+            return None
+        else:
+            flat.append(node)
+    return flat
+
+
+def build_skeleton(env: jinja2.Environment, template_name: str, template: jinja2.Template) -> Optional[Skeleton]:
+    """
+    Splits a template into constant text, slots and sub-templates; None when
+    it uses statements that cannot be evaluated piecewise (see _UNSUPPORTED).
+    The lines of constant text are also handed to the block model and the
+    DOCX builder, which keep their blocks and paragraph markup ready, as are
+    the headings marked in the source.
+    """
+    source, _, _ = env.loader.get_source(env, template_name)
+    remember_headings(_marked_headings(source))
+    body = _flatten(env.parse(source).body)
+    if body is None:
+        return None
+    autoescape = env.autoescape(template_name) if callable(env.autoescape) else env.autoescape
+
+    parts: list[Part] = []
+    pending: list[nodes.Node] = []
+
+    # Constant text inside control flow, e.g. the clauses of an {% if %}
+    nested_text: list[str] = []
+
+    def flush_pending() -> None:
+        # Consecutive complex nodes become one compiled sub-template
+        if pending:
+            for node in pending:
+                nested_text.extend(_nested_text(node))
+            tree = nodes.Template(list(pending), lineno=1)
+            tree.set_environment(env)
+            parts.append(env.from_string(tree))
+            pending.clear()
+
+    def add_text(text: str) -> None:
+        flush_pending()
+        if parts and isinstance(parts[-1], str):
+            parts[-1] += text
+        elif text:
+            parts.append(text)
+
+    for node in body:
+        if not isinstance(node, nodes.Output):
+            pending.append(node)
+            continue
+        for child in node.nodes:
+            if isinstance(child, nodes.TemplateData):
+                add_text(child.data)
+            elif isinstance(child, nodes.Const):
+                add_text(str(escape(child.value)) if autoescape else str(child.value))
+            else:
+                slot = _slot(env, child, autoescape)
+                if slot is None:
+                    pending.append(nodes.Output([child], lineno=child.lineno))
+                else:
+                    flush_pending()
+                    parts.append(slot)
+    flush_pending()
+
+    constant_lines, line_starts = _constant_lines(parts, nested_text)
+    remember_constant_blocks(constant_lines, line_starts)
+    remember_constant_lines(constant_lines)
+    return Skeleton(template, tuple(parts))
+
+
+def _constant_lines(parts: list[Part], nested_text: list[str]) -> tuple[list[str], list[str]]:
+    """
+    Lines that lie entirely inside constant text, i.e. appear verbatim in
+    every rendered document, and the constant text that starts the lines
+    running into a dynamic part. `nested_text` is the constant text found
+    inside the sub-templates.
+    """
+    lines, starts = [], []
+    last = len(parts) - 1
+    for index, part in enumerate(parts):
+        if not isinstance(part, str):
+            continue
+        pieces = part.split("\n")
+        # The first piece continues a dynamic part's line, the last one runs into the next
+        start = 0 if index == 0 else 1
+        end = len(pieces) if index == last else len(pieces) - 1
+        lines.extend(piece for piece in pieces[start:end] if "\x0c" not in piece)
+        if index != last and (index == 0 or len(pieces) > 1):
+            starts.append(pieces[-1])
+    for text in nested_text:
+        pieces = text.split("\n")
+        if len(pieces) > 1:
+            lines.extend(piece for piece in pieces[1:-1] if "\x0c" not in piece)
+            starts.append(pieces[-1])
+    return lines, [start.rpartition("\x0c")[2] for start in starts]
+
+
+
+
+def _nested_text(node: nodes.Node) -> Iterator[str]:
+    """The runs of constant text inside a control-flow node."""
+    for output in node.find_all(nodes.Output):
+        text = None
+        for child in output.nodes:
+            if isinstance(child, nodes.TemplateData):
+                text = child.data if text is None else text + child.data
+            elif text is not None:
+                yield text
+                text = None
+        if text is not None:
+            yield text
+
+
+def _marked_headings(source: str) -> list[tuple[str, Union[str, Pattern[str]]]]:
+    """
+    The lines marked as headings in a template's source, as taken by
+    remember_headings: the text of a constant line, or for a line with
+    template logic a pattern of its constant start and end.
+    """
+    headings: list[tuple[str, Union[str, Pattern[str]]]] = []
+    for line in source.splitlines():
+        mark = _HEADING_MARK.search(line)
+        if mark is None:
+            continue
+        kind = HEADING if mark.group(1) == "heading" else SUBHEADING
+        text = _BLOCK_TAG.sub("", line[:mark.start()])
+        tags = list(_TAG.finditer(text))
+        if not tags:
+            headings.append((kind, text.strip()))
+        else:
+            head, tail = text[:tags[0].start()].lstrip(), text[tags[-1].end():].rstrip()
+            headings.append((kind, re.compile(re.escape(head) + ".*?" + re.escape(tail))))
+    return headings
@@ -0,0 +1,89 @@
+import asyncio
+import contextvars
+import logging
+import threading
+from concurrent.futures import Executor
+from typing import AsyncIterator, Iterator, Optional, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+T = TypeVar("T")
+
+_END = object()
+# Running producer tasks, referenced so they are not garbage collected mid-run
+_producers: set[asyncio.Task] = set()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def iterate_in_thread(
+    iterator: Iterator[T],
+    max_buffered: int = 4,
+    executor: Optional[Executor] = None,
+) -> AsyncIterator[T]:
+    """
+    Async view of a blocking iterator (an incremental DOCX writer, a Jinja
+    render) that runs the whole iteration in one threadpool thread, instead
+    of one threadpool round trip per item as StreamingResponse does for a
+    sync iterator. Items are handed to the event loop as they are produced;
+    at most `max_buffered` wait there, so a slow client pauses the producer.
+
+    If the consumer stops early (client disconnect), the producer stops at
+    its next item and the iterator is closed in its own thread.
+
+    The thread comes from `executor` if given (the document executor's
+    pool), otherwise from Starlette's shared threadpool.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    slots = threading.Semaphore(max_buffered)
+    stopped = threading.Event()
+
+    def hand_over(item: object) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # The event loop is gone; nobody is listening any more
+            stopped.set()
+
+    def produce() -> None:
+        try:
+            for item in iterator:
+                slots.acquire()
+                if stopped.is_set():
+                    return
+                hand_over(item)
+            hand_over(_END)
+        except BaseException as e:
+            hand_over(_Failure(e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    logging.warning(f"Closing a streamed iterator failed: {e}")
+
+    # produce() never raises; the task is not awaited so an early exit does not wait for it
+    if executor is None:
+        producer = asyncio.ensure_future(run_in_threadpool(produce))
+    else:
+        producer = asyncio.ensure_future(loop.run_in_executor(executor, contextvars.copy_context().run, produce))
+    _producers.add(producer)
+    producer.add_done_callback(_producers.discard)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            slots.release()
+            yield item
+    finally:
+        stopped.set()
+        # Wake a producer waiting for a free slot so it can notice
+        slots.release()
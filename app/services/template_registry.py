@@ -0,0 +1,95 @@
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+import jinja2
+
+from app.services.skeleton import Skeleton, build_skeleton
+
+
+class TemplateRegistry:
+    """
+    Compiles every template in the templates directory once, at startup, and
+    serves them from a plain dict afterwards. With `auto_reload` off Jinja
+    never stats the source files again; with it on (dev mode) lookups go
+    through the environment so edited templates are picked up.
+
+    Compiled bytecode can optionally be kept on disk, so a fresh worker loads
+    it instead of re-parsing every template.
+    """
+
+    def __init__(self, directory: str, auto_reload: bool = False, bytecode_cache_dir: Optional[str] = None):
+        self.directory = directory
+        self.auto_reload = auto_reload
+        bytecode_cache = None
+        if bytecode_cache_dir:
+            Path(bytecode_cache_dir).mkdir(parents=True, exist_ok=True)
+            bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_cache_dir)
+        # autoescape matches the Jinja2Templates environment the routes used before
+        self.env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(directory),
+            autoescape=True,
+            auto_reload=auto_reload,
+            bytecode_cache=bytecode_cache,
+        )
+        self._compiled: dict[str, jinja2.Template] = {}
+        # Per template: the compiled template the skeleton was built from, and the skeleton
+        self._skeletons: dict[str, tuple[jinja2.Template, Optional[Skeleton]]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load_all(self) -> None:
+        """
+        Compiles every template up front. Raises RuntimeError listing every
+        template that fails to compile, so a broken template stops startup
+        instead of failing the first request that uses it.
+        """
+        with self._lock:
+            if self._loaded:
+                return
+            compiled: dict[str, jinja2.Template] = {}
+            failures = []
+            for name in self.env.list_templates(extensions=["html"]):
+                try:
+                    compiled[name] = self.env.get_template(name)
+                except jinja2.TemplateError as e:
+                    failures.append(f"{name}: {e}")
+            if failures:
+                raise RuntimeError("Template compilation failed:\n" + "\n".join(failures))
+            self._compiled.update(compiled)
+            self._loaded = True
+        for name in compiled:
+            # Split into skeletons now too, so forked workers inherit them
+            self.skeleton(name)
+        logging.info(f"Compiled {len(compiled)} templates (auto_reload={self.auto_reload}).")
+
+    def names(self) -> list[str]:
+        return sorted(self._compiled)
+
+    def get(self, name: str) -> jinja2.Template:
+        if self.auto_reload:
+            return self.env.get_template(name)
+        template = self._compiled.get(name)
+        if template is None:
+            # Not preloaded (e.g. called outside the app lifespan): compile and keep it
+            template = self.env.get_template(name)
+            self._compiled[name] = template
+        return template
+
+    def skeleton(self, name: str) -> Optional[Skeleton]:
+        """
+        The pre-split skeleton of a template (see skeleton.build_skeleton),
+        built on first use and again whenever the template was recompiled;
+        None for templates that have to be rendered by Jinja as a whole.
+        """
+        template = self.get(name)
+        cached = self._skeletons.get(name)
+        if cached is None or cached[0] is not template:
+            cached = (template, build_skeleton(self.env, name, template))
+            self._skeletons[name] = cached
+        return cached[1]
@@ -1,8 +1,11 @@
 import json
 import io
 from typing import IO, Any  # Imported IO for file types and Any for the style fix
-from docx import Document
-from docx.shared import Pt
+
+from app.core.config import settings
+from app.services.blocks import PAGE, iter_blocks
+from app.services.docx_builder import STYLE_NAMES, block_style, build_docx
+from app.services.metrics import metrics
 
 # Added type hint: file is an IO object (like a file definition)
 def json_to_str(file: IO[Any]) -> str:
@@ -15,6 +18,10 @@ def generate_docx_stream(agreement_text: str) -> io.BytesIO:
     Generates a DOCX file in memory from the provided text string.
     Returns a BytesIO object (file stream) that can be sent directly to the frontend.
     """
+    # Imported on first use to keep python-docx off the preview path
+    from docx import Document
+    from docx.shared import Pt
+
     doc = Document()
     
     # Optional: Set a default style or font if needed
@@ -25,33 +32,34 @@ def generate_docx_stream(agreement_text: str) -> io.BytesIO:
     font.name = 'Calibri'
     font.size = Pt(11)
 
-    # Split the text by the form-feed character (\x0c) to handle explicit page breaks
-    # or just split by newlines if your LLM doesn't output \x0c
-    # The logic below handles both continuous text and explicit page breaks.
-    
-    pages = agreement_text.split('\x0c')
-    
-    for i, page_content in enumerate(pages):
-        # Add paragraphs for each line to maintain basic formatting
-        lines = page_content.split('\n')
-        for line in lines:
-            # Remove excessive whitespace but keep structure
-            clean_line = line.strip() 
-            if clean_line:
-                doc.add_paragraph(clean_line)
-            elif not clean_line:
-                # Add empty paragraph for spacing
-                doc.add_paragraph("")
-        
-        # Add a page break after each section, except the last one
-        if i < len(pages) - 1:
-            doc.add_page_break()
+    # The text arrives as blocks (see iter_blocks): one per line, with a PAGE
+    # block wherever the text has a form feed (\x0c) for an explicit page break
+    with metrics.stage("docx_compose"):
+        for block in iter_blocks(agreement_text, settings.document_structure):
+            if block.kind is PAGE:
+                doc.add_page_break()
+            else:
+                # Blank lines become empty paragraphs for spacing
+                style_id = block_style(block)
+                doc.add_paragraph(block.text, STYLE_NAMES[style_id] if style_id else None)
 
     # Save the document to an in-memory buffer
     buffer = io.BytesIO()
-    doc.save(buffer)
+    with metrics.stage("docx_save"):
+        doc.save(buffer)
     
     # Reset the buffer position to the beginning so it can be read
     buffer.seek(0)
     
-    return buffer
\ No newline at end of file
+    return buffer
+
+def build_docx_bytes(agreement_text: str) -> bytes:
+    """
+    Returns the finished DOCX bytes for the rendered text using the configured engine:
+    "template" splices paragraphs into a base document prepared once at startup,
+    "python-docx" goes through generate_docx_stream. Both produce the same body.
+    Module-level so it can be shipped to a process-pool worker.
+    """
+    if settings.docx_engine == "python-docx":
+        return generate_docx_stream(agreement_text).getvalue()
+    return build_docx(agreement_text)
\ No newline at end of file
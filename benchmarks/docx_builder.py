@@ -0,0 +1,61 @@
+"""
+Micro-benchmark: python-docx `generate_docx_stream` vs the template-based builder.
+
+Run from the repository root:
+    python -m benchmarks.docx_builder [--lines 200 400 2000] [--repeat 30]
+"""
+import argparse
+import statistics
+import time
+
+from app.services.docx_builder import docx_builder
+from app.services.utils import generate_docx_stream
+
+
+def sample_text(lines: int) -> str:
+    clause = "{n}. The Parties agree that this clause number {n} binds their heirs, executors and assigns."
+    body = []
+    for n in range(1, lines + 1):
+        body.append(clause.format(n=n))
+        if n % 10 == 0:
+            body.append("")
+        if n % 200 == 0:
+            body.append("\x0c")
+    return "\n".join(body)
+
+
+def time_it(fn, text: str, repeat: int) -> list[float]:
+    fn(text)  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[50, 400, 2000])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    docx_builder.prepare()
+    engines = {
+        "python-docx": lambda text: generate_docx_stream(text).getvalue(),
+        "template": docx_builder.build,
+    }
+    print(f"{'lines':>6} {'engine':<12} {'p50 ms':>9} {'mean ms':>9} {'speedup':>8}")
+    for lines in args.lines:
+        text = sample_text(lines)
+        baseline = None
+        for name, fn in engines.items():
+            samples = time_it(fn, text, args.repeat)
+            p50 = statistics.median(samples) * 1000
+            mean = statistics.fmean(samples) * 1000
+            baseline = baseline or p50
+            print(f"{lines:>6} {name:<12} {p50:>9.2f} {mean:>9.2f} {baseline / p50:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
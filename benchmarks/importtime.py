@@ -0,0 +1,122 @@
+"""
+Import-time report for the app, built from `python -X importtime`.
+
+Imports `main` in fresh interpreters and reports the total import time, the
+most expensive packages (self time summed per top-level package) and the
+slowest individual modules. Fails when a module that should only load on
+first use (python-docx, fpdf2, fontTools by default) is imported eagerly.
+
+Run from the repository root:
+    python -m benchmarks.importtime [--runs 5] [--top 15] [--output importtime.json]
+    python -m benchmarks.importtime --compare-to importtime.json --threshold 25
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+LAZY_PACKAGES = ("docx", "fpdf", "fontTools")
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """One `-X importtime` run: {module: (self us, cumulative us)}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def measure(module: str, runs: int) -> dict:
+    samples = [import_times(module) for _ in range(runs)]
+    modules = set().union(*samples)
+    # Median over runs smooths out disk cache and scheduler noise
+    self_us = {name: statistics.median(run.get(name, (0, 0))[0] for run in samples) for name in modules}
+    cumulative_us = {name: statistics.median(run.get(name, (0, 0))[1] for run in samples) for name in modules}
+
+    packages: dict[str, float] = defaultdict(float)
+    for name, value in self_us.items():
+        packages[name.split(".")[0]] += value
+
+    return {
+        "module": module,
+        "runs": runs,
+        "total_ms": round(cumulative_us.get(module, 0) / 1000, 2),
+        "modules_imported": len(modules),
+        "packages_ms": {name: round(value / 1000, 2) for name, value in sorted(packages.items(), key=lambda item: -item[1])},
+        "modules_ms": {name: round(cumulative_us[name] / 1000, 2) for name in sorted(modules, key=lambda name: -cumulative_us[name])},
+    }
+
+
+def eager_lazy_packages(report: dict, lazy_packages: tuple[str, ...]) -> list[str]:
+    return [name for name in lazy_packages if name in report["packages_ms"]]
+
+
+def print_report(report: dict, top: int) -> None:
+    print(f"import {report['module']}: {report['total_ms']:.1f} ms, {report['modules_imported']} modules "
+          f"(median of {report['runs']} runs)\n")
+    print(f"{'package (self time)':<40} {'ms':>9}")
+    for name, value in list(report["packages_ms"].items())[:top]:
+        print(f"{name:<40} {value:>9.2f}")
+    print(f"\n{'module (cumulative)':<40} {'ms':>9}")
+    for name, value in list(report["modules_ms"].items())[:top]:
+        print(f"{name:<40} {value:>9.2f}")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Total and per-package import times that grew by more than `threshold` percent (ignoring packages under 10 ms)."""
+    regressions = []
+    pairs = [("total", baseline["total_ms"], current["total_ms"])]
+    pairs += [
+        (name, baseline["packages_ms"].get(name, 0.0), value)
+        for name, value in current["packages_ms"].items()
+        if value >= 10.0
+    ]
+    for name, old, new in pairs:
+        if old and (new - old) / old * 100 > threshold:
+            regressions.append(f"{name}: {old:.1f} -> {new:.1f} ms ({(new - old) / old * 100:+.1f}%)")
+        elif not old and name != "total":
+            regressions.append(f"{name}: newly imported, {new:.1f} ms")
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--lazy", nargs="*", default=list(LAZY_PACKAGES), help="packages that must not be imported eagerly")
+    parser.add_argument("--output", help="write the report to this JSON file")
+    parser.add_argument("--compare-to", help="baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=25.0, help="allowed growth in percent")
+    args = parser.parse_args(argv)
+
+    report = measure(args.module, args.runs)
+    print_report(report, args.top)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    failures = [f"{name} is imported eagerly" for name in eager_lazy_packages(report, tuple(args.lazy))]
+    if args.compare_to:
+        failures += compare(json.loads(Path(args.compare_to).read_text()), report, args.threshold)
+    if failures:
+        print("\nFAILED:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
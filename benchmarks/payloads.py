@@ -0,0 +1,193 @@
+"""
+Realistic request payloads for every document schema, in three sizes.
+
+Payloads are generated from the pydantic models themselves, so a new schema
+or field is covered without touching this module. Values are picked from the
+field name (names, addresses, amounts, dates, free text) and are seeded, so
+every run benchmarks exactly the same documents.
+"""
+import datetime
+import random
+import types
+import typing
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Type
+
+from pydantic import BaseModel
+
+from app.services.documents import DOCUMENT_TYPES
+
+
+@dataclass(frozen=True)
+class PayloadSize:
+    # Items in every list field (assets, partners, statement paragraphs, ...)
+    list_items: int
+    # Sentences in every free-text field
+    sentences: int
+    # Whether optional fields are filled in or left out
+    fill_optional: bool
+
+
+SIZES: dict[str, PayloadSize] = {
+    "small": PayloadSize(list_items=1, sentences=1, fill_optional=False),
+    "medium": PayloadSize(list_items=5, sentences=3, fill_optional=True),
+    "large": PayloadSize(list_items=40, sentences=12, fill_optional=True),
+}
+
+_FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Sneha", "Vikram", "Ananya", "Rohan", "Kavya", "Arjun", "Meera"]
+_LAST_NAMES = ["Sharma", "Verma", "Iyer", "Reddy", "Khan", "Das", "Patel", "Nair", "Gupta", "Bose"]
+_CITIES = ["Mumbai", "Bengaluru", "Kolkata", "Chennai", "Hyderabad", "Pune", "New Delhi", "Jaipur"]
+_STREETS = ["MG Road", "Park Street", "Anna Salai", "Linking Road", "Banjara Hills Road", "FC Road"]
+_COMPANIES = ["Sunrise Technologies Pvt. Ltd.", "Ganga Traders LLP", "Blue Lotus Foods", "Apex Infra Projects"]
+_SENTENCES = [
+    "The party shall perform its obligations diligently and in good faith.",
+    "All information exchanged under this arrangement remains strictly confidential.",
+    "Any amendment must be made in writing and signed by both parties.",
+    "Payments are due within fifteen days of receipt of a valid invoice.",
+    "Neither party may assign its rights without the prior written consent of the other.",
+    "The deponent states that the contents above are true to the best of their knowledge & belief.",
+]
+
+# Substrings of field names, checked in order; the first match picks the value kind
+_FIELD_KINDS = (
+    ("in_words", "words"),
+    ("date", "date"),
+    ("dob", "date"),
+    ("address", "address"),
+    ("north", "address"),
+    ("south", "address"),
+    ("east", "address"),
+    ("west", "address"),
+    ("age", "age"),
+    ("percentage", "percent"),
+    ("days", "count"),
+    ("months", "count"),
+    ("years", "count"),
+    ("due_day", "count"),
+    ("amount", "money"),
+    ("fee", "money"),
+    ("value", "money"),
+    ("balance", "money"),
+    ("income", "money"),
+    ("consideration", "money"),
+    ("contribution", "money"),
+    ("account_number", "account"),
+    ("registration_number", "account"),
+    ("company", "company"),
+    ("employer", "company"),
+    ("organization", "company"),
+    ("firm", "company"),
+    ("bank", "company"),
+    ("name", "person"),
+    ("witness", "person"),
+    ("father", "person"),
+    ("mother", "person"),
+    ("signatory", "person"),
+    ("relationship", "relationship"),
+    ("gender", "gender"),
+    ("place", "city"),
+    ("city", "city"),
+    ("mode", "mode"),
+    ("type", "type"),
+    ("designation", "designation"),
+    ("occupation", "designation"),
+)
+
+
+class _Faker:
+    def __init__(self, size: PayloadSize, seed: int):
+        self.size = size
+        self.rng = random.Random(seed)
+
+    def _kind(self, field_name: str) -> str:
+        lowered = field_name.lower()
+        for needle, kind in _FIELD_KINDS:
+            if needle in lowered:
+                return kind
+        return "text"
+
+    def _string(self, field_name: str) -> str:
+        rng = self.rng
+        kind = self._kind(field_name)
+        if kind == "words":
+            return "One Lakh Twenty Five Thousand"
+        if kind == "date":
+            return (datetime.date(2025, 1, 1) + datetime.timedelta(days=rng.randrange(365))).isoformat()
+        if kind == "address":
+            return f"{rng.randrange(1, 400)}, {rng.choice(_STREETS)}, {rng.choice(_CITIES)} - {rng.randrange(110001, 799999)}"
+        if kind == "age":
+            return str(rng.randrange(21, 80))
+        if kind == "percent":
+            return str(rng.choice([10, 20, 25, 40, 50]))
+        if kind == "count":
+            return str(rng.choice([3, 6, 12, 30, 60]))
+        if kind == "money":
+            return str(rng.randrange(10, 5000) * 1000)
+        if kind == "account":
+            return "".join(rng.choice("0123456789") for _ in range(12))
+        if kind == "company":
+            return rng.choice(_COMPANIES)
+        if kind == "person":
+            return f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+        if kind == "relationship":
+            return rng.choice(["Son", "Daughter", "Spouse", "Brother", "Friend"])
+        if kind == "gender":
+            return rng.choice(["Male", "Female"])
+        if kind == "city":
+            return rng.choice(_CITIES)
+        if kind == "mode":
+            return rng.choice(["NEFT", "Cheque", "RTGS"])
+        if kind == "type":
+            return rng.choice(["Home Loan", "Mutual Fund", "Equity", "Fixed Deposit"])
+        if kind == "designation":
+            return rng.choice(["Senior Engineer", "Accountant", "Consultant", "Manager"])
+        return " ".join(rng.choice(_SENTENCES) for _ in range(self.size.sentences))
+
+    def value(self, annotation: Any, field_name: str) -> Any:
+        origin = typing.get_origin(annotation)
+        args = typing.get_args(annotation)
+        if origin is typing.Annotated:
+            return self.value(args[0], field_name)
+        if origin in (typing.Union, types.UnionType):
+            options = [arg for arg in args if arg is not type(None)]
+            return self.value(self.rng.choice(options), field_name)
+        if origin is typing.Literal:
+            return args[0]
+        if origin is list:
+            return [self.value(args[0], field_name) for _ in range(self.size.list_items)]
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return self.model(annotation)
+        if annotation is str:
+            return self._string(field_name)
+        if annotation is int:
+            return int(self._string("days"))
+        if annotation is bool:
+            return self.rng.random() < 0.5
+        if annotation is Decimal:
+            return self._string("amount") + ".00"
+        if annotation is datetime.date:
+            return self._string("date")
+        raise TypeError(f"No benchmark value for {field_name}: {annotation!r}")
+
+    def model(self, schema: Type[BaseModel]) -> dict[str, Any]:
+        payload = {}
+        for name, field in schema.model_fields.items():
+            if not field.is_required() and not self.size.fill_optional:
+                continue
+            payload[name] = self.value(field.annotation, name)
+        return payload
+
+
+def build_payload(schema: Type[BaseModel], size: str, seed: int = 0) -> dict[str, Any]:
+    """Returns a JSON-ready request body for `schema` in the given size."""
+    return _Faker(SIZES[size], seed).model(schema)
+
+
+def all_payloads(sizes: typing.Iterable[str] = SIZES, seed: int = 0) -> dict[tuple[str, str], dict[str, Any]]:
+    """Payloads for every registered document type, keyed on (document type, size)."""
+    return {
+        (name, size): build_payload(doc.schema, size, seed)
+        for name, doc in DOCUMENT_TYPES.items()
+        for size in sizes
+    }
@@ -0,0 +1,437 @@
+"""
+Benchmark suite: every document type, small/medium/large payloads, preview and download.
+
+Two modes:
+  inprocess  calls the services directly (validation, template render, DOCX/PDF
+             build) and also records the tracemalloc peak of one request
+  http       starts the app under a local uvicorn and times real requests
+             against the preview and download routes
+
+Run from the repository root:
+    python -m benchmarks.suite run --mode inprocess --output results.json
+    python -m benchmarks.suite run --mode http --concurrency 4 --output http.json
+    python -m benchmarks.suite compare baseline.json results.json --threshold 10
+    python -m benchmarks.suite sizes --levels 1 6 9 --output sizes.json
+
+`compare` (or `run --compare-to baseline.json`) exits with status 1 when any
+case is slower than the baseline by more than the threshold percentage.
+Output sizes can be compared the same way with `--metrics output_bytes`.
+
+`sizes` builds every document in the full and the compact DOCX package at
+each compression level and reports the bytes saved and the build time.
+
+The render cache and document store are disabled in http mode unless
+--keep-caches is given, so every request does the full amount of work.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from benchmarks.payloads import SIZES, all_payloads
+
+ROOT = Path(__file__).resolve().parents[1]
+OPERATIONS = ("preview", "docx", "pdf")
+DEFAULT_METRICS = ("p50_ms", "p99_ms")
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile; fine for the sample counts used here."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarise(samples: list[float], wall_seconds: float) -> dict[str, Any]:
+    return {
+        "n": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "throughput_rps": round(len(samples) / wall_seconds, 2) if wall_seconds else 0.0,
+    }
+
+
+# --- in-process -------------------------------------------------------------
+
+def inprocess_operation(operation: str, document_type: str) -> Callable[[dict], Any]:
+    from app.services.documents import DOCUMENT_TYPES
+    from app.services.pdf_builder import build_pdf_bytes
+    from app.services.rendering import render_document
+    from app.services.utils import build_docx_bytes
+
+    doc = DOCUMENT_TYPES[document_type]
+    build = {"preview": None, "docx": build_docx_bytes, "pdf": build_pdf_bytes}[operation]
+
+    def run(payload: dict) -> Any:
+        data = doc.schema.model_validate(payload)
+        text = render_document(doc.template, data)
+        return text if build is None else build(text)
+
+    return run
+
+
+def bench_inprocess(cases, repeat: int, warmup: int, **_) -> list[dict[str, Any]]:
+    from app.services.docx_builder import docx_builder
+    from app.services.pdf_builder import pdf_builder
+    from app.services.rendering import template_registry
+
+    template_registry.load_all()
+    docx_builder.prepare()
+    pdf_builder.prepare()
+
+    results = []
+    for operation, document_type, size, payload in cases:
+        fn = inprocess_operation(operation, document_type)
+        for _ in range(warmup):
+            fn(payload)
+        samples = []
+        wall_start = time.perf_counter()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = fn(payload)
+            samples.append(time.perf_counter() - start)
+        wall = time.perf_counter() - wall_start
+
+        # Measured separately: tracing slows everything down
+        tracemalloc.start()
+        fn(payload)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append({
+            **case_key("inprocess", operation, document_type, size),
+            **summarise(samples, wall),
+            "peak_kib": round(peak / 1024, 1),
+            "output_bytes": len(output.encode("utf-8") if isinstance(output, str) else output),
+        })
+        report(results[-1])
+    return results
+
+
+# --- http -----------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_high_water_kib(pid: int) -> Optional[int]:
+    """Peak resident set size of the server process (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class Server:
+    """The app under a local uvicorn, in a subprocess so its memory can be read separately."""
+
+    def __init__(self, keep_caches: bool):
+        self.port = _free_port()
+        env = dict(os.environ)
+        if not keep_caches:
+            env.setdefault("DOCGEN_RENDER_CACHE_MAX_ENTRIES", "0")
+            env.setdefault("DOCGEN_DOCX_STORE_MAX_BYTES", "0")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT, env=env,
+        )
+
+    def wait_ready(self, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {self.process.returncode}")
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=1)
+                conn.request("GET", "/docs/stats")
+                if conn.getresponse().status == 200:
+                    conn.close()
+                    return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError("uvicorn did not become ready in time")
+
+    def stop(self) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def http_request(operation: str, document_type: str) -> tuple[str, str]:
+    if operation == "preview":
+        return "POST", f"/docs/{document_type}_generator"
+    return "POST", f"/docs/{document_type}_download?format={operation}"
+
+
+def bench_http(cases, repeat: int, warmup: int, concurrency: int, keep_caches: bool, **_) -> list[dict[str, Any]]:
+    server = Server(keep_caches)
+    local = threading.local()
+
+    def connection() -> http.client.HTTPConnection:
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=120)
+        return conn
+
+    def send(method: str, path: str, body: bytes) -> tuple[float, int]:
+        conn = connection()
+        start = time.perf_counter()
+        conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        size = len(response.read())
+        elapsed = time.perf_counter() - start
+        if response.status != 200:
+            raise RuntimeError(f"{method} {path} answered {response.status}")
+        return elapsed, size
+
+    results = []
+    try:
+        server.wait_ready()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for operation, document_type, size, payload in cases:
+                method, path = http_request(operation, document_type)
+                body = json.dumps(payload).encode("utf-8")
+                for _ in range(warmup):
+                    send(method, path, body)
+                wall_start = time.perf_counter()
+                timings = list(pool.map(lambda _: send(method, path, body), range(repeat)))
+                wall = time.perf_counter() - wall_start
+                results.append({
+                    **case_key("http", operation, document_type, size),
+                    **summarise([elapsed for elapsed, _ in timings], wall),
+                    "concurrency": concurrency,
+                    "server_rss_peak_kib": _rss_high_water_kib(server.process.pid),
+                    "output_bytes": timings[-1][1],
+                })
+                report(results[-1])
+    finally:
+        server.stop()
+    return results
+
+
+# --- DOCX package sizes ------------------------------------------------------------
+
+def bench_sizes(payloads: dict, levels: list[int], repeat: int) -> list[dict[str, Any]]:
+    from app.services.docx_builder import DocxTemplateBuilder
+    from app.services.documents import DOCUMENT_TYPES
+    from app.services.rendering import render_document, template_registry
+
+    template_registry.load_all()
+    variants = {"full": DocxTemplateBuilder()}
+    for level in levels:
+        variants[f"compact-{level}"] = DocxTemplateBuilder(compact=True, compression_level=level)
+    for builder in variants.values():
+        builder.prepare()
+
+    results = []
+    for (document_type, size), payload in payloads.items():
+        doc = DOCUMENT_TYPES[document_type]
+        text = render_document(doc.template, doc.schema.model_validate(payload))
+        result: dict[str, Any] = {"document_type": document_type, "size": size}
+        for name, builder in variants.items():
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                output = builder.build(text)
+                samples.append(time.perf_counter() - start)
+            result[name] = {"bytes": len(output), "p50_ms": round(statistics.median(samples) * 1000, 3)}
+        results.append(result)
+        full = result["full"]["bytes"]
+        print(f"{document_type + '/' + size:<28} full {full:>8} B  " + "  ".join(
+            f"{name} {value['bytes']:>7} B ({(value['bytes'] - full) / full * 100:+.1f}%, {value['p50_ms']:.2f} ms)"
+            for name, value in result.items() if name.startswith("compact")
+        ), flush=True)
+    return results
+
+
+def sizes(args: argparse.Namespace) -> int:
+    payloads = {
+        key: payload for key, payload in all_payloads(args.sizes, seed=args.seed).items()
+        if not args.documents or key[0] in args.documents
+    }
+    results = bench_sizes(payloads, args.levels, args.repeat)
+    variants = [name for name in results[0] if name not in ("document_type", "size")]
+    totals = {name: sum(result[name]["bytes"] for result in results) for name in variants}
+    print(f"\nTotal over {len(results)} documents (one download each):")
+    for name in variants:
+        saved = totals["full"] - totals[name]
+        print(f"  {name:<12} {totals[name] / 1024:>9.1f} KiB  saved {saved / 1024:>8.1f} KiB ({saved / totals['full'] * 100:.1f}%)")
+    if args.output:
+        output = {
+            "meta": {
+                "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "revision": git_revision(),
+                "repeat": args.repeat,
+            },
+            "totals_bytes": totals,
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(output, indent=2))
+        print(f"Results written to {args.output}")
+    return 0
+
+
+# --- results ----------------------------------------------------------------------
+
+def case_key(mode: str, operation: str, document_type: str, size: str) -> dict[str, str]:
+    return {"mode": mode, "operation": operation, "document_type": document_type, "size": size}
+
+
+def key_of(result: dict[str, Any]) -> str:
+    return "/".join(result[field] for field in ("mode", "operation", "document_type", "size"))
+
+
+def report(result: dict[str, Any]) -> None:
+    memory = result.get("peak_kib", result.get("server_rss_peak_kib"))
+    print(
+        f"{key_of(result):<40} p50 {result['p50_ms']:>9.2f} ms  p99 {result['p99_ms']:>9.2f} ms  "
+        f"{result['throughput_rps']:>8.1f} req/s  mem {memory if memory is not None else '-':>8} KiB",
+        flush=True,
+    )
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, current: dict, threshold: float, metrics: tuple[str, ...]) -> list[str]:
+    """Returns one line per case/metric that got slower than the baseline by more than `threshold` percent."""
+    previous = {key_of(result): result for result in baseline["results"]}
+    regressions = []
+    print(f"{'case':<40} {'metric':<8} {'baseline':>10} {'current':>10} {'change':>8}")
+    for result in current["results"]:
+        key = key_of(result)
+        before = previous.get(key)
+        if before is None:
+            continue
+        for metric in metrics:
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{key} {metric}: {old} -> {new} ({change:+.1f}%)")
+            print(f"{key:<40} {metric:<8} {old:>10.2f} {new:>10.2f} {change:>+7.1f}%{flag}")
+    return regressions
+
+
+def run(args: argparse.Namespace) -> int:
+    payloads = all_payloads(args.sizes, seed=args.seed)
+    cases = [
+        (operation, document_type, size, payload)
+        for (document_type, size), payload in payloads.items()
+        if not args.documents or document_type in args.documents
+        for operation in args.operations
+    ]
+    bench = bench_inprocess if args.mode == "inprocess" else bench_http
+    results = bench(
+        cases, repeat=args.repeat, warmup=args.warmup,
+        concurrency=args.concurrency, keep_caches=args.keep_caches,
+    )
+    output = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": args.mode,
+            "repeat": args.repeat,
+            "concurrency": args.concurrency if args.mode == "http" else 1,
+            "docx_engine": os.environ.get("DOCGEN_DOCX_ENGINE", "template"),
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(output, indent=2))
+        print(f"Results written to {args.output}")
+    if args.compare_to:
+        baseline = json.loads(Path(args.compare_to).read_text())
+        return finish_compare(baseline, output, args.threshold, tuple(args.metrics))
+    return 0
+
+
+def finish_compare(baseline: dict, current: dict, threshold: float, metrics: tuple[str, ...]) -> int:
+    regressions = compare(baseline, current, threshold, metrics)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {threshold}%:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions over {threshold}%.")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--mode", choices=("inprocess", "http"), default="inprocess")
+    run_parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=["preview", "docx"])
+    run_parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    run_parser.add_argument("--documents", nargs="+", help="document type slugs (default: all)")
+    run_parser.add_argument("--repeat", type=int, default=20)
+    run_parser.add_argument("--warmup", type=int, default=2)
+    run_parser.add_argument("--concurrency", type=int, default=1, help="parallel clients (http mode)")
+    run_parser.add_argument("--keep-caches", action="store_true", help="leave the render cache and document store on (http mode)")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", help="write the results to this JSON file")
+    run_parser.add_argument("--compare-to", help="baseline JSON to compare the new results against")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+
+    sizes_parser = commands.add_parser("sizes", help="compare full and compact DOCX package sizes")
+    sizes_parser.add_argument("--levels", nargs="+", type=int, default=[1, 6, 9], help="zlib levels for the compact package")
+    sizes_parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    sizes_parser.add_argument("--documents", nargs="+", help="document type slugs (default: all)")
+    sizes_parser.add_argument("--repeat", type=int, default=5)
+    sizes_parser.add_argument("--seed", type=int, default=0)
+    sizes_parser.add_argument("--output", help="write the results to this JSON file")
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in percent")
+        sub.add_argument("--metrics", nargs="+", default=list(DEFAULT_METRICS))
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        baseline = json.loads(Path(args.baseline).read_text())
+        current = json.loads(Path(args.current).read_text())
+        sys.exit(finish_compare(baseline, current, args.threshold, tuple(args.metrics)))
+    if args.command == "sizes":
+        sys.exit(sizes(args))
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
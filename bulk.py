@@ -0,0 +1,360 @@
+"""
+Offline bulk generation: one DOCX or PDF per row of a CSV or JSONL file.
+
+    python bulk.py rental renewals.csv --out renewals/
+    python bulk.py employment contracts.jsonl --out contracts.zip --format pdf -w 8
+
+Each row is validated against the document type's schema, rendered and
+built in a pool of worker processes, and written to the output directory
+(or ZIP) as <row>_<document file name>. Rows that fail go to an error
+report (errors.jsonl in the directory, <name>.errors.jsonl next to a ZIP)
+and the run carries on.
+
+JSONL rows are the same JSON bodies the API takes. CSV columns are field
+paths: nested fields use dots and list items their index, e.g.
+`landlord.name` or `executors.0.name`; a cell holding a JSON list or object
+is parsed as JSON, and an empty cell leaves the field out.
+
+Progress is checkpointed after every chunk, so running the same command
+again resumes after the last finished row (--restart starts over). Ctrl-C
+stops after the chunk being written. Input is read as a stream and only a
+few chunks are in flight at once, so memory does not grow with the file.
+A ZIP's central directory does grow with the number of files; for runs
+with millions of rows write to a directory. A ZIP is only complete, and
+resumable, after a clean stop.
+"""
+import argparse
+import csv
+import json
+import os
+import signal
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from pydantic import ValidationError
+
+from app.services.batch import describe_validation_error
+from app.services.documents import DOCUMENT_TYPES
+from app.services.rendering import render_document, template_registry
+
+# (row number, file contents, error): exactly one of the last two is set
+RowResult = tuple[int, Optional[bytes], Optional[str]]
+
+
+# --- input ------------------------------------------------------------------------
+
+def _cell_value(cell: str) -> Any:
+    if cell[:1] in ("[", "{"):
+        try:
+            return json.loads(cell)
+        except ValueError:
+            pass
+    return cell
+
+
+def _lists(node: Any) -> Any:
+    if isinstance(node, dict):
+        node = {key: _lists(value) for key, value in node.items()}
+        if node and all(key.isdigit() for key in node):
+            return [node[key] for key in sorted(node, key=int)]
+    return node
+
+
+def unflatten(record: dict[Optional[str], Any]) -> dict[str, Any]:
+    """Turns a CSV record with dotted column names into the nested payload."""
+    root: dict[str, Any] = {}
+    for column, cell in record.items():
+        if column is None:
+            raise ValueError("Row has more cells than the header has columns")
+        if cell is None or cell == "":
+            continue
+        keys = column.strip().split(".")
+        node = root
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+            if not isinstance(node, dict):
+                raise ValueError(f"Column '{column}' conflicts with column '{key}'")
+        node[keys[-1]] = _cell_value(cell)
+    return _lists(root)
+
+
+def iter_rows(path: Path, source_format: str, skip: int) -> Iterator[tuple[int, Any]]:
+    """
+    Yields (row number, raw row) after the first `skip` rows: the line for
+    JSONL (blank lines are skipped but keep their number), the record dict
+    for CSV (numbered from 1 after the header). Parsing is left to the workers.
+    """
+    with open(path, newline="" if source_format == "csv" else None, encoding="utf-8") as f:
+        if source_format == "csv":
+            for number, record in enumerate(csv.DictReader(f), 1):
+                if number > skip:
+                    yield number, record
+        else:
+            for number, line in enumerate(f, 1):
+                if number > skip and line.strip():
+                    yield number, line
+
+
+# --- workers -------------------------------------------------------------------------
+
+def _prepare(output_format: str) -> None:
+    template_registry.load_all()
+    if output_format == "pdf":
+        from app.services.pdf_builder import pdf_builder
+        pdf_builder.prepare()
+    else:
+        from app.services.docx_builder import docx_builder
+        docx_builder.prepare()
+
+
+def _init_worker(output_format: str) -> None:
+    # Ctrl-C reaches the whole process group; the parent decides when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Already done in the parent when the pool forks; needed when it spawns
+    _prepare(output_format)
+
+
+def _build(output_format: str):
+    if output_format == "pdf":
+        from app.services.pdf_builder import build_pdf_bytes
+        return build_pdf_bytes
+    from app.services.utils import build_docx_bytes
+    return build_docx_bytes
+
+
+def process_chunk(document_type: str, output_format: str, source_format: str, rows: list[tuple[int, Any]]) -> list[RowResult]:
+    doc = DOCUMENT_TYPES[document_type]
+    build = _build(output_format)
+    results: list[RowResult] = []
+    for number, raw in rows:
+        try:
+            payload = json.loads(raw) if source_format == "jsonl" else unflatten(raw)
+            data = doc.schema.model_validate(payload)
+            results.append((number, build(render_document(doc.template, data)), None))
+        except ValidationError as e:
+            results.append((number, None, describe_validation_error(e)))
+        except Exception as e:
+            results.append((number, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+# --- output ----------------------------------------------------------------------------
+
+class DirectorySink:
+    def __init__(self, path: Path, restart: bool):
+        self.path = path
+        path.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_path = path / ".progress.json"
+        self.errors_path = path / "errors.jsonl"
+
+    def write(self, name: str, payload: bytes) -> None:
+        (self.path / name).write_bytes(payload)
+
+    def close(self) -> None:
+        pass
+
+
+class ZipSink:
+    def __init__(self, path: Path, restart: bool):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_path = path.with_name(path.name + ".progress.json")
+        self.errors_path = path.with_name(path.stem + ".errors.jsonl")
+        resume = path.exists() and self.checkpoint_path.exists() and not restart
+        try:
+            # DOCX and PDF are already compressed
+            self.zip = zipfile.ZipFile(path, "a" if resume else "w", zipfile.ZIP_STORED)
+        except zipfile.BadZipFile:
+            raise SystemExit(f"{path} was not closed cleanly and cannot be resumed; run again with --restart.")
+
+    def write(self, name: str, payload: bytes) -> None:
+        self.zip.writestr(name, payload)
+
+    def close(self) -> None:
+        self.zip.close()
+
+
+class Checkpoint:
+    """Progress of a run, rewritten atomically after every chunk."""
+
+    def __init__(self, path: Path, identity: dict[str, Any]):
+        self.path = path
+        self.identity = identity
+        self.rows_done = self.ok = self.failed = self.bytes_written = self.errors_offset = 0
+
+    def load(self) -> bool:
+        if not self.path.exists():
+            return False
+        state = json.loads(self.path.read_text())
+        if {key: state.get(key) for key in self.identity} != self.identity:
+            raise SystemExit(
+                f"{self.path} belongs to a different run ({state.get('document_type')}, {state.get('input')}); "
+                "use --restart to start over."
+            )
+        for key in ("rows_done", "ok", "failed", "bytes_written", "errors_offset"):
+            setattr(self, key, state.get(key, 0))
+        return True
+
+    def save(self) -> None:
+        state = {
+            **self.identity,
+            "rows_done": self.rows_done,
+            "ok": self.ok,
+            "failed": self.failed,
+            "bytes_written": self.bytes_written,
+            "errors_offset": self.errors_offset,
+        }
+        partial = self.path.with_name(self.path.name + ".part")
+        partial.write_text(json.dumps(state, indent=2))
+        os.replace(partial, self.path)
+
+
+# --- driver ------------------------------------------------------------------------------
+
+def _chunks(rows: Iterator[tuple[int, Any]], size: int) -> Iterator[list[tuple[int, Any]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _StopFlag:
+    """SIGINT/SIGTERM only stop the run between chunks, so outputs and checkpoint stay consistent."""
+
+    def __init__(self) -> None:
+        self.stopped = False
+
+    def __call__(self, signum: int, frame) -> None:
+        if not self.stopped:
+            print("\nStopping after the current chunk...", file=sys.stderr)
+        self.stopped = True
+
+
+def run(args: argparse.Namespace) -> int:
+    doc = DOCUMENT_TYPES[args.document_type]
+    source = Path(args.input)
+    if not source.is_file():
+        raise SystemExit(f"{source}: no such file")
+    source_format = args.input_format or ("csv" if source.suffix.lower() == ".csv" else "jsonl")
+    out = Path(args.out)
+    sink = (ZipSink if out.suffix.lower() == ".zip" else DirectorySink)(out, args.restart)
+
+    identity = {
+        "document_type": doc.name,
+        "format": args.format,
+        "input": str(source.resolve()),
+        "input_bytes": source.stat().st_size,
+    }
+    checkpoint = Checkpoint(sink.checkpoint_path, identity)
+    if args.restart:
+        sink.errors_path.unlink(missing_ok=True)
+    elif checkpoint.load():
+        print(f"Resuming after row {checkpoint.rows_done} ({checkpoint.ok} written, {checkpoint.failed} failed).", file=sys.stderr)
+
+    # Drop error lines written after the last checkpoint
+    with open(sink.errors_path, "a+b") as errors:
+        errors.truncate(checkpoint.errors_offset)
+
+    _prepare(args.format)
+    stem = doc.filename.rsplit(".", 1)[0]
+    stop = _StopFlag()
+    previous_handlers = {sig: signal.signal(sig, stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+
+    started_at = last_report = time.monotonic()
+    rows_at_start, ok_at_start, failed_at_start = checkpoint.rows_done, checkpoint.ok, checkpoint.failed
+    bytes_at_start = checkpoint.bytes_written
+    chunks = _chunks(iter_rows(source, source_format, checkpoint.rows_done), args.chunk_size)
+    in_flight: deque[tuple[Future, int]] = deque()
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=(args.format,)) as pool, \
+                open(sink.errors_path, "ab") as errors:
+            while True:
+                while not stop.stopped and len(in_flight) < args.workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    future = pool.submit(process_chunk, doc.name, args.format, source_format, chunk)
+                    in_flight.append((future, chunk[-1][0]))
+                if not in_flight:
+                    break
+
+                # Results are written in input order, so the checkpoint is a single row number
+                future, last_row = in_flight.popleft()
+                for number, payload, error in future.result():
+                    if error is None:
+                        sink.write(f"{number:07d}_{stem}.{args.format}", payload)
+                        checkpoint.ok += 1
+                        checkpoint.bytes_written += len(payload)
+                    else:
+                        errors.write(json.dumps({"row": number, "error": error}, ensure_ascii=False).encode("utf-8") + b"\n")
+                        checkpoint.failed += 1
+                errors.flush()
+                checkpoint.rows_done = last_row
+                checkpoint.errors_offset = errors.tell()
+                checkpoint.save()
+
+                if stop.stopped:
+                    # Finish what is already running, then leave
+                    for pending, _ in in_flight:
+                        pending.cancel()
+                    in_flight.clear()
+                now = time.monotonic()
+                if now - last_report >= args.progress_seconds:
+                    last_report = now
+                    done = checkpoint.ok + checkpoint.failed - ok_at_start - failed_at_start
+                    print(
+                        f"row {checkpoint.rows_done}: {checkpoint.ok} written, {checkpoint.failed} failed, "
+                        f"{done / (now - started_at):.1f} rows/s",
+                        file=sys.stderr, flush=True,
+                    )
+    finally:
+        sink.close()
+        for sig, handler in previous_handlers.items():
+            signal.signal(sig, handler)
+
+    elapsed = time.monotonic() - started_at
+    ok = checkpoint.ok - ok_at_start
+    failed = checkpoint.failed - failed_at_start
+    written = checkpoint.bytes_written - bytes_at_start
+    print(f"\n{doc.title}, {args.format.upper()} -> {out}")
+    print(f"  rows this run   {ok + failed} ({ok} written, {failed} failed) in {elapsed:.1f} s")
+    print(f"  throughput      {(ok + failed) / elapsed if elapsed else 0:.1f} rows/s, "
+          f"{written / 1024 / 1024 / elapsed if elapsed else 0:.2f} MiB/s with {args.workers} workers")
+    print(f"  output          {written / 1024 / 1024:.1f} MiB, {written / ok / 1024 if ok else 0:.1f} KiB per file")
+    print(f"  total           {checkpoint.ok} written, {checkpoint.failed} failed up to row {checkpoint.rows_done}"
+          f" (run started at row {rows_at_start + 1})")
+    if checkpoint.failed:
+        print(f"  errors          {sink.errors_path}")
+    if stop.stopped:
+        print("Stopped early; run the same command again to resume.")
+        return 130
+    return 1 if failed else 0
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("document_type", choices=sorted(DOCUMENT_TYPES))
+    parser.add_argument("input", help="CSV or JSONL file with one payload per row")
+    parser.add_argument("--out", required=True, help="output directory, or a .zip file")
+    parser.add_argument("--format", choices=("docx", "pdf"), default="docx")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), help="default: from the file extension")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=32, help="rows sent to a worker at a time")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint and start over")
+    parser.add_argument("--progress-seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,16 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 from app.api import tools_routes
+from app.services.executor import document_executor
+from app.services.rendering import template_registry
+from app.services.metrics import metrics
+from app.services.cache import render_cache, docx_store
+from app.services.jobs import job_runner
+from app.services.singleflight import build_flights, render_flights
+from app.core.server import readiness, prepare_builders, prepare_builders_in_background
+from app.core.config import settings
 from contextlib import asynccontextmanager # <-- Import this
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -15,10 +23,25 @@ async def lifespan(app: FastAPI):
     This replaces the deprecated on_event("shutdown").
     """
     logging.info("DocGen Tools Service startup...")
+    # Compile every template now; a template that doesn't compile aborts startup
+    template_registry.load_all()
+    # The DOCX/PDF engines are not needed for previews; by default they are
+    # loaded in the background once the worker is ready
+    if settings.builders_warmup == "startup":
+        prepare_builders()
+    document_executor.start()
+    job_runner.start()
+    readiness.mark_ready()
+    if settings.builders_warmup == "background":
+        prepare_builders_in_background()
     
     yield # This is where the application will run
     
     # This code runs on shutdown
+    readiness.mark_draining()
+    # Running jobs get the same grace period as in-flight requests
+    await job_runner.shutdown(settings.server_graceful_timeout)
+    document_executor.shutdown(wait=True)
     logging.info("DocGen Tools Service shutdown.")
 # -----------------------------------------
 
@@ -55,6 +78,27 @@ def root():
         "docs": "/docs"
     }
 
+# Cache and executor counters are exported next to the request histograms
+metrics.add_collector(lambda: {
+    "render_cache": render_cache.stats(),
+    "docx_store": docx_store.stats(),
+    "executor": document_executor.stats(),
+    "jobs": {"active": job_runner.active},
+    "render_coalescing": render_flights.stats(),
+    "build_coalescing": build_flights.stats(),
+})
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    """Readiness probe: 200 once startup has finished, 503 before that and while draining."""
+    status = readiness.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Request, stage and output-size metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logging.error(f"Unhandled exception: {exc}", exc_info=True)
@@ -64,7 +108,8 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("main:app", host="127.0.0.1", port=8003, reload=True)
+    # Dev server by default; `python main.py --mode prod --workers 4` for production
+    from app.core.server import main
+    main(app)
 
 
@@ -0,0 +1,41 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from main import app
+
+NDA = {
+    "execution_date": "2025-01-15",
+    "place_of_execution": "Pune",
+    "disclosing_party_name": "Asha Rao",
+    "disclosing_party_address": "12 FC Road, Pune",
+    "receiving_party_name": "Vikram Shah",
+    "receiving_party_address": "4 MG Road, Bengaluru",
+    "purpose_of_disclosure": "Evaluating a joint venture",
+    "confidentiality_duration_years": "3",
+    "jurisdiction_city": "Pune",
+}
+
+
+def test_batch_items_are_held_to_their_document_limits():
+    oversized = dict(NDA, purpose_of_disclosure="x" * (settings.payload_max_string_chars + 1))
+    items = [{"document_type": "nda", "payload": NDA}, {"document_type": "nda", "payload": oversized}]
+    with TestClient(app) as client:
+        response = client.post("/docs/batch", json={"items": items})
+        assert response.status_code == 413
+        detail = response.json()["detail"]
+        assert detail["limit"] == "max_string_chars"
+        assert detail["loc"] == ["body", "items", 1, "payload", "purpose_of_disclosure"]
+
+        assert client.post("/docs/nda_download", json=oversized).status_code == 413
+        assert client.post("/docs/batch", json={"items": items[:1]}).status_code == 200
+
+
+def test_batch_body_size_is_capped():
+    item = {"document_type": "nda", "payload": NDA}
+    count = settings.batch_max_body_bytes // len(json.dumps(item, separators=(",", ":"))) + 1
+    with TestClient(app) as client:
+        response = client.post("/docs/batch", json={"items": [item] * count})
+        assert response.status_code == 413
+        assert response.json()["detail"]["limit"] == "max_body_bytes"
@@ -0,0 +1,87 @@
+from app.services.blocks import CLAUSE, HEADING, PARAGRAPH, SUBHEADING, TITLE, iter_blocks
+from app.services.documents import DOCUMENT_TYPES
+from app.services.rendering import render_document, template_registry
+
+AFFIDAVIT = {
+    "place_of_execution": "PUNE",
+    "deponent_name": "ROHAN PATEL",
+    "deponent_father_name": "SURESH PATEL",
+    "deponent_age": "41",
+    "deponent_address": "12 FC Road, Pune",
+    "statement_paragraphs": ["THAT I AM THE OWNER:", "1.5 ACRES OF LAND ARE MINE"],
+    "verification_date": "2025-01-15",
+}
+
+CEASE_DESIST = {
+    "date_of_notice": "2025-01-15",
+    "sender_name": "ASHA RAO",
+    "sender_address": "12 FC ROAD, PUNE",
+    "recipient_name": "ACME TRADING CO.",
+    "recipient_address": "4 MG ROAD, BENGALURU",
+    "infringing_activity": "copying our catalogue",
+    "legal_rights_violated": "copyright",
+    "demand_action": "REMOVE ALL COPIES:",
+    "deadline_days": "7",
+}
+
+WILL = {
+    "testator_name": "ROHAN PATEL",
+    "testator_father_name": "SURESH PATEL",
+    "testator_age": "70",
+    "testator_address": "12 FC Road, Pune",
+    "executors": [{"name": "ASHA PATEL", "relationship": "Daughter", "address": "Pune"}],
+    "beneficiaries": [{"name": "ASHA PATEL", "relationship": "Daughter", "address": "Pune"}],
+    "bequests": [{"asset_description": "house", "beneficiary_name": "ASHA PATEL"}],
+    "residuary_beneficiary_name": "ASHA PATEL",
+    "guardian": {"name": "VIKRAM SHAH", "relationship": "Uncle", "address": "Mumbai"},
+    "execution_date": "2025-01-15",
+    "place_of_execution": "Pune",
+}
+
+
+def _kinds(document_type: str, payload: dict) -> dict[str, str]:
+    template_registry.load_all()
+    doc = DOCUMENT_TYPES[document_type]
+    text = render_document(doc.template, doc.schema.model_validate(payload))
+    return {block.text: block.kind for block in iter_blocks(text) if block.text}
+
+
+def test_capitalised_field_values_are_not_headings():
+    kinds = _kinds("affidavit", AFFIDAVIT)
+    assert kinds["(ROHAN PATEL)"] == PARAGRAPH
+    assert kinds["1. THAT I AM THE OWNER:"] == PARAGRAPH
+    assert kinds["BEFORE THE NOTARY PUBLIC AT PUNE"] == PARAGRAPH
+    assert kinds["VERIFICATION"] == HEADING
+
+    kinds = _kinds("ceasedesist", CEASE_DESIST)
+    for value in ("ASHA RAO", "ACME TRADING CO.", "4 MG ROAD, BENGALURU", "REMOVE ALL COPIES:"):
+        assert kinds[value] == PARAGRAPH
+    assert kinds["DEMAND"] == HEADING
+
+
+def test_signature_labels_are_not_headings():
+    assert _kinds("affidavit", AFFIDAVIT)["DEPONENT"] == PARAGRAPH
+    kinds = _kinds("will", WILL)
+    assert kinds["TESTATOR"] == PARAGRAPH
+    assert kinds["WITNESS 1:"] == PARAGRAPH
+
+
+def test_template_headings_and_clauses():
+    kinds = _kinds("will", WILL)
+    assert kinds["LAST WILL AND TESTAMENT OF ROHAN PATEL"] == TITLE
+    assert kinds["1. DECLARATION"] == HEADING
+    assert kinds["6. APPOINTMENT OF GUARDIAN"] == HEADING
+    # Numbered by the template according to the optional guardian section
+    assert kinds["7. POWERS OF EXECUTOR"] == HEADING
+    assert kinds["4.1. I give, devise, and bequeath my house to ASHA PATEL."] == CLAUSE
+    assert _kinds("nda", {
+        "execution_date": "2025-01-15",
+        "place_of_execution": "Pune",
+        "disclosing_party_name": "A",
+        "disclosing_party_address": "B",
+        "receiving_party_name": "C",
+        "receiving_party_address": "D",
+        "purpose_of_disclosure": "E",
+        "confidentiality_duration_years": "3",
+        "jurisdiction_city": "Pune",
+    })["BETWEEN:"] == SUBHEADING
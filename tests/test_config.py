@@ -0,0 +1,8 @@
+from app.core.config import Settings
+
+
+def test_process_executor_prepares_builders_at_startup():
+    for warmup in ("startup", "background", "lazy"):
+        settings = Settings(docx_executor_kind="process", builders_warmup=warmup)
+        assert settings.builders_warmup == "startup"
+    assert Settings(docx_executor_kind="thread", builders_warmup="lazy").builders_warmup == "lazy"
@@ -0,0 +1,49 @@
+import io
+import zipfile
+
+import pytest
+
+from app.core.config import settings
+from app.services.docx_builder import DocxTemplateBuilder, paragraph_xml
+from app.services.utils import generate_docx_stream
+
+TEXT = (
+    "NON-DISCLOSURE AGREEMENT\n"
+    "\n"
+    "1. DEFINITIONS\n"
+    "1.1. \"Information\" means data & know-how <marked> confidential.\n"
+    "\tIndented with a tab\n"
+    "  Leading and trailing spaces  \n"
+    "Line with a carriage\rreturn\n"
+    "\x0c"
+    "After the page break: ₹ 5,00,000 (Rupees Five Lakh)\n"
+)
+
+
+def _parts(package: bytes) -> dict[str, bytes]:
+    with zipfile.ZipFile(io.BytesIO(package)) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+@pytest.mark.parametrize("structured", [True, False])
+def test_template_builder_matches_python_docx(structured, monkeypatch):
+    monkeypatch.setattr(settings, "document_structure", structured)
+    built = _parts(DocxTemplateBuilder(structured=structured).build(TEXT))
+    composed = _parts(generate_docx_stream(TEXT).getvalue())
+    assert built.keys() == composed.keys()
+    for name in built:
+        assert built[name] == composed[name], name
+
+
+def test_streamed_build_has_the_same_parts():
+    builder = DocxTemplateBuilder()
+    text = TEXT * 50
+    assert _parts(b"".join(builder.iter_build(text, chunk_size=1024))) == _parts(builder.build(text))
+
+
+def test_paragraph_xml():
+    assert paragraph_xml("") == "<w:p/>"
+    assert paragraph_xml("a < b & c") == "<w:p><w:r><w:t>a &lt; b &amp; c</w:t></w:r></w:p>"
+    assert paragraph_xml(" x") == '<w:p><w:r><w:t xml:space="preserve"> x</w:t></w:r></w:p>'
+    with pytest.raises(ValueError):
+        paragraph_xml("bell\x07")
@@ -0,0 +1,65 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.services.cache import ByteStore, docx_store, text_digest
+from main import app
+
+NDA = {
+    "execution_date": "2025-01-15",
+    "place_of_execution": "Pune",
+    "disclosing_party_name": "Asha Rao",
+    "disclosing_party_address": "12 FC Road, Pune",
+    "receiving_party_name": "Vikram Shah",
+    "receiving_party_address": "4 MG Road, Bengaluru",
+    "purpose_of_disclosure": "Evaluating a joint venture",
+    "confidentiality_duration_years": "3",
+    "jurisdiction_city": "Pune",
+}
+
+
+def test_etag_revalidation_skips_the_build():
+    payload = dict(NDA, purpose_of_disclosure="ETag revalidation")
+    with TestClient(app) as client:
+        text = client.post("/docs/nda_generator", json=payload).json()["data"]
+        response = client.post("/docs/nda_download", json=payload)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert etag == f'"{text_digest(text)}"'
+
+        docx_store.clear()
+        revalidated = client.post("/docs/nda_download", json=payload, headers={"If-None-Match": f"W/{etag}"})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["ETag"] == etag
+        assert revalidated.content == b""
+        assert text_digest(text) not in docx_store
+
+        pdf = client.post("/docs/nda_download?format=pdf", json=payload, headers={"If-None-Match": etag})
+        assert pdf.status_code == 200
+        assert pdf.headers["ETag"] == f'"{text_digest(text)}-pdf"'
+
+
+def test_download_after_preview_is_served_from_the_store(monkeypatch):
+    monkeypatch.setattr(settings, "docx_prebuild_on_preview", True)
+    payload = dict(NDA, purpose_of_disclosure="Prebuilt on preview")
+    with TestClient(app) as client:
+        text = client.post("/docs/nda_generator", json=payload).json()["data"]
+        stored = docx_store.get(text_digest(text))
+        assert stored is not None
+        hits = docx_store.hits
+        response = client.post("/docs/nda_download", json=payload)
+        assert response.content == stored
+        assert docx_store.hits == hits + 1
+
+
+def test_byte_store_evicts_by_size():
+    store = ByteStore(max_bytes=10, ttl_seconds=60)
+    store.set("a", b"aaaa")
+    store.set("b", b"bbbb")
+    store.get("a")
+    store.set("c", b"cccc")
+    assert "b" not in store
+    assert store.get("a") == b"aaaa" and store.get("c") == b"cccc"
+    assert store.total_bytes == 8
+    # Larger than the whole budget: never stored
+    store.set("d", b"d" * 11)
+    assert "d" not in store and store.total_bytes == 8
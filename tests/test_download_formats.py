@@ -0,0 +1,30 @@
+from fastapi.testclient import TestClient
+
+from main import app
+
+NDA = {
+    "execution_date": "2025-01-15",
+    "place_of_execution": "Pune",
+    "disclosing_party_name": "Asha Rao",
+    "disclosing_party_address": "12 FC Road, Pune",
+    "receiving_party_name": "Vikram Shah",
+    "receiving_party_address": "4 MG Road, Bengaluru",
+    "purpose_of_disclosure": "Evaluating a joint venture",
+    "confidentiality_duration_years": "3",
+    "jurisdiction_city": "Pune",
+}
+
+
+def test_text_only_download_is_plain_text():
+    with TestClient(app) as client:
+        preview = client.post("/docs/nda_generator", json=NDA).json()["data"]
+        response = client.post("/docs/nda_download?format=txt", json=NDA)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "text/plain; charset=utf-8"
+        assert response.headers["content-disposition"] == "attachment; filename=NDA.txt"
+        assert response.text == preview
+
+        revalidated = client.post(
+            "/docs/nda_download?format=txt", json=NDA, headers={"If-None-Match": response.headers["etag"]}
+        )
+        assert revalidated.status_code == 304
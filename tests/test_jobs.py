@@ -0,0 +1,75 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.services.jobs import DONE, FAILED, JobStore, job_store
+from main import app
+
+NDA = {
+    "execution_date": "2025-01-15",
+    "place_of_execution": "Pune",
+    "disclosing_party_name": "Asha Rao",
+    "disclosing_party_address": "12 FC Road, Pune",
+    "receiving_party_name": "Vikram Shah",
+    "receiving_party_address": "4 MG Road, Bengaluru",
+    "purpose_of_disclosure": "Evaluating a joint venture",
+    "confidentiality_duration_years": "3",
+    "jurisdiction_city": "Pune",
+}
+
+
+def _wait_for(client: TestClient, status_url: str) -> dict:
+    deadline = time.monotonic() + 10
+    while True:
+        status = client.get(status_url).json()
+        if status["status"] not in ("queued", "running") or time.monotonic() > deadline:
+            return status
+        time.sleep(0.05)
+
+
+def test_job_is_submitted_polled_and_fetched():
+    with TestClient(app) as client:
+        submitted = client.post("/docs/nda_jobs?format=pdf", json=NDA)
+        assert submitted.status_code == 202
+        status_url = submitted.headers["Location"]
+        assert submitted.json()["status"] in ("queued", "running")
+
+        status = _wait_for(client, status_url)
+        assert status["status"] == DONE
+        result = client.get(status["result_url"])
+        assert result.status_code == 200
+        assert result.headers["content-type"] == "application/pdf"
+        assert result.content.startswith(b"%PDF")
+        assert len(result.content) == status["size"]
+
+        assert client.get("/docs/jobs/unknown").status_code == 404
+
+
+def test_unfinished_and_failed_jobs_have_no_result():
+    with TestClient(app) as client:
+        queued = job_store.create("nda", "docx", "NDA.docx")
+        response = client.get(f"/docs/jobs/{queued.job_id}/result")
+        assert response.status_code == 409
+        assert response.json()["detail"] == "Job is queued, the file is not ready yet."
+
+        failed = job_store.create("nda", "docx", "NDA.docx")
+        job_store.mark_failed(failed.job_id, "Error generating NDA file: boom")
+        assert client.get(f"/docs/jobs/{failed.job_id}").json()["status"] == FAILED
+        response = client.get(f"/docs/jobs/{failed.job_id}/result")
+        assert response.status_code == 409
+        assert response.json()["detail"] == "Error generating NDA file: boom"
+
+
+def test_expired_jobs_are_removed(tmp_path):
+    store = JobStore(str(tmp_path), ttl_seconds=0.1)
+    job = store.create("nda", "docx", "NDA.docx")
+    store.save_result(job.job_id, b"document")
+    assert store.get(job.job_id).status == DONE
+    assert store.artifact_path(job.job_id).read_bytes() == b"document"
+
+    time.sleep(0.2)
+    assert store.get(job.job_id) is None
+    assert store.cleanup() == 1
+    assert not store.artifact_path(job.job_id).exists()
+    assert store.cleanup() == 0
+    store.close()
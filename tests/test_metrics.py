@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.services.metrics import metrics
+from main import app
+
+NDA = {
+    "execution_date": "2025-01-15",
+    "place_of_execution": "Pune",
+    "disclosing_party_name": "Asha Rao",
+    "disclosing_party_address": "12 FC Road, Pune",
+    "receiving_party_name": "Vikram Shah",
+    "receiving_party_address": "4 MG Road, Bengaluru",
+    "purpose_of_disclosure": "Evaluating a joint venture",
+    "confidentiality_duration_years": "3",
+    "jurisdiction_city": "Pune",
+}
+
+
+def _count(histogram, labels):
+    series = histogram._series.get(labels)
+    return series[2] if series else 0
+
+
+def test_streamed_download_records_its_build_stage(monkeypatch):
+    monkeypatch.setattr(settings, "docx_stream_threshold_chars", 0)
+    payload = dict(NDA, purpose_of_disclosure="Streamed metrics")
+    builds = _count(metrics.stage_duration, ("nda", "download", "build"))
+    requests = _count(metrics.request_duration, ("nda", "download", "200"))
+    with TestClient(app) as client:
+        response = client.post("/docs/nda_download", json=payload)
+        assert response.status_code == 200
+        assert "build" not in response.headers["Server-Timing"]
+    assert _count(metrics.stage_duration, ("nda", "download", "build")) == builds + 1
+    assert _count(metrics.request_duration, ("nda", "download", "200")) == requests + 1
+
+
+def test_preview_size_is_recorded():
+    sizes = _count(metrics.output_size, ("nda", "text"))
+    with TestClient(app) as client:
+        text = client.post("/docs/nda_generator", json=NDA).json()["data"]
+    assert _count(metrics.output_size, ("nda", "text")) == sizes + 1
+    # Without a request there is nothing to record the size against
+    metrics.record_text_size("text", text)
+    assert _count(metrics.output_size, ("nda", "text")) == sizes + 1
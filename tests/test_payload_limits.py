@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.services.limits import PayloadLimits, PayloadTooLarge, check_payload, limits_for, read_body
+from main import app
+
+NDA = {
+    "execution_date": "2025-01-15",
+    "place_of_execution": "Pune",
+    "disclosing_party_name": "Asha Rao",
+    "disclosing_party_address": "12 FC Road, Pune",
+    "receiving_party_name": "Vikram Shah",
+    "receiving_party_address": "4 MG Road, Bengaluru",
+    "purpose_of_disclosure": "Evaluating a joint venture",
+    "confidentiality_duration_years": "3",
+    "jurisdiction_city": "Pune",
+}
+
+AFFIDAVIT = {
+    "place_of_execution": "Pune",
+    "deponent_name": "Rohan Patel",
+    "deponent_father_name": "Suresh Patel",
+    "deponent_age": "41",
+    "deponent_address": "12 FC Road, Pune",
+    "statement_paragraphs": ["That I am the owner."],
+    "verification_date": "2025-01-15",
+}
+
+ROUTES = ("/docs/nda_generator", "/docs/nda_generator/stream", "/docs/nda_generator/sections",
+          "/docs/nda_download", "/docs/nda_jobs")
+
+
+@pytest.mark.parametrize("path", ROUTES)
+def test_every_document_route_rejects_a_long_string(path):
+    oversized = dict(NDA, purpose_of_disclosure="x" * (settings.payload_max_string_chars + 1))
+    with TestClient(app) as client:
+        response = client.post(path, json=oversized)
+        assert response.status_code == 413
+        assert response.json()["detail"] == {
+            "error": "payload_too_large",
+            "limit": "max_string_chars",
+            "max": settings.payload_max_string_chars,
+            "actual": settings.payload_max_string_chars + 1,
+            "loc": ["body", "purpose_of_disclosure"],
+        }
+
+
+def test_long_list_is_rejected_before_validation():
+    # The extra item would also fail validation; the limit is checked first
+    items = ["That I am the owner."] * settings.payload_max_list_items + [42]
+    with TestClient(app) as client:
+        response = client.post("/docs/affidavit_generator", json=dict(AFFIDAVIT, statement_paragraphs=items))
+        assert response.status_code == 413
+        detail = response.json()["detail"]
+        assert (detail["limit"], detail["loc"]) == ("max_list_items", ["body", "statement_paragraphs"])
+        assert client.post("/docs/affidavit_generator", json=dict(AFFIDAVIT, statement_paragraphs=items[:-1])).status_code == 200
+
+
+def test_large_body_is_rejected_without_reading_it():
+    body = json.dumps(dict(NDA, purpose_of_disclosure="x" * settings.payload_max_body_bytes)).encode("utf-8")
+    with TestClient(app) as client:
+        declared = client.post("/docs/nda_download", content=body, headers={"content-type": "application/json"})
+        assert declared.status_code == 413
+        assert declared.json()["detail"]["limit"] == "max_body_bytes"
+        chunked = client.post("/docs/nda_download", content=iter([body[:1024], body[1024:]]),
+                              headers={"content-type": "application/json"})
+        assert chunked.status_code == 413
+        assert chunked.json()["detail"]["actual"] == len(body)
+
+
+def test_nested_values_are_located():
+    limits = PayloadLimits(max_body_bytes=1024, max_list_items=2, max_string_chars=5)
+    check_payload({"executors": [{"name": "Asha"}]}, limits)
+    with pytest.raises(PayloadTooLarge) as too_long:
+        check_payload({"executors": [{"name": "Asha"}, {"name": "Vikram"}]}, limits)
+    assert too_long.value.detail["loc"] == ["body", "executors", 1, "name"]
+    with pytest.raises(PayloadTooLarge) as too_many:
+        check_payload({"executors": [{}, {}, {}]}, limits)
+    assert too_many.value.detail["loc"] == ["body", "executors"]
+
+
+def test_per_document_overrides(monkeypatch):
+    monkeypatch.setattr(settings, "payload_limits", {"will": {"max_list_items": 500}})
+    assert limits_for("will").max_list_items == 500
+    assert limits_for("nda").max_list_items == settings.payload_max_list_items
+
+
+def test_read_body_stops_at_the_limit():
+    read = []
+
+    async def chunks():
+        for chunk in (b"a" * 10, b"b" * 10, b"c" * 10):
+            read.append(chunk)
+            yield chunk
+
+    with pytest.raises(PayloadTooLarge):
+        asyncio.run(read_body(chunks(), 15))
+    assert len(read) == 2
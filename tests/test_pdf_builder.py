@@ -0,0 +1,58 @@
+import io
+import re
+import sys
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from app.services.pdf_builder import build_pdf_bytes
+from main import app
+
+NDA = {
+    "execution_date": "2025-01-15",
+    "place_of_execution": "Kolkata",
+    "disclosing_party_name": "রহিম আহমেদ",
+    "disclosing_party_address": "12 Park Street, Kolkata",
+    "receiving_party_name": "山田 太郎",
+    "receiving_party_address": "4 MG Road, Bengaluru",
+    "purpose_of_disclosure": "Evaluating a joint venture",
+    "confidentiality_duration_years": "3",
+    "jurisdiction_city": "Kolkata",
+}
+
+
+def test_characters_missing_from_the_font_are_replaced():
+    pdf = build_pdf_bytes("রহিম আহমেদ\n中文\nvertical\x0btab\nplain text")
+    assert pdf.startswith(b"%PDF")
+
+
+def test_pdf_download_with_non_latin_party_name():
+    with TestClient(app) as client:
+        response = client.post("/docs/nda_download?format=pdf", json=NDA)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+
+        response = client.post("/docs/nda_download?format=docx&format=pdf", json=NDA)
+        assert response.status_code == 200
+        names = zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+        assert names == ["NDA.docx", "NDA.pdf"]
+
+
+def _stable(pdf: bytes) -> bytes:
+    # Timestamp and file identifier differ between runs
+    return re.sub(rb"/CreationDate \(.*?\)|/ID \[.*?\]", b"", pdf)
+
+
+def test_concurrent_builds_do_not_share_font_state():
+    # Documents of different lengths number their PDF objects differently
+    texts = [f"AGREEMENT {i}\n\n" + "1. The parties agree to the terms below.\n" * (20 + 40 * i) for i in range(24)]
+    expected = [_stable(build_pdf_bytes(text)) for text in texts]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(build_pdf_bytes, texts))
+    finally:
+        sys.setswitchinterval(interval)
+    assert [_stable(pdf) for pdf in results] == expected
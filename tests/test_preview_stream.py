@@ -0,0 +1,62 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.services.cache import render_cache
+from main import app
+
+NDA = {
+    "execution_date": "2025-01-15",
+    "place_of_execution": "Pune",
+    "disclosing_party_name": "Asha Rao",
+    "disclosing_party_address": "12 FC Road, Pune",
+    "receiving_party_name": "Vikram Shah",
+    "receiving_party_address": "4 MG Road, Bengaluru",
+    "purpose_of_disclosure": "Evaluating a joint venture",
+    "confidentiality_duration_years": "3",
+    "jurisdiction_city": "Pune",
+}
+
+
+def _ndjson(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_streamed_chunks_join_to_the_preview(monkeypatch):
+    monkeypatch.setattr(settings, "preview_stream_chunk_chars", 200)
+    payload = dict(NDA, purpose_of_disclosure="Streamed preview")
+    with TestClient(app) as client:
+        streamed = client.post("/docs/nda_generator/stream", json=payload)
+        assert streamed.headers["content-type"].startswith("application/x-ndjson")
+        events = _ndjson(streamed)
+        assert events[-1] == {"done": True}
+        chunks = [event["data"] for event in events[:-1]]
+        assert len(chunks) > 1 and all(len(chunk) >= 200 for chunk in chunks[:-1])
+
+        # The streamed render was stored, and a cached render is replayed in chunks
+        hits = render_cache.hits
+        preview = client.post("/docs/nda_generator", json=payload).json()["data"]
+        assert render_cache.hits == hits + 1
+        assert "".join(chunks) == preview
+        replayed = _ndjson(client.post("/docs/nda_generator/stream", json=payload))
+        assert render_cache.hits == hits + 2
+        assert "".join(event.get("data", "") for event in replayed) == preview
+
+
+def test_server_sent_events():
+    with TestClient(app) as client:
+        response = client.post("/docs/nda_generator/stream?format=sse", json=NDA)
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = response.text.split("\n\n")
+        assert events[0].startswith("data: ")
+        assert events[-2] == 'event: done\ndata: {"done": true}'
+
+
+def test_long_render_is_not_kept(monkeypatch):
+    monkeypatch.setattr(settings, "preview_stream_cache_max_chars", 100)
+    payload = dict(NDA, purpose_of_disclosure="Too long to keep")
+    with TestClient(app) as client:
+        entries = render_cache.stats()["entries"]
+        client.post("/docs/nda_generator/stream", json=payload)
+        assert render_cache.stats()["entries"] == entries
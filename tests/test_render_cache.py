@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+
+from app.schemas.schema import NDASubmit
+from app.services.cache import TTLCache, payload_digest, render_cache
+from main import app
+
+NDA = {
+    "execution_date": "2025-01-15",
+    "place_of_execution": "Pune",
+    "disclosing_party_name": "Asha Rao",
+    "disclosing_party_address": "12 FC Road, Pune",
+    "receiving_party_name": "Vikram Shah",
+    "receiving_party_address": "4 MG Road, Bengaluru",
+    "purpose_of_disclosure": "Evaluating a joint venture",
+    "confidentiality_duration_years": "3",
+    "jurisdiction_city": "Pune",
+}
+
+
+def test_repeated_preview_is_a_cache_hit():
+    payload = dict(NDA, purpose_of_disclosure="Render cache hit")
+    with TestClient(app) as client:
+        misses, hits = render_cache.misses, render_cache.hits
+        first = client.post("/docs/nda_generator", json=payload).json()
+        assert (render_cache.misses, render_cache.hits) == (misses + 1, hits)
+        # Same content in a different field order
+        second = client.post("/docs/nda_generator", json=dict(reversed(payload.items()))).json()
+        assert (render_cache.misses, render_cache.hits) == (misses + 1, hits + 1)
+        assert first == second
+        client.post("/docs/nda_generator", json=dict(payload, jurisdiction_city="Mumbai"))
+        assert render_cache.misses == misses + 2
+
+
+def test_payload_digest_ignores_field_order():
+    assert payload_digest(NDASubmit(**NDA)) == payload_digest(NDASubmit(**dict(reversed(NDA.items()))))
+    assert payload_digest(NDASubmit(**NDA)) != payload_digest(NDASubmit(**dict(NDA, place_of_execution="Goa")))
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache: TTLCache[str] = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entry_is_a_miss():
+    cache: TTLCache[str] = TTLCache(max_entries=2, ttl_seconds=0)
+    cache.set("a", "A")
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
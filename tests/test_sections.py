@@ -0,0 +1,68 @@
+from fastapi.testclient import TestClient
+
+from app.services.sections import WHOLE_DOCUMENT
+from main import app
+
+WILL = {
+    "testator_name": "Rohan Patel",
+    "testator_father_name": "Suresh Patel",
+    "testator_age": "70",
+    "testator_address": "12 FC Road, Pune",
+    "executors": [{"name": "Asha Patel", "relationship": "Daughter", "address": "Pune"}],
+    "beneficiaries": [{"name": "Asha Patel", "relationship": "Daughter", "address": "Pune"}],
+    "bequests": [{"asset_description": "house", "beneficiary_name": "Asha Patel"}],
+    "residuary_beneficiary_name": "Asha Patel",
+    "guardian": {"name": "Vikram Shah", "relationship": "Uncle", "address": "Mumbai"},
+    "execution_date": "2025-01-15",
+    "place_of_execution": "Pune",
+}
+
+
+def _changed(response: dict) -> list[str]:
+    return [section["name"] for section in response["sections"] if section["changed"]]
+
+
+def test_unchanged_sections_are_not_sent_again():
+    with TestClient(app) as client:
+        first = client.post("/docs/will_generator/sections", json=WILL).json()
+        assert all(section["changed"] for section in first["sections"])
+        preview = client.post("/docs/will_generator", json=WILL).json()["data"]
+        assert "".join(section["text"] for section in first["sections"]) == preview
+
+        token = first["token"]
+        again = client.post(f"/docs/will_generator/sections?token={token}", json=WILL).json()
+        assert again["token"] == token
+        assert _changed(again) == []
+        assert all("text" not in section for section in again["sections"])
+
+        edited = dict(WILL, bequests=[{"asset_description": "car", "beneficiary_name": "Asha Patel"}])
+        response = client.post(f"/docs/will_generator/sections?token={token}", json=edited).json()
+        assert _changed(response) == ["bequests"]
+        bequests = next(section for section in response["sections"] if section["name"] == "bequests")
+        assert "car" in bequests["text"]
+
+
+def test_optional_section_renumbers_the_ones_after_it():
+    with TestClient(app) as client:
+        token = client.post("/docs/will_generator/sections", json=WILL).json()["token"]
+        response = client.post(f"/docs/will_generator/sections?token={token}", json=dict(WILL, guardian=None)).json()
+        assert _changed(response) == ["guardian", "executor_powers", "surety"]
+
+
+def test_template_without_blocks_is_one_section():
+    nda = {
+        "execution_date": "2025-01-15",
+        "place_of_execution": "Pune",
+        "disclosing_party_name": "Asha Rao",
+        "disclosing_party_address": "12 FC Road, Pune",
+        "receiving_party_name": "Vikram Shah",
+        "receiving_party_address": "4 MG Road, Bengaluru",
+        "purpose_of_disclosure": "Evaluating a joint venture",
+        "confidentiality_duration_years": "3",
+        "jurisdiction_city": "Pune",
+    }
+    with TestClient(app) as client:
+        first = client.post("/docs/nda_generator/sections", json=nda).json()
+        assert [section["name"] for section in first["sections"]] == [WHOLE_DOCUMENT]
+        again = client.post(f"/docs/nda_generator/sections?token={first['token']}", json=nda).json()
+        assert _changed(again) == []
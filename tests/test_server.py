@@ -0,0 +1,39 @@
+import signal
+import time
+
+import pytest
+import uvicorn
+
+from app.core.config import settings
+from app.core.server import _drain_on_exit, readiness
+
+
+@pytest.fixture
+def server():
+    readiness.mark_ready()
+    server = uvicorn.Server(uvicorn.Config(lambda scope, receive, send: None))
+    _drain_on_exit(server)
+    yield server
+    readiness.mark_ready()
+
+
+def test_sigterm_marks_draining_before_the_server_stops(server):
+    server.handle_exit(signal.SIGTERM, None)
+    assert readiness.draining and not readiness.ready
+    assert server.should_exit
+
+
+def test_drain_delay_keeps_accepting(server, monkeypatch):
+    monkeypatch.setattr(settings, "server_drain_delay", 0.2)
+    server.handle_exit(signal.SIGTERM, None)
+    assert readiness.status()["draining"]
+    assert not server.should_exit
+    time.sleep(0.4)
+    assert server.should_exit
+
+
+def test_second_signal_stops_at_once(server, monkeypatch):
+    monkeypatch.setattr(settings, "server_drain_delay", 60)
+    server.handle_exit(signal.SIGTERM, None)
+    server.handle_exit(signal.SIGINT, None)
+    assert server.should_exit
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from app.api import tools_routes
+from app.services.cache import docx_store, text_digest
+from app.services.executor import document_executor
+from app.services.singleflight import SingleFlight, build_flights
+
+
+def test_concurrent_calls_share_one_run():
+    async def main():
+        flights: SingleFlight[int] = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 42
+
+        results = await asyncio.gather(*(flights.run("key", work) for _ in range(5)))
+        assert results == [42] * 5
+        assert len(calls) == 1
+        assert flights.stats() == {"in_flight": 0, "leaders": 1, "collapsed": 4}
+        # Nothing is kept once the call has finished
+        assert await flights.run("key", work) == 42
+        assert len(calls) == 2
+
+    asyncio.run(main())
+
+
+def test_failure_reaches_every_caller():
+    async def main():
+        flights: SingleFlight[int] = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flights.run("key", work) for _ in range(3)), return_exceptions=True)
+        assert [type(result) for result in results] == [ValueError] * 3
+        assert not flights.in_flight("key")
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def main():
+        flights: SingleFlight[int] = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return 42
+
+        leader = asyncio.ensure_future(flights.run("key", work))
+        follower = asyncio.ensure_future(flights.run("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == 42
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(main())
+
+
+def test_identical_downloads_build_once():
+    async def main():
+        document_executor.start()
+        text = "1. Coalesced downloads build the document once.\n"
+        docx_store.clear()
+        leaders, completed = build_flights.leaders, document_executor.completed
+        responses = await asyncio.gather(*(tools_routes.document_response(text, "NDA.docx") for _ in range(4)))
+        assert len({response.body for response in responses}) == 1
+        assert build_flights.leaders == leaders + 1
+        assert document_executor.completed == completed + 1
+        assert docx_store.get(text_digest(text)) == responses[0].body
+
+    asyncio.run(main())
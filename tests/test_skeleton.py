@@ -0,0 +1,58 @@
+import io
+import re
+import zipfile
+
+import pytest
+
+from app.services.documents import DOCUMENT_TYPES
+from app.services.docx_builder import docx_builder
+from app.services.rendering import render_context, render_document, template_registry
+from app.services.utils import generate_docx_stream
+from benchmarks.payloads import SIZES, build_payload
+
+DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def templates():
+    template_registry.load_all()
+
+
+def _document_xml(package: bytes) -> bytes:
+    with zipfile.ZipFile(io.BytesIO(package)) as archive:
+        return archive.read("word/document.xml")
+
+
+def _assert_same_render(doc, payload):
+    data = doc.schema.model_validate(payload)
+    context = render_context(data)
+    skeleton = template_registry.skeleton(doc.template)
+    assert skeleton is not None
+    assert skeleton.render(context) == template_registry.get(doc.template).render(context)
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("name", DOCUMENT_TYPES)
+def test_skeleton_matches_jinja(name, size):
+    doc = DOCUMENT_TYPES[name]
+    for seed in range(3):
+        _assert_same_render(doc, build_payload(doc.schema, size, seed))
+
+
+@pytest.mark.parametrize("name", DOCUMENT_TYPES)
+def test_skeleton_escapes_like_jinja(name):
+    doc = DOCUMENT_TYPES[name]
+    payload = build_payload(doc.schema, "medium")
+    for field, value in payload.items():
+        if isinstance(value, str) and not DATE.fullmatch(value):
+            payload[field] = f'<b>{value}</b> & "{{{{ raw }}}}"'
+    _assert_same_render(doc, payload)
+
+
+
+@pytest.mark.parametrize("name", DOCUMENT_TYPES)
+def test_reused_paragraph_xml_matches_python_docx(name):
+    # The template's constant lines were handed to the DOCX builder when its skeleton was built
+    doc = DOCUMENT_TYPES[name]
+    text = render_document(doc.template, doc.schema.model_validate(build_payload(doc.schema, "medium")))
+    assert _document_xml(docx_builder.build(text)) == _document_xml(generate_docx_stream(text).getvalue())
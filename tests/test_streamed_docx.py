@@ -0,0 +1,97 @@
+import asyncio
+import io
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import tools_routes
+from app.core.config import settings
+from app.services.cache import docx_store, text_digest
+from app.services.docx_builder import docx_builder
+from app.services.executor import document_executor
+
+TEXT = "1. The receiving party keeps the information confidential.\n" * 100
+
+
+@pytest.fixture(autouse=True)
+def stream_small_documents(monkeypatch):
+    monkeypatch.setattr(settings, "docx_stream_threshold_chars", len(TEXT) // 2)
+    document_executor.start()
+
+
+def _parts(package):
+    archive = zipfile.ZipFile(io.BytesIO(package))
+    return {name: archive.read(name) for name in archive.namelist()}
+
+
+async def _body(response):
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def test_streamed_build_is_shared_and_stored():
+    async def main():
+        text = TEXT + "shared"
+        streamed = await tools_routes.document_response(text, "NDA.docx")
+        assert document_executor.in_flight == 1
+        joined = await tools_routes.document_response(text, "NDA.docx")
+        body = await _body(streamed)
+        assert joined.body == body
+        assert zipfile.ZipFile(io.BytesIO(body)).testzip() is None
+        assert document_executor.in_flight == 0
+        assert docx_store.get(text_digest(text)) == body
+
+    asyncio.run(main())
+
+
+def test_streamed_build_counts_against_the_queue_limit(monkeypatch):
+    async def main():
+        full = document_executor.max_workers + document_executor.max_queue
+        monkeypatch.setattr(document_executor, "in_flight", full)
+        with pytest.raises(HTTPException) as busy:
+            await tools_routes.document_response(TEXT + "busy", "NDA.docx")
+        assert busy.value.status_code == 503
+        assert "Retry-After" in busy.value.headers
+
+    asyncio.run(main())
+
+
+def test_streamed_build_waits_for_a_slow_client(monkeypatch):
+    # Stored, so the writer yields a chunk every 512 bytes
+    monkeypatch.setattr(settings, "docx_stream_chunk_bytes", 512)
+    monkeypatch.setattr(docx_builder, "compression_level", 0)
+    produced = []
+    iter_build = docx_builder.iter_build
+
+    def counting_iter_build(*args):
+        for chunk in iter_build(*args):
+            produced.append(len(chunk))
+            yield chunk
+
+    monkeypatch.setattr(docx_builder, "iter_build", counting_iter_build)
+
+    async def main():
+        text = "".join(f"{n}. Clause {n * 7919} of the agreement.\n" for n in range(10000))
+        response = await tools_routes.document_response(text, "NDA.docx")
+        await asyncio.sleep(0.5)
+        waiting = len(produced)
+        body = await _body(response)
+        assert waiting < len(produced) // 2
+        assert sum(produced) == len(body)
+
+    asyncio.run(main())
+
+
+def test_streamed_build_over_the_keep_limit_is_not_stored(monkeypatch):
+    monkeypatch.setattr(settings, "docx_stream_keep_max_bytes", 1024)
+
+    async def main():
+        text = TEXT + "large"
+        streamed = await tools_routes.document_response(text, "NDA.docx")
+        body, joined = await asyncio.gather(_body(streamed), tools_routes.document_response(text, "NDA.docx"))
+        # The joined download built its own copy; the streamed package differs only in its zip headers
+        assert _parts(joined.body) == _parts(body)
+        assert text_digest(text) not in docx_store or docx_store.get(text_digest(text)) == joined.body
+        assert document_executor.in_flight == 0
+
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import threading
+
+from app.services.streaming import iterate_in_thread
+from main import app
+
+NDA = {
+    "execution_date": "2025-01-15",
+    "place_of_execution": "Pune",
+    "disclosing_party_name": "Asha Rao",
+    "disclosing_party_address": "12 FC Road, Pune",
+    "receiving_party_name": "Vikram Shah",
+    "receiving_party_address": "4 MG Road, Bengaluru",
+    "purpose_of_disclosure": "Evaluating a joint venture",
+    "confidentiality_duration_years": "3",
+    "jurisdiction_city": "Pune",
+}
+
+
+async def _call(path: str, payload: dict) -> list[dict]:
+    body = json.dumps(payload).encode("utf-8")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }
+    received = [{"type": "http.request", "body": body, "more_body": False}]
+    messages = []
+
+    async def receive():
+        return received.pop(0) if received else {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages
+
+
+def test_finished_document_is_sent_in_one_body_message():
+    messages = asyncio.run(_call("/docs/nda_download", NDA))
+    start, *bodies = messages
+    headers = dict(start["headers"])
+    assert start["status"] == 200
+    assert len(bodies) == 1 and not bodies[0].get("more_body", False)
+    assert int(headers[b"content-length"]) == len(bodies[0]["body"])
+
+
+def test_blocking_iterator_runs_in_one_thread():
+    threads = set()
+
+    def produce():
+        for n in range(20):
+            threads.add(threading.get_ident())
+            yield n
+
+    async def main():
+        return [item async for item in iterate_in_thread(produce())]
+
+    assert asyncio.run(main()) == list(range(20))
+    assert len(threads) == 1 and threading.get_ident() not in threads
+
+
+def test_slow_consumer_pauses_and_early_exit_closes_the_iterator():
+    produced = []
+    closed = threading.Event()
+
+    def produce():
+        try:
+            for n in range(1000):
+                produced.append(n)
+                yield n
+        finally:
+            closed.set()
+
+    async def main():
+        items = iterate_in_thread(produce(), max_buffered=2)
+        assert await items.__anext__() == 0
+        await asyncio.sleep(0.1)
+        # One taken, two waiting, and the producer blocked on the next one
+        assert len(produced) <= 4
+        await items.aclose()
+
+    asyncio.run(main())
+    # The producer noticed at its next item and stopped there
+    assert closed.wait(1)
+    assert len(produced) <= 5
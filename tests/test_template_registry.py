@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from app.services.template_registry import TemplateRegistry
+
+
+@pytest.fixture
+def templates(tmp_path):
+    (tmp_path / "letter.html").write_text("Dear {{ name }},\n")
+    (tmp_path / "notes.txt").write_text("not a template {{")
+    return tmp_path
+
+
+def test_templates_are_compiled_once(templates):
+    registry = TemplateRegistry(str(templates))
+    registry.load_all()
+    assert registry.loaded
+    assert registry.names() == ["letter.html"]
+    template = registry.get("letter.html")
+    (templates / "letter.html").write_text("Changed {{ name }}\n")
+    assert registry.get("letter.html") is template
+    assert template.render(name="Asha") == "Dear Asha,"
+
+
+def test_auto_reload_picks_up_edits(templates):
+    registry = TemplateRegistry(str(templates), auto_reload=True)
+    registry.load_all()
+    assert registry.get("letter.html").render(name="Asha") == "Dear Asha,"
+    (templates / "letter.html").write_text("Changed {{ name }}\n")
+    # Jinja notices a changed mtime; make sure it changes even on coarse-grained filesystems
+    os.utime(templates / "letter.html", (0, 0))
+    assert registry.get("letter.html").render(name="Asha") == "Changed Asha"
+
+
+def test_broken_templates_stop_startup(templates):
+    (templates / "broken.html").write_text("{% if name %}unclosed")
+    (templates / "also_broken.html").write_text("{{ name ")
+    registry = TemplateRegistry(str(templates))
+    with pytest.raises(RuntimeError) as failed:
+        registry.load_all()
+    assert "broken.html" in str(failed.value) and "also_broken.html" in str(failed.value)
+    assert not registry.loaded
+
+
+def test_bytecode_cache_is_written(templates, tmp_path_factory):
+    cache_dir = tmp_path_factory.mktemp("bytecode") / "cache"
+    TemplateRegistry(str(templates), bytecode_cache_dir=str(cache_dir)).load_all()
+    assert any(cache_dir.iterdir())